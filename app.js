@@ -5,7 +5,12 @@ import {
   QUALITY_LEVELS,
   TYPE_COLORS
 } from "./js/config.js";
-import { buildDatasetSummary, formatCoordinates, loadCheckpoints } from "./js/checkpoints.js";
+import {
+  buildDatasetSummary,
+  formatCoordinates,
+  loadCheckpointDataset,
+  normalizeSearch
+} from "./js/checkpoints.js";
 import {
   analyzeVisibility,
   createCheckpointLayer,
@@ -111,6 +116,7 @@ const dom = {
 
 const state = {
   features: [],
+  datasetSummary: null,
   filteredFeatures: [],
   selectedFeature: null,
   query: "",
@@ -145,30 +151,6 @@ function safeUrl(value) {
   }
 }
 
-function normalizeSearch(value) {
-  return String(value ?? "")
-    .toLocaleLowerCase("ru-RU")
-    .replaceAll("\u0451", "\u0435")
-    .trim();
-}
-
-function featureSearchText(feature) {
-  const props = feature.properties || {};
-  return normalizeSearch(
-    [
-      props.__id,
-      props.__name,
-      props.__type,
-      props.__status,
-      props.__country,
-      props.__subject,
-      props.__address,
-      props.__foreignCheckpoint,
-      props.__corridor
-    ].join(" ")
-  );
-}
-
 function setProgress(percent, text) {
   if (dom.loaderProgress) dom.loaderProgress.style.width = `${percent}%`;
   if (dom.loaderText && text) dom.loaderText.textContent = text;
@@ -235,8 +217,7 @@ function option(value, label, count) {
   return `<option value="${escapeHtml(value)}">${escapeHtml(label)}${suffix}</option>`;
 }
 
-function populateControls(features) {
-  const summary = buildDatasetSummary(features);
+function populateControls(features, summary) {
   const typeOptions = Object.entries(summary.typeCounts).sort(([left], [right]) =>
     left.localeCompare(right, "ru")
   );
@@ -268,7 +249,7 @@ function renderStats(summary, total) {
 }
 
 function renderLegend() {
-  const summary = buildDatasetSummary(state.features);
+  const summary = state.datasetSummary;
   const isQuality = state.colorMode === "quality";
   const title = isQuality ? TEXT.qualityLegend : TEXT.typeLegend;
   const entries = isQuality
@@ -683,7 +664,7 @@ function matchesFilters(feature) {
 
   if (state.type !== "all" && props.__type !== state.type) return false;
   if (state.status !== "all" && props.__status !== state.status) return false;
-  if (query && !featureSearchText(feature).includes(query)) return false;
+  if (query && !props.__search.includes(query)) return false;
 
   return true;
 }
@@ -915,6 +896,11 @@ function bindControls() {
   });
 }
 
+function registerServiceWorker() {
+  if (!("serviceWorker" in navigator) || globalThis.location.protocol === "file:") return;
+  navigator.serviceWorker.register("./sw.js").catch((error) => console.error(error));
+}
+
 async function init() {
   try {
     if (!globalThis.Cesium?.Viewer) {
@@ -936,7 +922,9 @@ async function init() {
       .catch((error) => console.error(error));
 
     setProgress(45, TEXT.loadingPoints);
-    state.features = await loadCheckpoints({ onProgress: setProgress });
+    const dataset = await loadCheckpointDataset({ onProgress: setProgress });
+    state.features = dataset.features;
+    state.datasetSummary = dataset.summary;
     state.filteredFeatures = state.features;
 
     setProgress(75, TEXT.drawingPoints);
@@ -946,7 +934,7 @@ async function init() {
       onSelect: handleSelection
     });
 
-    populateControls(state.features);
+    populateControls(state.features, state.datasetSummary);
     renderCameraDock();
     bindControls();
     syncMobilePanels();
@@ -976,3 +964,4 @@ async function init() {
 }
 
 init();
+globalThis.addEventListener("load", registerServiceWorker);
@@ -0,0 +1,17 @@
+import { fetchCheckpointPayload, packCheckpoints, prepareCheckpoints } from "./checkpoints.js";
+
+function postProgress(percent, text) {
+  globalThis.postMessage({ type: "progress", percent, text });
+}
+
+globalThis.addEventListener("message", async (event) => {
+  try {
+    const payload = await fetchCheckpointPayload(event.data.url, { onProgress: postProgress });
+    const { message, transfer } = packCheckpoints(
+      prepareCheckpoints(payload, { onProgress: postProgress })
+    );
+    globalThis.postMessage({ type: "result", ...message }, transfer);
+  } catch (error) {
+    globalThis.postMessage({ type: "error", message: String(error?.message || error) });
+  }
+});
@@ -2,6 +2,13 @@ import { CHECKPOINT_TYPES, QUALITY_LEVELS, UNKNOWN_VALUE } from "./config.js";
 
 const DATA_URL = "./data/checkpoints.geojson";
 const UTF8_DECODER = new TextDecoder("utf-8", { fatal: false });
+const SEARCH_ENCODER = new TextEncoder();
+const PROGRESS_CHUNK = 500;
+const PROGRESS_TEXT = {
+  reading: "\u0427\u0438\u0442\u0430\u0435\u043c GeoJSON...",
+  processing:
+    "\u041e\u0431\u0440\u0430\u0431\u0430\u0442\u044b\u0432\u0430\u0435\u043c \u041a\u041f\u041f..."
+};
 const WINDOWS_1252_EXTENSIONS = new Map([
   [0x80, String.fromCodePoint(0x20ac)],
   [0x82, String.fromCodePoint(0x201a)],
@@ -297,12 +304,35 @@ function normalizeFeature(feature, index) {
   };
 }
 
-export async function loadCheckpoints({ fetchImpl = globalThis.fetch, baseUrl, onProgress } = {}) {
-  const pageUrl = baseUrl || globalThis.window?.location?.href || "http://localhost/";
-  const url = new URL(DATA_URL, pageUrl).toString();
+function searchText(props) {
+  return normalizeSearch(
+    [
+      props.__id,
+      props.__name,
+      props.__type,
+      props.__status,
+      props.__country,
+      props.__subject,
+      props.__address,
+      props.__foreignCheckpoint,
+      props.__corridor
+    ].join(" ")
+  );
+}
+
+export function normalizeSearch(value) {
+  return String(value ?? "")
+    .toLocaleLowerCase("ru-RU")
+    .replaceAll("\u0451", "\u0435")
+    .trim();
+}
 
-  onProgress?.(50, "\u0427\u0438\u0442\u0430\u0435\u043c GeoJSON...");
-  const response = await fetchImpl(url, { cache: "no-store" });
+export async function fetchCheckpointPayload(
+  url,
+  { fetchImpl = globalThis.fetch, onProgress } = {}
+) {
+  onProgress?.(50, PROGRESS_TEXT.reading);
+  const response = await fetchImpl(url, { cache: "no-cache" });
 
   if (!response.ok) {
     throw new Error(
@@ -310,10 +340,44 @@ export async function loadCheckpoints({ fetchImpl = globalThis.fetch, baseUrl, o
     );
   }
 
-  const payload = await response.json();
-  const features = (payload.features || [])
-    .map(normalizeFeature)
-    .filter((item) => item?.geometry?.type === "Point");
+  // Content-Length is the compressed size when the server gzips, so progress is capped.
+  const total = Number(response.headers?.get("Content-Length")) || 0;
+  const reader = total ? response.body?.getReader() : null;
+  if (!reader) return response.json();
+
+  const chunks = [];
+  let received = 0;
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    chunks.push(value);
+    received += value.byteLength;
+    onProgress?.(50 + Math.round((10 * Math.min(received, total)) / total), PROGRESS_TEXT.reading);
+  }
+
+  const bytes = new Uint8Array(received);
+  let offset = 0;
+  for (const chunk of chunks) {
+    bytes.set(chunk, offset);
+    offset += chunk.byteLength;
+  }
+  return JSON.parse(UTF8_DECODER.decode(bytes));
+}
+
+export function prepareCheckpoints(payload, { onProgress } = {}) {
+  const source = payload.features || [];
+  const features = [];
+
+  for (let index = 0; index < source.length; index += 1) {
+    const feature = normalizeFeature(source[index], index);
+    if (feature?.geometry?.type === "Point") {
+      feature.properties.__search = searchText(feature.properties);
+      features.push(feature);
+    }
+    if ((index + 1) % PROGRESS_CHUNK === 0) {
+      onProgress?.(60 + Math.round((12 * (index + 1)) / source.length), PROGRESS_TEXT.processing);
+    }
+  }
 
   if (!features.length) {
     throw new Error(
@@ -321,7 +385,121 @@ export async function loadCheckpoints({ fetchImpl = globalThis.fetch, baseUrl, o
     );
   }
 
-  return features;
+  return { features, summary: buildDatasetSummary(features) };
+}
+
+// Coordinates and search texts travel as transferable typed arrays; only the
+// property objects are structured-cloned.
+export function packCheckpoints({ features, summary }) {
+  const coordinates = new Float64Array(features.length * 2);
+  const searchOffsets = new Uint32Array(features.length + 1);
+  const searchParts = [];
+  const properties = features.map((feature, index) => {
+    const { __search: search, ...props } = feature.properties;
+    const encoded = SEARCH_ENCODER.encode(search);
+    coordinates[index * 2] = feature.geometry.coordinates[0];
+    coordinates[index * 2 + 1] = feature.geometry.coordinates[1];
+    searchParts.push(encoded);
+    searchOffsets[index + 1] = searchOffsets[index] + encoded.byteLength;
+    return props;
+  });
+
+  const searchBytes = new Uint8Array(searchOffsets[features.length]);
+  searchParts.forEach((part, index) => searchBytes.set(part, searchOffsets[index]));
+
+  return {
+    message: { properties, coordinates, searchBytes, searchOffsets, summary },
+    transfer: [coordinates.buffer, searchBytes.buffer, searchOffsets.buffer]
+  };
+}
+
+export function unpackCheckpoints({
+  properties,
+  coordinates,
+  searchBytes,
+  searchOffsets,
+  summary
+}) {
+  const features = properties.map((props, index) => {
+    props.__search = UTF8_DECODER.decode(
+      searchBytes.subarray(searchOffsets[index], searchOffsets[index + 1])
+    );
+    return {
+      type: "Feature",
+      geometry: {
+        type: "Point",
+        coordinates: [coordinates[index * 2], coordinates[index * 2 + 1]]
+      },
+      properties: props
+    };
+  });
+
+  return { features, summary };
+}
+
+function createCheckpointWorker() {
+  if (typeof globalThis.Worker !== "function") return null;
+  return new Worker(new URL("./checkpointWorker.js", import.meta.url), { type: "module" });
+}
+
+function loadInWorker(worker, url, onProgress) {
+  return new Promise((resolve, reject) => {
+    worker.addEventListener("message", (event) => {
+      const { data } = event;
+      if (data.type === "progress") {
+        onProgress?.(data.percent, data.text);
+      } else if (data.type === "result") {
+        resolve(unpackCheckpoints(data));
+      } else {
+        reject(new Error(data.message));
+      }
+    });
+    // A worker that cannot start (no module workers, blocked script) falls back to this thread.
+    worker.addEventListener("error", (event) => {
+      event.preventDefault?.();
+      const error = new Error(event.message || "Checkpoint worker failed");
+      error.workerFailed = true;
+      reject(error);
+    });
+    worker.postMessage({ url });
+  });
+}
+
+export async function loadCheckpointDataset({
+  fetchImpl = globalThis.fetch,
+  baseUrl,
+  onProgress,
+  createWorker = createCheckpointWorker
+} = {}) {
+  const pageUrl = baseUrl || globalThis.window?.location?.href || "http://localhost/";
+  const url = new URL(DATA_URL, pageUrl).toString();
+
+  // The worker fetches on its own, so a custom fetchImpl keeps loading on this thread.
+  let worker = null;
+  try {
+    worker = fetchImpl === globalThis.fetch ? createWorker() : null;
+  } catch (error) {
+    console.warn(error);
+  }
+
+  if (worker) {
+    try {
+      return await loadInWorker(worker, url, onProgress);
+    } catch (error) {
+      if (!error.workerFailed) throw error;
+      console.warn(error);
+    } finally {
+      worker.terminate();
+    }
+  }
+
+  return prepareCheckpoints(await fetchCheckpointPayload(url, { fetchImpl, onProgress }), {
+    onProgress
+  });
+}
+
+export async function loadCheckpoints(options) {
+  return (await loadCheckpointDataset(options)).features;
 }
 
 export function buildDatasetSummary(features) {
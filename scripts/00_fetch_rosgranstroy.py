@@ -3,13 +3,15 @@ import requests
 from pathlib import Path
 from datetime import datetime
 
+from dataset_release import write_file_atomic
+from pipeline_context import PipelineContext
 from pipeline_validation import tqdm
 
 API_URL = "https://rosgranstroy.ru/api/map_data"
 OUT_FILE = Path("raw_data/rosgranstroy_map_data.json")
 
 
-def main():
+def run(context):
     print("=== STEP 1. Fetch Rosgranstroy data ===")
     print("Source:", API_URL)
 
@@ -33,15 +35,17 @@ def main():
         "data": data,
     }
 
-    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    OUT_FILE.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    write_file_atomic(OUT_FILE, json.dumps(payload, ensure_ascii=False, indent=2))
+    context.remember(OUT_FILE, payload)
 
     print("\nData saved to disk.")
     print("Output file:", OUT_FILE.resolve())
     print("=== STEP 1 completed ===\n")
+    return context
+
+
+def main():
+    run(PipelineContext())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+from dataset_release import write_file_atomic
+from pipeline_context import PipelineContext
 from pipeline_validation import (
     ValidationError,
     normalize_coordinate_text,
@@ -62,16 +64,7 @@ def serialize_field(value):
     return str(value).replace("\r\n", "\n").replace("\r", "\n")
 
 
-def main():
-    print("=== STEP 2. Normalize checkpoint data ===")
-    print("Input file:", INPUT_FILE.resolve())
-
-    raw = json.loads(INPUT_FILE.read_text(encoding="utf-8"))
-    data = validate_raw_payload(raw)
-    federal_districts = data["federal_districts"]
-
-    print("Federal districts found:", len(federal_districts))
-
+def build_rows(federal_districts):
     rows = []
 
     subjects_total = sum(
@@ -138,26 +131,53 @@ def main():
 
                 pbar.update(1)
 
-    validate_rows(rows)
-
-    normalized_rows = [
-        {
-            field_name: serialize_field(row.get(field_name, ""))
-            for field_name in ROW_FIELDS
-        }
-        for row in rows
-    ]
-    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_FILE.write_text(
-        json.dumps(normalized_rows, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    return rows
+
+
+def run(context):
+    print("=== STEP 2. Normalize checkpoint data ===")
+    print("Input file:", INPUT_FILE.resolve())
+
+    with context.phase("load"):
+        raw = context.load_json(INPUT_FILE)
+        data = validate_raw_payload(raw)
+        federal_districts = data["federal_districts"]
+
+    print("Federal districts found:", len(federal_districts))
+
+    with context.phase("normalize") as phase:
+        rows = build_rows(federal_districts)
+        phase["rows"] = len(rows)
+
+    with context.phase("validate") as phase:
+        context.validation["rows"] = validate_rows(rows)
+        phase["rows"] = len(rows)
+
+    with context.phase("serialize") as phase:
+        normalized_rows = [
+            {
+                field_name: serialize_field(row.get(field_name, ""))
+                for field_name in ROW_FIELDS
+            }
+            for row in rows
+        ]
+        serialized_rows = json.dumps(normalized_rows, ensure_ascii=False, indent=2)
+        phase["rows"] = len(normalized_rows)
+
+    with context.phase("write"):
+        write_file_atomic(OUTPUT_FILE, serialized_rows)
+        context.remember(OUTPUT_FILE, normalized_rows)
 
     print("Validation passed for rows:", len(rows))
     print("\nNormalized JSON created successfully.")
     print("Output file:", OUTPUT_FILE.resolve())
     print("Checkpoint rows:", len(rows))
     print("=== STEP 2 completed ===\n")
+    return context
+
+
+def main():
+    run(PipelineContext())
 
 
 if __name__ == "__main__":
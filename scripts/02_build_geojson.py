@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+from dataset_release import write_file_atomic
+from pipeline_context import PipelineContext
 from pipeline_validation import (
     ValidationError,
     parse_coordinate,
@@ -14,17 +16,7 @@ OUTPUT_FILE = Path("data/checkpoints.geojson")
 FRONTEND_OUTPUT_FILE = Path("frontend/data/checkpoints.geojson")
 
 
-def main():
-    print("=== STEP 3. Build final GeoJSON ===")
-    print("Normalized JSON source:", INPUT_FILE.resolve())
-
-    rows = json.loads(INPUT_FILE.read_text(encoding="utf-8"))
-    if not isinstance(rows, list):
-        raise ValidationError("Normalized checkpoint input must be a JSON list.")
-
-    print("Rows in normalized JSON:", len(rows))
-    validate_rows(rows)
-
+def build_features(rows):
     features = []
 
     for row in tqdm(rows, total=len(rows), desc="Building GeoJSON", unit="row"):
@@ -45,23 +37,55 @@ def main():
             "properties": props,
         })
 
-    geojson = {
-        "type": "FeatureCollection",
-        "features": features,
-    }
-    validate_geojson(geojson)
+    return features
+
+
+def run(context):
+    print("=== STEP 3. Build final GeoJSON ===")
+    print("Normalized JSON source:", INPUT_FILE.resolve())
+
+    with context.phase("load"):
+        rows = context.load_json(INPUT_FILE)
+        if not isinstance(rows, list):
+            raise ValidationError("Normalized checkpoint input must be a JSON list.")
+
+    print("Rows in normalized JSON:", len(rows))
+
+    with context.phase("validate") as phase:
+        validate_rows(rows)
+        phase["rows"] = len(rows)
 
-    serialized_geojson = json.dumps(geojson, ensure_ascii=False, indent=2)
+    with context.phase("normalize") as phase:
+        features = build_features(rows)
+        geojson = {
+            "type": "FeatureCollection",
+            "features": features,
+        }
+        phase["rows"] = len(features)
 
-    for output_file in (OUTPUT_FILE, FRONTEND_OUTPUT_FILE):
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(serialized_geojson, encoding="utf-8", newline="\n")
+    with context.phase("validate") as phase:
+        context.validation["geojson"] = validate_geojson(geojson)
+        phase["rows"] = len(features)
+
+    with context.phase("serialize") as phase:
+        serialized_geojson = json.dumps(geojson, ensure_ascii=False, indent=2)
+        phase["rows"] = len(features)
+
+    with context.phase("write"):
+        for output_file in (OUTPUT_FILE, FRONTEND_OUTPUT_FILE):
+            write_file_atomic(output_file, serialized_geojson)
+        context.remember(OUTPUT_FILE, geojson)
 
     print("Final file:", OUTPUT_FILE.resolve())
     print("Frontend copy:", FRONTEND_OUTPUT_FILE.resolve())
     print("Features written:", len(features))
     print("GeoJSON validation passed.")
     print("=== STEP 3 completed ===")
+    return context
+
+
+def main():
+    run(PipelineContext())
 
 
 if __name__ == "__main__":
@@ -2,54 +2,135 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
+from checkpoint_history import (
+    load_checkpoint_history,
+    update_checkpoint_history,
+    validate_checkpoint_history,
+    write_checkpoint_history,
+)
+from dataset_release import write_file_atomic
+from pipeline_context import PipelineContext
 from pipeline_validation import (
-    build_dataset_snapshot,
+    build_dataset_merkle_tree,
     build_dataset_version,
+    diff_dataset_features,
+    diff_dataset_merkle_trees,
     summarize_dataset_changes,
     validate_dataset_changelog,
+    validate_dataset_merkle_tree,
 )
 
 GEOJSON_PATH = Path("data/checkpoints.geojson")
 CHANGELOG_PATH = Path("data/dataset_changelog.json")
+PREVIOUS_GEOJSON_PATH = Path("data/.checkpoints_previous.geojson")
+MERKLE_TREE_PATH = Path("data/dataset_merkle_tree.json")
 
 
-def load_json(path, default):
-    if not path.exists():
-        return default
+def write_json(path, payload):
+    write_file_atomic(path, json.dumps(payload, ensure_ascii=False, indent=2) + "\n")
 
-    return json.loads(path.read_text(encoding="utf-8"))
 
+def write_merkle_tree(context, features, snapshot, version):
+    previous_tree = context.load_json(MERKLE_TREE_PATH, None)
+    tree = build_dataset_merkle_tree(
+        features,
+        dataset_version=version,
+        feature_hashes=snapshot["featureHashes"],
+    )
+    validate_dataset_merkle_tree(tree)
+    diff = diff_dataset_merkle_trees(previous_tree, tree)
 
-def main():
-    geojson = load_json(GEOJSON_PATH, {"features": []})
-    features = geojson.get("features") or []
-    changelog = load_json(CHANGELOG_PATH, {"schemaVersion": 1, "entries": []})
-    entries = changelog.setdefault("entries", [])
-    current_snapshot = build_dataset_snapshot(features)
-    version = build_dataset_version(current_snapshot)
+    if diff["rootChanged"]:
+        write_json(MERKLE_TREE_PATH, tree)
+        context.remember(MERKLE_TREE_PATH, tree)
+        print("Changed federal districts:", len(diff["districts"]))
+        print("Changed subjects:", len(diff["subjects"]))
+    else:
+        print("Dataset Merkle tree is unchanged.")
+
+
+def update_history(context, changelog):
+    history = load_checkpoint_history()
+    processed = update_checkpoint_history(history, changelog)
+    validate_checkpoint_history(history, changelog)
+
+    if processed:
+        write_checkpoint_history(history)
+        print("Checkpoint history versions added:", len(processed))
+    else:
+        print("Checkpoint history is up to date.")
+
+
+def run(context):
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH, {"features": []})
+        features = geojson.get("features") or []
+        changelog = context.load_json(CHANGELOG_PATH, {"schemaVersion": 1, "entries": []})
+        entries = changelog.setdefault("entries", [])
+
+    with context.phase("normalize") as phase:
+        current_snapshot = context.dataset_snapshot(geojson)
+        version = build_dataset_version(current_snapshot)
+        phase["rows"] = len(features)
+
+    with context.phase("write"):
+        write_merkle_tree(context, features, current_snapshot, version)
 
     if entries and entries[0].get("version") == version:
-        validate_dataset_changelog(changelog, geojson)
+        with context.phase("validate"):
+            context.validation["changelog"] = validate_dataset_changelog(
+                changelog,
+                geojson,
+                current_snapshot=current_snapshot,
+            )
+            update_history(context, changelog)
         print(f"Changelog already contains current dataset version: {version}")
-        return
+        return context
 
     previous_snapshot = entries[0].get("snapshot") if entries else None
+    previous_geojson = context.load_json(PREVIOUS_GEOJSON_PATH, {"features": []})
+    changes = summarize_dataset_changes(previous_snapshot, current_snapshot)
+
+    if "modified" in changes:
+        with context.phase("normalize") as phase:
+            diff = diff_dataset_features(
+                previous_snapshot,
+                current_snapshot,
+                previous_geojson.get("features") or [],
+                features,
+            )
+            changes["modifiedCheckpoints"] = diff["modified"]
+            phase["rows"] = len(diff["modified"])
+
     entry = {
         "version": version,
         "date": datetime.now(timezone.utc).date().isoformat(),
         "generatedAt": datetime.now(timezone.utc).isoformat(),
         "summary": "Automated checkpoint dataset snapshot.",
-        "changes": summarize_dataset_changes(previous_snapshot, current_snapshot),
+        "changes": changes,
         "snapshot": current_snapshot,
     }
 
     entries.insert(0, entry)
-    validate_dataset_changelog(changelog, geojson)
-    CHANGELOG_PATH.write_text(
-        json.dumps(changelog, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+
+    with context.phase("validate"):
+        context.validation["changelog"] = validate_dataset_changelog(
+            changelog,
+            geojson,
+            current_snapshot=current_snapshot,
+        )
+
+    with context.phase("write"):
+        write_json(CHANGELOG_PATH, changelog)
+        context.remember(CHANGELOG_PATH, changelog)
+        update_history(context, changelog)
     print(f"Added dataset changelog version: {version}")
+    print("Modified checkpoints:", changes.get("modified", "unknown"))
+    return context
+
+
+def main():
+    run(PipelineContext())
 
 
 if __name__ == "__main__":
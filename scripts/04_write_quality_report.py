@@ -1,10 +1,11 @@
 import json
 from pathlib import Path
 
+from dataset_release import write_file_atomic
+from pipeline_context import PipelineContext
 from pipeline_validation import (
     ValidationError,
     analyze_data_quality,
-    build_dataset_snapshot,
     build_dataset_version,
 )
 
@@ -12,15 +13,16 @@ GEOJSON_PATH = Path("data/checkpoints.geojson")
 QUALITY_REPORT_PATH = Path("data/data_quality_report.json")
 
 
-def load_json(path):
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def main():
+def run(context):
     print("=== STEP 5. Write data quality report ===")
-    geojson = load_json(GEOJSON_PATH)
-    snapshot = build_dataset_snapshot(geojson.get("features") or [])
-    report = analyze_data_quality(geojson)
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH)
+
+    with context.phase("validate") as phase:
+        snapshot = context.dataset_snapshot(geojson)
+        report = analyze_data_quality(geojson)
+        context.validation["quality"] = report
+        phase["rows"] = report["summary"]["checked"]
 
     if report["errors"]:
         raise ValidationError("Data quality report contains blocking errors.")
@@ -35,15 +37,22 @@ def main():
         "errors": report["errors"],
     }
 
-    QUALITY_REPORT_PATH.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+    with context.phase("serialize"):
+        serialized_payload = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+
+    with context.phase("write"):
+        write_file_atomic(QUALITY_REPORT_PATH, serialized_payload)
+        context.remember(QUALITY_REPORT_PATH, payload)
 
     print("Quality report:", QUALITY_REPORT_PATH.resolve())
     print("Warnings:", report["summary"]["warningCount"])
     print("Errors:", report["summary"]["errorCount"])
     print("=== STEP 5 completed ===")
+    return context
+
+
+def main():
+    run(PipelineContext())
 
 
 if __name__ == "__main__":
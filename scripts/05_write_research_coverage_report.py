@@ -1,36 +1,151 @@
+import argparse
 import json
 from pathlib import Path
 
-from research_coverage import build_research_coverage_report, validate_research_coverage_report
+from coverage_cube import CUBE_PATH, serialize_coverage_cube
+from dataset_release import write_file_atomic
+from enrichment_store import open_store
+from pipeline_context import PipelineContext
+from research_coverage import (
+    QUEUE_PAGES_DIR,
+    build_enrichment_index_from_store,
+    build_input_fingerprint,
+    build_research_coverage,
+    check_input_fingerprint,
+    check_queue_pages,
+    paginate_research_coverage_report,
+    validate_research_coverage_report,
+)
 
 GEOJSON_PATH = Path("data/checkpoints.geojson")
 ENRICHMENT_PATH = Path("data/checkpoint_enrichment.json")
 REPORT_PATH = Path("data/research_coverage_report.json")
 
 
-def load_json(path):
-    return json.loads(path.read_text(encoding="utf-8"))
+def write_queue_pages(pages: dict[str, str]) -> None:
+    for path, serialized in pages.items():
+        write_file_atomic(Path(path), serialized)
 
+    # Pages of queues that shrank would otherwise linger next to the new ones.
+    for stale in QUEUE_PAGES_DIR.glob("*/page-*.json"):
+        if stale.as_posix() not in pages:
+            stale.unlink()
 
-def main():
+
+def run(context):
     print("=== STEP 6. Write research coverage report ===")
-    geojson = load_json(GEOJSON_PATH)
-    enrichment_payload = load_json(ENRICHMENT_PATH)
-    report = build_research_coverage_report(geojson, enrichment_payload)
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH)
+        enrichment_payload = context.load_json(ENRICHMENT_PATH)
+        input_fingerprint = build_input_fingerprint(GEOJSON_PATH, ENRICHMENT_PATH)
+        with open_store(
+            ENRICHMENT_PATH,
+            fingerprint=input_fingerprint["enrichment"],
+            payload=enrichment_payload,
+        ) as store:
+            enrichment_index = build_enrichment_index_from_store(store)
+        # Unchanged inputs keep the previous timestamp, so the report bytes and their mtime stay put.
+        previous = json.loads(REPORT_PATH.read_text(encoding="utf-8")) if REPORT_PATH.exists() else {}
+        generated_at = previous.get("generatedAt") if previous.get("inputFingerprint") == input_fingerprint else None
 
-    validate_research_coverage_report(report, geojson, enrichment_payload)
+    with context.phase("normalize") as phase:
+        snapshot = context.dataset_snapshot(geojson)
+        report, cube = build_research_coverage(
+            geojson,
+            enrichment_payload,
+            snapshot=snapshot,
+            input_fingerprint=input_fingerprint,
+            enrichment_index=enrichment_index,
+            generated_at=generated_at,
+        )
+        cube_payload = cube.to_dict(
+            datasetVersion=report["datasetVersion"],
+            inputFingerprint=input_fingerprint,
+        )
+        summary_document, pages = paginate_research_coverage_report(report)
+        phase["rows"] = report["summary"]["totalCheckpoints"]
 
-    REPORT_PATH.write_text(
-        json.dumps(report, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+    with context.phase("validate"):
+        context.validation["researchCoverage"] = validate_research_coverage_report(
+            summary_document,
+            geojson,
+            enrichment_payload,
+            snapshot=snapshot,
+            input_fingerprint=input_fingerprint,
+        )
+
+    with context.phase("serialize"):
+        serialized_report = json.dumps(summary_document, ensure_ascii=False, indent=2) + "\n"
+        serialized_cube = serialize_coverage_cube(cube_payload)
+
+    with context.phase("write"):
+        # Pages go first so the summary never lists a page that is not written yet.
+        write_queue_pages(pages)
+        write_file_atomic(REPORT_PATH, serialized_report)
+        write_file_atomic(CUBE_PATH, serialized_cube)
+        context.remember(REPORT_PATH, summary_document)
+        context.remember(CUBE_PATH, cube_payload)
 
     summary = report["summary"]
     print("Research coverage report:", REPORT_PATH.resolve())
+    print("Queue pages:", len(pages), "in", QUEUE_PAGES_DIR.resolve())
+    print("Coverage cube cells:", len(cube.cells))
     print("Descriptions:", f"{summary['describedCheckpoints']}/{summary['totalCheckpoints']}")
     print("Missing descriptions:", summary["missingDescriptionCount"])
     print("Missing events or verification:", summary["missingEventCoverage"])
     print("=== STEP 6 completed ===")
+    return context
+
+
+def check(context, *, deep=False):
+    report = context.load_json(REPORT_PATH)
+    input_fingerprint = build_input_fingerprint(GEOJSON_PATH, ENRICHMENT_PATH)
+
+    if not deep:
+        # Matching hashes prove the report was built from these exact files.
+        check_input_fingerprint(report, input_fingerprint)
+        check_input_fingerprint(context.load_json(CUBE_PATH), input_fingerprint)
+        pages = check_queue_pages(report)
+        print("Research coverage report matches its input fingerprint;", pages, "queue pages match their hashes.")
+        return report["summary"]["totalCheckpoints"]
+
+    geojson = context.load_json(GEOJSON_PATH)
+    total = validate_research_coverage_report(
+        report,
+        geojson,
+        context.load_json(ENRICHMENT_PATH),
+        snapshot=context.dataset_snapshot(geojson),
+        input_fingerprint=input_fingerprint,
+        deep=True,
+    )
+    check_queue_pages(report)
+    print("Research coverage report matches a full rebuild:", total, "checkpoints")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write or check the research coverage report.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Validate the existing report against the current inputs instead of writing it.",
+    )
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="With --check, rebuild the report and compare it instead of only comparing fingerprints.",
+    )
+    args = parser.parse_args()
+
+    if not args.check:
+        run(PipelineContext())
+        return
+
+    try:
+        check(PipelineContext(), deep=args.deep)
+    except ValueError as exc:
+        print(f"Validation failed: {exc}")
+        raise SystemExit(1) from exc
 
 
 if __name__ == "__main__":
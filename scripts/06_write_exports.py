@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from arrow_export import (
+    ARROW_CHECKPOINTS_PATH,
+    ARROW_ENRICHMENT_PATH,
+    checkpoint_columns,
+    enrichment_columns,
+    write_arrow,
+)
+from enrichment_store import file_fingerprint
+from flatgeobuf_export import FLATGEOBUF_PATH, write_flatgeobuf
+from geopackage_export import GEOPACKAGE_PATH, write_geopackage
+from pipeline_context import PipelineContext
+from pipeline_validation import ValidationError, build_dataset_version
+
+GEOJSON_PATH = Path("data/checkpoints.geojson")
+ENRICHMENT_PATH = Path("data/checkpoint_enrichment.json")
+
+
+def run(context):
+    print("=== STEP 7. Write dataset exports ===")
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH)
+        enrichment_payload = context.load_json(ENRICHMENT_PATH, default={"records": []})
+        enrichment_fingerprint = file_fingerprint(ENRICHMENT_PATH) if ENRICHMENT_PATH.exists() else None
+
+    with context.phase("normalize"):
+        dataset_version = build_dataset_version(context.dataset_snapshot(geojson))
+
+    with context.phase("write") as phase:
+        geopackage = write_geopackage(
+            GEOPACKAGE_PATH,
+            geojson,
+            enrichment_payload,
+            dataset_version=dataset_version,
+            enrichment_fingerprint=enrichment_fingerprint,
+        )
+        flatgeobuf_size = write_flatgeobuf(FLATGEOBUF_PATH, geojson)
+        metadata = {"datasetVersion": dataset_version, "enrichmentFingerprint": enrichment_fingerprint}
+        write_arrow(ARROW_CHECKPOINTS_PATH, checkpoint_columns(geojson), metadata)
+        write_arrow(ARROW_ENRICHMENT_PATH, enrichment_columns(enrichment_payload), metadata)
+        phase["rows"] = len(geojson.get("features") or [])
+
+    print("Dataset version:", dataset_version)
+    if geopackage["status"] == "current":
+        print("GeoPackage already up to date:", GEOPACKAGE_PATH.resolve())
+    else:
+        print("GeoPackage:", GEOPACKAGE_PATH.resolve())
+        print(
+            "Checkpoints inserted/updated/deleted/unchanged:",
+            "/".join(str(geopackage[key]) for key in ("inserted", "updated", "deleted", "unchanged")),
+        )
+        print("Enrichment records:", geopackage["records"])
+    print(f"FlatGeobuf: {FLATGEOBUF_PATH.resolve()} ({flatgeobuf_size} bytes)")
+    print("Arrow IPC:", ARROW_CHECKPOINTS_PATH.resolve(), ARROW_ENRICHMENT_PATH.resolve())
+    print("=== STEP 7 completed ===")
+    return context
+
+
+def main():
+    run(PipelineContext())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValidationError as exc:
+        print(f"Validation failed: {exc}")
+        raise SystemExit(1) from exc
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from dataset_release import RELEASES_DIR, publish_release
+from pipeline_context import PipelineContext
+from pipeline_validation import ValidationError, build_dataset_version
+from research_coverage import QUEUE_PAGES_DIR
+
+GEOJSON_PATH = Path("data/checkpoints.geojson")
+RELEASE_FILES = [
+    GEOJSON_PATH,
+    Path("data/checkpoint_enrichment.json"),
+    Path("data/dataset_changelog.json"),
+    Path("data/dataset_merkle_tree.json"),
+    Path("data/checkpoint_history.json"),
+    Path("data/data_quality_report.json"),
+    Path("data/research_coverage_report.json"),
+    Path("data/research_coverage_cube.json"),
+    Path("data/exports/checkpoints.gpkg"),
+    Path("data/exports/checkpoints.fgb"),
+    Path("data/exports/checkpoints.arrow"),
+    Path("data/exports/checkpoint_enrichment.arrow"),
+]
+
+
+def run(context):
+    print("=== STEP 8. Publish dataset release ===")
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH)
+        files = [path for path in RELEASE_FILES if path.exists()]
+        files += sorted(QUEUE_PAGES_DIR.glob("*/page-*.json"))
+
+    with context.phase("normalize"):
+        dataset_version = build_dataset_version(context.dataset_snapshot(geojson))
+
+    with context.phase("write") as phase:
+        release = publish_release(files, dataset_version=dataset_version)
+        phase["rows"] = len(files)
+
+    if release["status"] == "current":
+        print("Release already current:", release["release"])
+    else:
+        print("Release:", release["path"].resolve())
+        print("Files copied/reused:", f"{release['copied']}/{release['reused']}")
+    print("Current release:", (RELEASES_DIR / "current").as_posix())
+    if release["pruned"]:
+        print("Pruned releases:", ", ".join(release["pruned"]))
+    print("=== STEP 8 completed ===")
+    return context
+
+
+def main():
+    run(PipelineContext())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValidationError as exc:
+        print(f"Validation failed: {exc}")
+        raise SystemExit(1) from exc
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from dataset_patches import PATCH_MANIFEST_PATH, write_patches
+from pipeline_context import PipelineContext
+from pipeline_validation import ValidationError
+
+GEOJSON_PATH = Path("data/checkpoints.geojson")
+PREVIOUS_GEOJSON_PATH = Path("data/.checkpoints_previous.geojson")
+
+
+def run(context):
+    print("=== STEP 9. Write dataset patches ===")
+    with context.phase("load"):
+        geojson = context.load_json(GEOJSON_PATH)
+
+    with context.phase("write") as phase:
+        manifest = write_patches(geojson, latest_path=GEOJSON_PATH, previous_paths=[PREVIOUS_GEOJSON_PATH])
+        phase["rows"] = len(manifest["patches"])
+
+    print("Latest version:", manifest["latestVersion"], f"({manifest['latest']['size']} bytes)")
+    for version, entry in manifest["patches"].items():
+        print(
+            f"Patch from {version}: {entry['size']} bytes, "
+            f"{entry['added']} added, {entry['removed']} removed, {entry['changed']} changed"
+        )
+    print("Patch manifest:", PATCH_MANIFEST_PATH.resolve())
+    print("=== STEP 9 completed ===")
+    return context
+
+
+def main():
+    run(PipelineContext())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValidationError as exc:
+        print(f"Validation failed: {exc}")
+        raise SystemExit(1) from exc
@@ -0,0 +1,433 @@
+"""Columnar Arrow IPC (Feather v2) export of the checkpoints and enrichment records.
+
+Each file is the Arrow IPC file format: a schema message, one dictionary batch
+per dictionary-encoded column, a single record batch and a footer indexing
+them. Low-cardinality strings such as ``status``, ``checkpoint_type`` and
+``federal_district`` are dictionary-encoded as int32 indices, the remaining
+properties are UTF-8 columns and the coordinates are float64 columns. The
+dataset version travels in the schema metadata, so snapshots can be told apart
+without reading any rows.
+
+``ArrowFile`` memory-maps a file and hands out columns as views into the
+mapping: numeric columns are ``memoryview`` casts and strings are decoded only
+when indexed, so counts and joins over many snapshots touch only the pages of
+the columns they use.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from collections import Counter
+from pathlib import Path
+
+from dataset_release import write_file_atomic
+from flatbuffers_codec import FlatBufferBuilder, FlatBufferTable, table_fields
+from geopackage_export import feature_columns
+
+ARROW_CHECKPOINTS_PATH = Path("data/exports/checkpoints.arrow")
+ARROW_ENRICHMENT_PATH = Path("data/exports/checkpoint_enrichment.arrow")
+MAGIC = b"ARROW1"
+CONTINUATION = 0xFFFFFFFF
+ALIGNMENT = 8
+METADATA_V5 = 4
+HEADER_SCHEMA, HEADER_DICTIONARY_BATCH, HEADER_RECORD_BATCH = 1, 2, 3
+TYPE_INT, TYPE_FLOATING_POINT, TYPE_UTF8 = 2, 3, 5
+PRECISION_DOUBLE = 2
+BLOCK = "qi4xq"  # offset, metaDataLength, padding, bodyLength
+FIELD_NODE = BUFFER = "qq"
+DICTIONARY_COLUMNS = ("checkpoint_type", "status", "federal_district")
+COORDINATE_COLUMNS = ("longitude", "latitude")
+ENRICHMENT_FIELDS = (
+    ("checkpoint_id", "checkpointId"),
+    ("kind", "kind"),
+    ("title", "title"),
+    ("summary", "summary"),
+    ("source_id", "sourceId"),
+    ("source_title", "sourceTitle"),
+    ("confidence", "confidence"),
+    ("tags", "tags"),
+)
+ENRICHMENT_DICTIONARY_COLUMNS = ("kind", "confidence")
+
+# Field ids from the Arrow Schema.fbs, Message.fbs and File.fbs schemas.
+MESSAGE_VERSION, MESSAGE_HEADER_TYPE, MESSAGE_HEADER, MESSAGE_BODY_LENGTH = 0, 1, 2, 3
+SCHEMA_FIELDS, SCHEMA_METADATA = 1, 2
+FIELD_NAME, FIELD_NULLABLE, FIELD_TYPE_TYPE, FIELD_TYPE, FIELD_DICTIONARY, FIELD_CHILDREN = 0, 1, 2, 3, 4, 5
+INT_BIT_WIDTH, INT_SIGNED = 0, 1
+DICTIONARY_ID, DICTIONARY_INDEX_TYPE = 0, 1
+RECORD_BATCH_LENGTH, RECORD_BATCH_NODES, RECORD_BATCH_BUFFERS, RECORD_BATCH_COMPRESSION = 0, 1, 2, 3
+DICTIONARY_BATCH_ID, DICTIONARY_BATCH_DATA, DICTIONARY_BATCH_DELTA = 0, 1, 2
+FOOTER_VERSION, FOOTER_SCHEMA, FOOTER_DICTIONARIES, FOOTER_RECORD_BATCHES = 0, 1, 2, 3
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _coordinate(feature: dict, index: int) -> float | None:
+    try:
+        return float(feature["geometry"]["coordinates"][index])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def checkpoint_columns(geojson: dict) -> list[tuple[str, str, list]]:
+    """``(name, kind, values)`` per column, with kind ``utf8``, ``dictionary`` or ``float64``."""
+    features = geojson.get("features") or []
+    columns = [
+        (
+            name,
+            "dictionary" if name in DICTIONARY_COLUMNS else "utf8",
+            [_text((feature.get("properties") or {}).get(name)) for feature in features],
+        )
+        for name in feature_columns(features)
+    ]
+    for index, name in enumerate(COORDINATE_COLUMNS):
+        columns.append((name, "float64", [_coordinate(feature, index) for feature in features]))
+    return columns
+
+
+def enrichment_columns(payload: dict) -> list[tuple[str, str, list]]:
+    records = [record for record in payload.get("records") or [] if isinstance(record, dict)]
+    return [
+        (
+            name,
+            "dictionary" if name in ENRICHMENT_DICTIONARY_COLUMNS else "utf8",
+            [_text(record.get(key)) for record in records],
+        )
+        for name, key in ENRICHMENT_FIELDS
+    ]
+
+
+class _Body:
+    """A message body: 8-byte aligned buffers plus the field nodes and buffer locations describing them."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.nodes = []
+        self.buffers = []
+
+    def add(self, values: list, *buffers: bytes) -> None:
+        null_count = sum(value is None for value in values)
+        validity = b""
+        if null_count:
+            bitmap = bytearray((len(values) + 7) // 8)
+            for index, value in enumerate(values):
+                if value is not None:
+                    bitmap[index >> 3] |= 1 << (index & 7)
+            validity = bytes(bitmap)
+
+        self.nodes.append((len(values), null_count))
+        for buffer in (validity, *buffers):
+            self.buffers.append((len(self.data), len(buffer)))
+            self.data += buffer + b"\0" * (-len(buffer) % ALIGNMENT)
+
+    def add_utf8(self, values: list) -> None:
+        offsets, data = [0], bytearray()
+        for value in values:
+            if value is not None:
+                data += value.encode("utf-8")
+            offsets.append(len(data))
+        self.add(values, struct.pack(f"<{len(offsets)}i", *offsets), bytes(data))
+
+    def record_batch(self, length: int) -> list:
+        return table_fields(
+            4,
+            {
+                RECORD_BATCH_LENGTH: ("i64", length),
+                RECORD_BATCH_NODES: ("structs", (FIELD_NODE, self.nodes)),
+                RECORD_BATCH_BUFFERS: ("structs", (BUFFER, self.buffers)),
+            },
+        )
+
+
+def _message(header_type: int, header: list, body: bytes = b"") -> bytes:
+    metadata = FlatBufferBuilder().finish(
+        table_fields(
+            4,
+            {
+                MESSAGE_VERSION: ("i16", METADATA_V5),
+                MESSAGE_HEADER_TYPE: ("u8", header_type),
+                MESSAGE_HEADER: ("table", header),
+                MESSAGE_BODY_LENGTH: ("i64", len(body)),
+            },
+        )
+    )
+    return struct.pack("<Ii", CONTINUATION, len(metadata)) + metadata + body
+
+
+def _schema(columns: list[tuple[str, str, list]], metadata: dict) -> list:
+    fields = []
+    for dictionary_id, (name, kind, _) in enumerate(columns):
+        values = {FIELD_NAME: ("string", name), FIELD_NULLABLE: ("bool", True), FIELD_CHILDREN: ("tables", [])}
+        if kind == "float64":
+            values[FIELD_TYPE_TYPE] = ("u8", TYPE_FLOATING_POINT)
+            values[FIELD_TYPE] = ("table", table_fields(1, {0: ("i16", PRECISION_DOUBLE)}))
+        else:
+            values[FIELD_TYPE_TYPE] = ("u8", TYPE_UTF8)
+            values[FIELD_TYPE] = ("table", [])
+        if kind == "dictionary":
+            index_type = table_fields(2, {INT_BIT_WIDTH: ("i32", 32), INT_SIGNED: ("bool", True)})
+            values[FIELD_DICTIONARY] = (
+                "table",
+                table_fields(2, {DICTIONARY_ID: ("i64", dictionary_id), DICTIONARY_INDEX_TYPE: ("table", index_type)}),
+            )
+        fields.append(table_fields(7, values))
+
+    key_values = [[("string", key), ("string", str(value))] for key, value in metadata.items() if value is not None]
+    return table_fields(3, {SCHEMA_FIELDS: ("tables", fields), SCHEMA_METADATA: ("tables", key_values)})
+
+
+def encode_arrow(columns: list[tuple[str, str, list]], metadata: dict | None = None) -> bytes:
+    """An Arrow IPC file holding ``columns`` as one record batch."""
+    length = len(columns[0][2]) if columns else 0
+    if any(len(values) != length for _, _, values in columns):
+        raise ValueError("Arrow export columns must all have the same length.")
+
+    schema = _schema(columns, metadata or {})
+    encoded = bytearray(MAGIC + b"\0\0")
+    encoded += _message(HEADER_SCHEMA, schema)
+
+    dictionary_blocks, batch = [], _Body()
+    for dictionary_id, (_, kind, values) in enumerate(columns):
+        if kind == "float64":
+            batch.add(values, struct.pack(f"<{length}d", *(0.0 if value is None else value for value in values)))
+        elif kind == "utf8":
+            batch.add_utf8(values)
+        else:
+            dictionary = sorted({value for value in values if value is not None})
+            positions = {value: index for index, value in enumerate(dictionary)}
+            indices = [0 if value is None else positions[value] for value in values]
+            batch.add(values, struct.pack(f"<{length}i", *indices))
+
+            body = _Body()
+            body.add_utf8(dictionary)
+            header = table_fields(
+                2,
+                {
+                    DICTIONARY_BATCH_ID: ("i64", dictionary_id),
+                    DICTIONARY_BATCH_DATA: ("table", body.record_batch(len(dictionary))),
+                },
+            )
+            message = _message(HEADER_DICTIONARY_BATCH, header, bytes(body.data))
+            dictionary_blocks.append((len(encoded), len(message) - len(body.data), len(body.data)))
+            encoded += message
+
+    message = _message(HEADER_RECORD_BATCH, batch.record_batch(length), bytes(batch.data))
+    batch_block = (len(encoded), len(message) - len(batch.data), len(batch.data))
+    encoded += message
+    encoded += struct.pack("<Ii", CONTINUATION, 0)
+
+    footer = FlatBufferBuilder().finish(
+        table_fields(
+            4,
+            {
+                FOOTER_VERSION: ("i16", METADATA_V5),
+                FOOTER_SCHEMA: ("table", schema),
+                FOOTER_DICTIONARIES: ("structs", (BLOCK, dictionary_blocks)),
+                FOOTER_RECORD_BATCHES: ("structs", (BLOCK, [batch_block])),
+            },
+        )
+    )
+    encoded += footer + struct.pack("<i", len(footer)) + MAGIC
+    return bytes(encoded)
+
+
+def write_arrow(path: Path, columns: list[tuple[str, str, list]], metadata: dict | None = None) -> int:
+    """Write atomically; readers holding the previous file mapped keep reading the old inode."""
+    encoded = encode_arrow(columns, metadata)
+    write_file_atomic(path, encoded)
+    return len(encoded)
+
+
+class _Column:
+    def __init__(self, length: int, validity: memoryview | None):
+        self.length = length
+        self.validity = validity
+
+    def __len__(self) -> int:
+        return self.length
+
+    def is_valid(self, index: int) -> bool:
+        return self.validity is None or bool(self.validity[index >> 3] >> (index & 7) & 1)
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return self._value(index) if self.is_valid(index) else None
+
+    def __iter__(self):
+        return (self[index] for index in range(self.length))
+
+
+class NumericColumn(_Column):
+    """Float64 or int32 values; ``values`` is a zero-copy view, with nulls stored as zeros."""
+
+    def __init__(self, length: int, validity: memoryview | None, values: memoryview):
+        super().__init__(length, validity)
+        self.values = values
+
+    def _value(self, index: int):
+        return self.values[index]
+
+
+class StringColumn(_Column):
+    def __init__(self, length: int, validity: memoryview | None, offsets: memoryview, data: memoryview):
+        super().__init__(length, validity)
+        self.offsets = offsets
+        self.data = data
+
+    def _value(self, index: int) -> str:
+        return str(self.data[self.offsets[index] : self.offsets[index + 1]], "utf-8")
+
+
+class DictionaryColumn(_Column):
+    """Int32 ``indices`` into a decoded ``dictionary``; counting needs no string decoding at all."""
+
+    def __init__(self, length: int, validity: memoryview | None, indices: memoryview, dictionary: list[str]):
+        super().__init__(length, validity)
+        self.indices = indices
+        self.dictionary = dictionary
+
+    def _value(self, index: int) -> str:
+        return self.dictionary[self.indices[index]]
+
+    def value_counts(self) -> dict[str, int]:
+        if self.validity is None:
+            counts = Counter(self.indices)
+        else:
+            counts = Counter(self.indices[index] for index in range(self.length) if self.is_valid(index))
+        return {self.dictionary[index]: count for index, count in counts.most_common()}
+
+
+class ArrowFile:
+    """A memory-mapped Arrow IPC file with UTF-8, float64, int32 and dictionary-encoded UTF-8 columns."""
+
+    def __init__(self, path: Path):
+        self._handle = Path(path).open("rb")
+        try:
+            self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            self._handle.close()
+            raise ValueError(f"Not an Arrow IPC file: {path}") from exc
+        self._view = memoryview(self._map)
+        try:
+            self._open(path)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, path: Path) -> None:
+        view = self._view
+        if len(view) < 2 * len(MAGIC) + 6 or view[: len(MAGIC)] != MAGIC or view[-len(MAGIC) :] != MAGIC:
+            raise ValueError(f"Not an Arrow IPC file: {path}")
+        footer_size = struct.unpack_from("<i", view, len(view) - len(MAGIC) - 4)[0]
+        footer = FlatBufferTable.root(view, len(view) - len(MAGIC) - 4 - footer_size)
+        schema = footer.table(FOOTER_SCHEMA)
+
+        self.metadata = {item.string(0): item.string(1) for item in schema.tables(SCHEMA_METADATA)}
+        self.fields = [self._field(field) for field in schema.tables(SCHEMA_FIELDS)]
+        self.names = [name for name, _, _ in self.fields]
+
+        self.dictionaries = {}
+        for block in footer.structs(FOOTER_DICTIONARIES, BLOCK):
+            header, body = self._message(block, HEADER_DICTIONARY_BATCH)
+            if header.scalar(DICTIONARY_BATCH_DELTA, "bool", False):
+                raise ValueError("Arrow dictionary deltas are not supported.")
+            data = header.table(DICTIONARY_BATCH_DATA)
+            column = self._columns(data, body, [("dictionary", "utf8", None)])["dictionary"]
+            self.dictionaries[header.scalar(DICTIONARY_BATCH_ID, "i64")] = list(column)
+
+        self.batches = []
+        for block in footer.structs(FOOTER_RECORD_BATCHES, BLOCK):
+            header, body = self._message(block, HEADER_RECORD_BATCH)
+            self.batches.append(self._columns(header, body, self.fields))
+        self.num_rows = sum(len(next(iter(batch.values()))) for batch in self.batches if batch)
+
+    @staticmethod
+    def _field(field: FlatBufferTable) -> tuple[str, str, int | None]:
+        name = field.string(FIELD_NAME)
+        type_type, type_table = field.scalar(FIELD_TYPE_TYPE, "u8"), field.table(FIELD_TYPE)
+        dictionary = field.table(FIELD_DICTIONARY)
+        if dictionary is not None:
+            index_type = dictionary.table(DICTIONARY_INDEX_TYPE)
+            if type_type != TYPE_UTF8 or (index_type and index_type.scalar(INT_BIT_WIDTH, "i32") != 32):
+                raise ValueError(f"Unsupported Arrow dictionary for column {name!r}.")
+            return name, "dictionary", dictionary.scalar(DICTIONARY_ID, "i64")
+        if type_type == TYPE_UTF8:
+            return name, "utf8", None
+        if type_type == TYPE_FLOATING_POINT and type_table.scalar(0, "i16") == PRECISION_DOUBLE:
+            return name, "float64", None
+        if type_type == TYPE_INT and type_table.scalar(INT_BIT_WIDTH, "i32") == 32:
+            return name, "int32", None
+        raise ValueError(f"Unsupported Arrow type for column {name!r}.")
+
+    def _message(self, block: tuple[int, int, int], expected_type: int) -> tuple[FlatBufferTable, int]:
+        offset, metadata_length, _ = block
+        start = offset + 8 if struct.unpack_from("<I", self._view, offset)[0] == CONTINUATION else offset + 4
+        message = FlatBufferTable.root(self._view, start)
+        if message.scalar(MESSAGE_HEADER_TYPE, "u8") != expected_type:
+            raise ValueError("Arrow file footer points at an unexpected message.")
+        return message.table(MESSAGE_HEADER), offset + metadata_length
+
+    def _columns(self, batch: FlatBufferTable, body: int, fields: list) -> dict:
+        if batch.has(RECORD_BATCH_COMPRESSION):
+            raise ValueError("Compressed Arrow record batches are not supported.")
+        nodes = iter(batch.structs(RECORD_BATCH_NODES, FIELD_NODE))
+        buffers = iter(batch.structs(RECORD_BATCH_BUFFERS, BUFFER))
+
+        def buffer() -> memoryview:
+            offset, length = next(buffers)
+            return self._view[body + offset : body + offset + length]
+
+        columns = {}
+        for name, kind, dictionary_id in fields:
+            length, null_count = next(nodes)
+            validity = buffer()
+            validity = validity if null_count else None
+            if kind == "utf8":
+                offsets = buffer().cast("i")[: length + 1]
+                columns[name] = StringColumn(length, validity, offsets, buffer())
+            elif kind == "dictionary":
+                indices = buffer().cast("i")[:length]
+                columns[name] = DictionaryColumn(length, validity, indices, self.dictionaries[dictionary_id])
+            else:
+                columns[name] = NumericColumn(length, validity, buffer().cast("d" if kind == "float64" else "i")[:length])
+        return columns
+
+    def chunks(self, name: str) -> list:
+        if name not in self.names:
+            raise KeyError(name)
+        return [batch[name] for batch in self.batches]
+
+    def column(self, name: str):
+        """The column of a single-batch file, such as those ``write_arrow`` produces."""
+        chunks = self.chunks(name)
+        if len(chunks) != 1:
+            raise ValueError(f"Arrow file has {len(chunks)} record batches; read them with chunks({name!r}).")
+        return chunks[0]
+
+    def rows(self):
+        for batch in self.batches:
+            columns = [batch[name] for name in self.names]
+            for index in range(len(columns[0]) if columns else 0):
+                yield {name: column[index] for name, column in zip(self.names, columns)}
+
+    def close(self) -> None:
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Columns still reference the mapping; it is unmapped when the last of them is released.
+            pass
+        self._handle.close()
+
+    def __enter__(self) -> ArrowFile:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
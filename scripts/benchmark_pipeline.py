@@ -0,0 +1,282 @@
+"""Benchmark pipeline stages on synthetic payloads against stored baselines.
+
+Each stage runs twice per scale: once untraced for wall time and once under
+tracemalloc for the peak of memory allocated by the stage. A stage fails when
+it is slower or larger than its baseline by more than the tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from pipeline_validation import (
+    analyze_data_quality,
+    build_dataset_snapshot,
+    build_dataset_version,
+    diff_dataset_features,
+    summarize_dataset_changes,
+    validate_dataset_changelog,
+)
+from research_coverage import build_research_coverage_report
+from synthetic_dataset import (
+    SCALES,
+    checkpoint_ids,
+    generate_enrichment_payload,
+    generate_raw_payload,
+    parse_scale,
+)
+
+BASELINES_PATH = Path("benchmarks/pipeline_baselines.json")
+SCHEMA_VERSION = 1
+STAGES = ("parse", "build", "quality", "coverage", "changelog")
+DEFAULT_TIME_TOLERANCE = 0.5
+DEFAULT_MEMORY_TOLERANCE = 0.25
+# Sub-100ms stages are dominated by scheduler noise on shared CI runners.
+MIN_SECONDS_SLACK = 0.1
+
+parse_step = importlib.import_module("01_parse_rosgranstroy")
+build_step = importlib.import_module("02_build_geojson")
+
+
+def scale_label(count: int) -> str:
+    return next((label for label, value in SCALES.items() if value == count), str(count))
+
+
+def _quiet(func, *args, **kwargs):
+    # Step helpers print per-subject progress, which would dominate the timings.
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def measure(func, *args, repeat: int = 1, **kwargs) -> tuple[object, dict]:
+    """Return the result of ``func`` with its best wall time and traced peak memory."""
+    seconds = []
+    result = None
+
+    for _ in range(max(repeat, 1)):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = _quiet(func, *args, **kwargs)
+        seconds.append(time.perf_counter() - started)
+
+    result = None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = _quiet(func, *args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, {"seconds": round(min(seconds), 6), "peakBytes": peak}
+
+
+def _changelog_inputs(features: list[dict], *, seed: int) -> dict:
+    rng = random.Random(seed + 2)
+    previous_features = []
+
+    for feature in features:
+        roll = rng.random()
+        if roll < 0.005:
+            continue
+        if roll < 0.015:
+            properties = dict(feature["properties"])
+            properties["status"] = "Двусторонний" if properties["status"] != "Двусторонний" else "Многосторонний"
+            feature = {**feature, "properties": properties}
+        previous_features.append(feature)
+
+    previous_snapshot = build_dataset_snapshot(previous_features)
+    current_snapshot = build_dataset_snapshot(features)
+    changes = summarize_dataset_changes(previous_snapshot, current_snapshot)
+    changes["modifiedCheckpoints"] = diff_dataset_features(
+        previous_snapshot,
+        current_snapshot,
+        previous_features,
+        features,
+    )["modified"]
+
+    def entry(snapshot, entry_changes):
+        return {
+            "version": build_dataset_version(snapshot),
+            "date": "2026-01-24",
+            "generatedAt": "2026-01-24T13:50:07+00:00",
+            "summary": "Synthetic benchmark snapshot.",
+            "changes": entry_changes,
+            "snapshot": snapshot,
+        }
+
+    return {
+        "schemaVersion": 1,
+        "entries": [
+            entry(current_snapshot, changes),
+            entry(previous_snapshot, summarize_dataset_changes(None, previous_snapshot)),
+        ],
+    }
+
+
+def run_benchmarks(count: int, *, seed: int = 0, repeat: int = 1, stages=STAGES) -> dict[str, dict]:
+    raw_payload = generate_raw_payload(count, seed=seed)
+    federal_districts = raw_payload["data"]["federal_districts"]
+    enrichment_payload = generate_enrichment_payload(checkpoint_ids(raw_payload), seed=seed)
+    results: dict[str, dict] = {}
+
+    rows, results["parse"] = measure(parse_step.build_rows, federal_districts, repeat=repeat)
+    del raw_payload, federal_districts
+    features, results["build"] = measure(build_step.build_features, rows, repeat=repeat)
+    del rows
+    geojson = {"type": "FeatureCollection", "features": features}
+
+    if "quality" in stages:
+        _, results["quality"] = measure(analyze_data_quality, geojson, repeat=repeat)
+
+    if "coverage" in stages:
+        # The pipeline hands the report the snapshot the changelog step already built.
+        snapshot = build_dataset_snapshot(features)
+        _, results["coverage"] = measure(
+            build_research_coverage_report,
+            geojson,
+            enrichment_payload,
+            generated_at="benchmark",
+            snapshot=snapshot,
+            repeat=repeat,
+        )
+
+    if "changelog" in stages:
+        changelog = _changelog_inputs(features, seed=seed)
+        _, results["changelog"] = measure(validate_dataset_changelog, changelog, geojson, repeat=repeat)
+
+    return {stage: results[stage] for stage in STAGES if stage in stages}
+
+
+def compare_to_baselines(
+    results: dict[str, dict],
+    baselines: dict[str, dict],
+    *,
+    time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+    memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+) -> list[str]:
+    """Return a message for every stage that regressed past its baseline."""
+    regressions = []
+
+    for stage, measured in results.items():
+        baseline = baselines.get(stage)
+        if not baseline:
+            continue
+
+        time_limit = baseline["seconds"] * (1 + time_tolerance) + MIN_SECONDS_SLACK
+        if measured["seconds"] > time_limit:
+            regressions.append(
+                f"{stage}: {measured['seconds']:.3f}s exceeds baseline "
+                f"{baseline['seconds']:.3f}s (limit {time_limit:.3f}s)"
+            )
+
+        memory_limit = baseline["peakBytes"] * (1 + memory_tolerance)
+        if measured["peakBytes"] > memory_limit:
+            regressions.append(
+                f"{stage}: peak {measured['peakBytes']} bytes exceeds baseline "
+                f"{baseline['peakBytes']} bytes (limit {int(memory_limit)} bytes)"
+            )
+
+    return regressions
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    if not path.exists():
+        return {"schemaVersion": SCHEMA_VERSION, "scales": {}}
+
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_baselines(baselines: dict, path: Path = BASELINES_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baselines, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data.")
+    parser.add_argument(
+        "--scale",
+        type=parse_scale,
+        action="append",
+        help="1k, 100k, 1m or a checkpoint count; may be repeated. Defaults to 1k.",
+    )
+    parser.add_argument("--stage", choices=STAGES, action="append", help="Limit to these stages.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the best is kept.")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument("--output", type=Path, help="Also write the measurements to this JSON file.")
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help="Store the measurements as the new baselines instead of comparing.",
+    )
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines)
+    stages = tuple(args.stage or STAGES)
+    report = {"schemaVersion": SCHEMA_VERSION, "seed": args.seed, "scales": {}}
+    regressions = []
+
+    for count in args.scale or [SCALES["1k"]]:
+        label = scale_label(count)
+        print(f"=== Benchmark {label} checkpoints ===")
+        results = run_benchmarks(count, seed=args.seed, repeat=args.repeat, stages=stages)
+        report["scales"][label] = results
+        scale_baselines = (baselines.get("scales") or {}).get(label) or {}
+
+        for stage, measured in results.items():
+            baseline = scale_baselines.get(stage)
+            reference = f" (baseline {baseline['seconds']:.3f}s)" if baseline else ""
+            print(
+                f"{stage:<10} {measured['seconds']:>9.3f}s {measured['peakBytes'] / 1_048_576:>9.1f} MiB"
+                f"{reference}"
+            )
+
+        if args.update_baselines:
+            baselines.setdefault("scales", {})[label] = {**scale_baselines, **results}
+        else:
+            regressions.extend(
+                f"{label} {message}"
+                for message in compare_to_baselines(
+                    results,
+                    scale_baselines,
+                    time_tolerance=args.time_tolerance,
+                    memory_tolerance=args.memory_tolerance,
+                )
+            )
+
+    if args.output:
+        write_baselines(report, args.output)
+
+    if args.update_baselines:
+        write_baselines(
+            {"schemaVersion": SCHEMA_VERSION, "seed": args.seed, "scales": baselines.get("scales") or {}},
+            args.baselines,
+        )
+        print(f"Baselines written to {args.baselines}")
+        return
+
+    if regressions:
+        print("Benchmark regressions:")
+        for message in regressions:
+            print(f"- {message}")
+        sys.exit(1)
+
+    print("No benchmark regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Content-hash manifest of the frontend files the service worker caches.
+
+``asset-manifest.json`` maps every app-shell and vendored Cesium file to the
+first hex digits of its SHA-256. The service worker keys its cache entries on
+these hashes: a file is downloaded again only when its hash changes, and an
+entry whose hash is no longer listed is deleted. ``precache`` files are
+fetched when the worker installs, so the app opens offline after one visit;
+``runtime`` files (Cesium workers, textures and the other lazily loaded
+assets) are cached the first time Cesium requests them.
+
+Regenerate the manifest after changing a frontend file; ``--check`` fails
+when it is out of date.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from dataset_release import write_file_atomic
+
+ASSET_MANIFEST_PATH = Path("asset-manifest.json")
+SCHEMA_VERSION = 1
+HASH_LENGTH = 16
+SHELL_FILES = [
+    "index.html",
+    "app.js",
+    "style.css",
+    "js/config.js",
+    "js/checkpoints.js",
+    "js/checkpointWorker.js",
+    "js/cesiumGlobe.js",
+    "icons/icon.svg",
+    "icons/maskable-icon.svg",
+    "js/vendor/cesium/Cesium.js",
+    "js/vendor/cesium/Widgets/widgets.css",
+]
+RUNTIME_DIRS = ["js/vendor/cesium"]
+
+
+def content_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:HASH_LENGTH]
+
+
+def build_asset_manifest(root: Path = Path(".")) -> dict:
+    root = Path(root)
+    # Cesium.js is vendored by deployments, not committed; sw.js caches absent vendor files by URL instead.
+    precache = {name: content_hash(root / name) for name in SHELL_FILES if (root / name).is_file()}
+    runtime = {}
+    for directory in RUNTIME_DIRS:
+        for path in sorted((root / directory).rglob("*")):
+            name = path.relative_to(root).as_posix()
+            if path.is_file() and name not in precache:
+                runtime[name] = content_hash(path)
+
+    entries = json.dumps([precache, runtime], sort_keys=True).encode("utf-8")
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "version": hashlib.sha256(entries).hexdigest()[:HASH_LENGTH],
+        "precache": precache,
+        "runtime": runtime,
+    }
+
+
+def serialize_asset_manifest(manifest: dict) -> str:
+    return json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the service worker asset manifest.")
+    parser.add_argument("--check", action="store_true", help="fail when asset-manifest.json is out of date")
+    args = parser.parse_args()
+
+    manifest = build_asset_manifest()
+    serialized = serialize_asset_manifest(manifest)
+    if args.check:
+        current = ASSET_MANIFEST_PATH.read_text(encoding="utf-8") if ASSET_MANIFEST_PATH.exists() else ""
+        if current != serialized:
+            print(f"{ASSET_MANIFEST_PATH} is out of date; run python scripts/build_asset_manifest.py")
+            raise SystemExit(1)
+        print(f"{ASSET_MANIFEST_PATH} is current (version {manifest['version']})")
+        return
+
+    changed = write_file_atomic(ASSET_MANIFEST_PATH, serialized)
+    print(
+        f"Asset manifest {manifest['version']}: {len(manifest['precache'])} precached, "
+        f"{len(manifest['runtime'])} runtime files" + ("" if changed else " (unchanged)")
+    )
+
+
+if __name__ == "__main__":
+    main()
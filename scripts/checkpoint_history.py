@@ -0,0 +1,199 @@
+"""Per-checkpoint history index built incrementally from the dataset changelog."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from dataset_release import write_file_atomic
+from pipeline_validation import ValidationError
+
+SCHEMA_VERSION = 1
+HISTORY_PATH = Path("data/checkpoint_history.json")
+CHANGELOG_PATH = Path("data/dataset_changelog.json")
+
+
+def _clean(value) -> str:
+    return str(value or "").strip()
+
+
+def empty_history() -> dict:
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "versions": [],
+        "checkpoints": {},
+    }
+
+
+def load_checkpoint_history(path: Path = HISTORY_PATH) -> dict:
+    if not path.exists():
+        return empty_history()
+
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _entry_events(entry: dict, previous_entry: dict | None) -> dict[str, dict]:
+    snapshot = entry.get("snapshot") or {}
+    previous_snapshot = (previous_entry or {}).get("snapshot") or {}
+    current_ids = set(snapshot.get("ids") or [])
+    previous_ids = set(previous_snapshot.get("ids") or [])
+    base = {
+        "version": _clean(entry.get("version")),
+        "date": _clean(entry.get("date")),
+        "generatedAt": _clean(entry.get("generatedAt")),
+    }
+    events = {}
+
+    for checkpoint_id in current_ids - previous_ids:
+        events[checkpoint_id] = {**base, "change": "added"}
+
+    for checkpoint_id in previous_ids - current_ids:
+        events[checkpoint_id] = {**base, "change": "removed"}
+
+    modified = (entry.get("changes") or {}).get("modifiedCheckpoints")
+    if modified is None:
+        # Entries written before field-level diffs still expose changed hashes.
+        previous_hashes = previous_snapshot.get("featureHashes")
+        current_hashes = snapshot.get("featureHashes")
+        if isinstance(previous_hashes, dict) and isinstance(current_hashes, dict):
+            modified = [
+                {"id": checkpoint_id}
+                for checkpoint_id, feature_hash in current_hashes.items()
+                if checkpoint_id in previous_hashes and previous_hashes[checkpoint_id] != feature_hash
+            ]
+
+    for item in modified or []:
+        event = {**base, "change": "modified"}
+        if isinstance(item.get("fields"), dict):
+            event["fields"] = item["fields"]
+        events[_clean(item.get("id"))] = event
+
+    return events
+
+
+def update_checkpoint_history(history: dict, changelog: dict) -> list[str]:
+    entries = list(changelog.get("entries") or [])
+    known_versions = {_clean(item.get("version")) for item in history.get("versions") or []}
+    checkpoints = history.setdefault("checkpoints", {})
+    processed = []
+
+    for index in range(len(entries) - 1, -1, -1):
+        entry = entries[index]
+        version = _clean(entry.get("version"))
+        if version in known_versions:
+            continue
+
+        previous_entry = entries[index + 1] if index + 1 < len(entries) else None
+        for checkpoint_id, event in _entry_events(entry, previous_entry).items():
+            checkpoints.setdefault(checkpoint_id, []).append(event)
+
+        history.setdefault("versions", []).append(
+            {
+                "version": version,
+                "date": _clean(entry.get("date")),
+                "generatedAt": _clean(entry.get("generatedAt")),
+            }
+        )
+        known_versions.add(version)
+        processed.append(version)
+
+    history["checkpoints"] = dict(sorted(checkpoints.items()))
+    return processed
+
+
+def validate_checkpoint_history(history: dict, changelog: dict) -> int:
+    if not isinstance(history, dict):
+        raise ValidationError("Checkpoint history must be a JSON object.")
+
+    if history.get("schemaVersion") != SCHEMA_VERSION:
+        raise ValidationError(f"Checkpoint history schemaVersion must be {SCHEMA_VERSION}.")
+
+    history_versions = [_clean(item.get("version")) for item in history.get("versions") or []]
+    changelog_versions = [
+        _clean(entry.get("version")) for entry in reversed(changelog.get("entries") or [])
+    ]
+
+    if history_versions != changelog_versions:
+        raise ValidationError("Checkpoint history versions do not match the dataset changelog.")
+
+    checkpoints = history.get("checkpoints")
+    if not isinstance(checkpoints, dict):
+        raise ValidationError("Checkpoint history checkpoints must be an object.")
+
+    if list(checkpoints) != sorted(checkpoints):
+        raise ValidationError("Checkpoint history checkpoints must be sorted by id.")
+
+    version_order = {version: index for index, version in enumerate(history_versions)}
+    for checkpoint_id, events in checkpoints.items():
+        positions = [version_order.get(event.get("version"), -1) for event in events]
+        if -1 in positions or positions != sorted(positions):
+            raise ValidationError(
+                f"Checkpoint history for {checkpoint_id} references unknown or unordered versions."
+            )
+
+    return len(checkpoints)
+
+
+def checkpoint_timeline(history: dict, checkpoint_id: str) -> list[dict]:
+    return list((history.get("checkpoints") or {}).get(_clean(checkpoint_id)) or [])
+
+
+def last_field_change(history: dict, checkpoint_id: str, field_name: str) -> dict | None:
+    for event in reversed(checkpoint_timeline(history, checkpoint_id)):
+        fields = event.get("fields") or {}
+        if field_name in fields:
+            return {
+                "version": event["version"],
+                "date": event["date"],
+                "generatedAt": event["generatedAt"],
+                **fields[field_name],
+            }
+
+    return None
+
+
+def write_checkpoint_history(history: dict, path: Path = HISTORY_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_file_atomic(path, json.dumps(history, ensure_ascii=False, indent=2) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the change timeline of a checkpoint.")
+    parser.add_argument("checkpoint_id", nargs="?", help="Checkpoint id to look up.")
+    parser.add_argument("--field", help="Only report the latest change of this property.")
+    parser.add_argument("--history", default=str(HISTORY_PATH))
+    parser.add_argument("--changelog", default=str(CHANGELOG_PATH))
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the history index from the full changelog before querying.",
+    )
+    args = parser.parse_args()
+
+    history_path = Path(args.history)
+
+    if args.rebuild:
+        changelog = json.loads(Path(args.changelog).read_text(encoding="utf-8"))
+        history = empty_history()
+        update_checkpoint_history(history, changelog)
+        validate_checkpoint_history(history, changelog)
+        write_checkpoint_history(history, history_path)
+        print(f"Rebuilt checkpoint history: {len(history['checkpoints'])} checkpoints", file=sys.stderr)
+    else:
+        history = load_checkpoint_history(history_path)
+
+    if not args.checkpoint_id:
+        return
+
+    if args.field:
+        result = last_field_change(history, args.checkpoint_id, args.field)
+    else:
+        result = checkpoint_timeline(history, args.checkpoint_id)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
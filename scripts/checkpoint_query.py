@@ -0,0 +1,402 @@
+"""Bbox, radius and attribute queries over the checkpoint dataset.
+
+``CheckpointIndex`` keeps the features of ``data/checkpoints.geojson`` in a
+uniform longitude/latitude grid and in per-attribute label sets, with every
+feature serialized once, the first time it is returned. A query intersects
+the attribute sets, reads only the grid cells its bbox or radius touches,
+and joins the serialized features of one page into a GeoJSON
+FeatureCollection.
+``CheckpointQueryService`` watches the dataset file and swaps in a new index
+when the dataset version changes; queries in flight keep the old one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from pipeline_validation import build_dataset_snapshot, build_dataset_version
+
+GEOJSON_PATH = Path("data/checkpoints.geojson")
+GRID_CELL_DEGREES = 1.0
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+ATTRIBUTES = {
+    "type": "checkpoint_type",
+    "status": "status",
+    "country": "foreign_country",
+    "subject": "subject_name",
+}
+SEARCH_FIELDS = (
+    "checkpoint_id",
+    "checkpoint_name",
+    "checkpoint_slug",
+    "address",
+    "subject_name",
+    "foreign_country",
+    "foreign_checkpoint",
+)
+
+
+def _label(value) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+
+def _labels(value, *, first_word: bool = False) -> set[str]:
+    # With first_word, "Автомобильный пункт пропуска" is also found as "автомобильный".
+    label = _label(value)
+    return {label, label.split(" ")[0]} if label and first_word else {label}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def haversine_km(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _split_antimeridian(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> list[tuple]:
+    if min_lon <= max_lon:
+        return [(min_lon, min_lat, max_lon, max_lat)]
+    return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+
+
+def radius_boxes(lon: float, lat: float, radius_km: float) -> list[tuple]:
+    """Bounding boxes that together cover the circle, split at the antimeridian."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(lat - lat_delta, -90.0), min(lat + lat_delta, 90.0)
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    if cos_lat <= 0 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        return [(-180.0, min_lat, 180.0, max_lat)]
+
+    lon_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    min_lon = (lon - lon_delta + 180) % 360 - 180
+    max_lon = (lon + lon_delta + 180) % 360 - 180
+    return _split_antimeridian(min_lon, min_lat, max_lon, max_lat)
+
+
+class CheckpointIndex:
+    """Grid and attribute indexes over one version of the dataset."""
+
+    def __init__(self, features: list[dict], *, version: str | None = None, cell_degrees: float = GRID_CELL_DEGREES):
+        self.version = version or build_dataset_version(build_dataset_snapshot(features))
+        self.cell_degrees = cell_degrees
+        self.features = features
+        self.points: list[tuple[float, float] | None] = []
+        self.cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self.attributes: dict[str, dict[str, set[int]]] = {name: defaultdict(set) for name in ATTRIBUTES}
+        self.serialized: list[str | None] = [None] * len(features)
+        search_text = []
+
+        for position, feature in enumerate(features):
+            properties = feature.get("properties") or {}
+            point = self._point(feature)
+            self.points.append(point)
+            if point is not None:
+                self.cells[self._cell(*point)].append(position)
+            for name, field in ATTRIBUTES.items():
+                for label in _labels(properties.get(field), first_word=name == "type"):
+                    self.attributes[name][label].add(position)
+            search_text.append("\n".join(_label(properties.get(field)) for field in SEARCH_FIELDS))
+
+        # One string for all features lets free-text search run in str.find.
+        self.search_starts = list(itertools.accumulate((len(text) + 1 for text in search_text), initial=0))
+        self.search_blob = "\0".join(search_text)
+
+    @classmethod
+    def from_geojson(cls, geojson: dict, **kwargs) -> CheckpointIndex:
+        return cls(geojson.get("features") or [], **kwargs)
+
+    @staticmethod
+    def _point(feature: dict) -> tuple[float, float] | None:
+        try:
+            lon, lat = (float(value) for value in feature["geometry"]["coordinates"][:2])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return (lon, lat) if math.isfinite(lon) and math.isfinite(lat) else None
+
+    def _cell(self, lon: float, lat: float) -> tuple[int, int]:
+        return math.floor(lon / self.cell_degrees), math.floor(lat / self.cell_degrees)
+
+    def _text_matches(self, needle: str, candidates: set[int] | None) -> set[int]:
+        if candidates is not None and len(candidates) * 16 < len(self.features):
+            return {
+                position
+                for position in candidates
+                if self.search_blob.find(needle, self.search_starts[position], self.search_starts[position + 1] - 1)
+                >= 0
+            }
+
+        found = set()
+        start = self.search_blob.find(needle)
+        while start >= 0:
+            position = bisect.bisect_right(self.search_starts, start) - 1
+            found.add(position)
+            start = self.search_blob.find(needle, self.search_starts[position + 1])
+        return found if candidates is None else found & candidates
+
+    def _feature_json(self, position: int) -> str:
+        serialized = self.serialized[position]
+        if serialized is None:
+            serialized = self.serialized[position] = _dumps(self.features[position])
+        return serialized
+
+    def within(self, boxes: list[tuple]) -> set[int]:
+        """Positions of features inside any of the (min_lon, min_lat, max_lon, max_lat) boxes."""
+        found = set()
+
+        for min_lon, min_lat, max_lon, max_lat in boxes:
+            (min_x, min_y), (max_x, max_y) = self._cell(min_lon, min_lat), self._cell(max_lon, max_lat)
+            if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+                # A box larger than the occupied grid is cheaper to test cell by cell.
+                cells = [
+                    positions
+                    for (x, y), positions in self.cells.items()
+                    if min_x <= x <= max_x and min_y <= y <= max_y
+                ]
+            else:
+                cells = [
+                    self.cells[(x, y)]
+                    for x in range(min_x, max_x + 1)
+                    for y in range(min_y, max_y + 1)
+                    if (x, y) in self.cells
+                ]
+            for positions in cells:
+                for position in positions:
+                    lon, lat = self.points[position]
+                    if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat:
+                        found.add(position)
+
+        return found
+
+    def search(
+        self,
+        *,
+        bbox: tuple | None = None,
+        near: tuple[float, float] | None = None,
+        radius_km: float | None = None,
+        filters: dict[str, list[str]] | None = None,
+        q: str | None = None,
+        limit: int = DEFAULT_LIMIT,
+        offset: int = 0,
+    ) -> dict:
+        """Return the matched count and one page of positions, nearest first for radius queries."""
+        candidates: set[int] | None = None
+
+        for name, values in (filters or {}).items():
+            index = self.attributes[name]
+            sets = [index.get(_label(value), set()) for value in values]
+            matched = sets[0] if len(sets) == 1 else set().union(*sets)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return {"matched": 0, "positions": [], "distances": None}
+
+        if bbox is not None:
+            inside = self.within(_split_antimeridian(*bbox))
+            candidates = inside if candidates is None else candidates & inside
+
+        distances = None
+        if near is not None and radius_km is not None:
+            lon, lat = near
+            inside = self.within(radius_boxes(lon, lat, radius_km))
+            if candidates is not None:
+                inside &= candidates
+            distances = {}
+            for position in inside:
+                distance = haversine_km(lon, lat, *self.points[position])
+                if distance <= radius_km:
+                    distances[position] = distance
+            candidates = set(distances)
+
+        if q:
+            candidates = self._text_matches(_label(q), candidates)
+
+        if candidates is None:
+            ordered = range(len(self.features))
+        elif distances is not None:
+            ordered = sorted(candidates, key=lambda position: (distances[position], position))
+        else:
+            ordered = sorted(candidates)
+
+        return {
+            "matched": len(ordered),
+            "positions": list(ordered[offset : offset + limit]),
+            "distances": distances,
+        }
+
+    def render(self, result: dict, *, links: list[dict] | None = None) -> bytes:
+        """Serialize one search page as a GeoJSON FeatureCollection."""
+        distances = result["distances"]
+        features = []
+        for position in result["positions"]:
+            if distances is None:
+                features.append(self._feature_json(position))
+            else:
+                feature = self.features[position]
+                properties = {**(feature.get("properties") or {}), "distance_km": round(distances[position], 3)}
+                features.append(_dumps({**feature, "properties": properties}))
+
+        header = _dumps(
+            {
+                "type": "FeatureCollection",
+                "datasetVersion": self.version,
+                "numberMatched": result["matched"],
+                "numberReturned": len(features),
+                "links": links or [],
+            }
+        )
+        return f'{header[:-1]},"features":[{",".join(features)}]}}'.encode("utf-8")
+
+
+def _single(params: dict[str, list[str]], name: str) -> str | None:
+    values = [value for value in params.get(name) or [] if value.strip()]
+    return values[-1].strip() if values else None
+
+
+def _floats(text: str, count: int, name: str) -> list[float]:
+    try:
+        values = [float(value) for value in text.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != count or not all(math.isfinite(value) for value in values):
+        raise ValueError(f"{name} must be {count} comma-separated numbers.")
+    return values
+
+
+def _integer(params: dict[str, list[str]], name: str, default: int, maximum: int | None = None) -> int:
+    text = _single(params, name)
+    if text is None:
+        return default
+    if not text.isdigit():
+        raise ValueError(f"{name} must be a non-negative integer.")
+    value = int(text)
+    if maximum is not None and not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}.")
+    return value
+
+
+def parse_query_params(params: dict[str, list[str]]) -> dict:
+    """Turn ``parse_qs`` output into ``CheckpointIndex.search`` arguments; raises ValueError."""
+    query = {
+        "limit": _integer(params, "limit", DEFAULT_LIMIT, MAX_LIMIT),
+        "offset": _integer(params, "offset", 0),
+        "q": _single(params, "q"),
+        "filters": {},
+    }
+
+    bbox = _single(params, "bbox")
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = _floats(bbox, 4, "bbox")
+        if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+            raise ValueError("bbox must be minLon,minLat,maxLon,maxLat within WGS84 bounds.")
+        query["bbox"] = (min_lon, min_lat, max_lon, max_lat)
+
+    radius = _single(params, "radius")
+    lon, lat = _single(params, "lon"), _single(params, "lat")
+    if radius is not None or lon is not None or lat is not None:
+        if radius is None or lon is None or lat is None:
+            raise ValueError("A radius query needs lon, lat and radius (km).")
+        lon_value, lat_value, radius_km = _floats(f"{lon},{lat},{radius}", 3, "lon, lat and radius")
+        if not (-180 <= lon_value <= 180 and -90 <= lat_value <= 90 and radius_km > 0):
+            raise ValueError("lon and lat must be WGS84 degrees and radius a positive number of km.")
+        query["near"] = (lon_value, lat_value)
+        query["radius_km"] = radius_km
+
+    for name in ATTRIBUTES:
+        values = [value for item in params.get(name) or [] for value in item.split(",") if value.strip()]
+        if values:
+            query["filters"][name] = values
+
+    return query
+
+
+class CheckpointQueryService:
+    """Serve queries from the current index, rebuilding it when the dataset version changes."""
+
+    def __init__(self, path: Path = GEOJSON_PATH):
+        self.path = Path(path)
+        self.index: CheckpointIndex | None = None
+        self.stat_key: tuple[int, int] | None = None
+        self._reloading = asyncio.Lock()
+
+    def _stat_key(self) -> tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        """Rebuild the index if the dataset version changed; returns whether it was swapped."""
+        stat_key = self._stat_key()
+        geojson = json.loads(self.path.read_text(encoding="utf-8"))
+        features = geojson.get("features") or []
+        version = build_dataset_version(build_dataset_snapshot(features))
+
+        swapped = self.index is None or self.index.version != version
+        if swapped:
+            # One assignment, so a query sees either the old index or the new one.
+            self.index = CheckpointIndex(features, version=version)
+        self.stat_key = stat_key
+        return swapped
+
+    async def current(self) -> CheckpointIndex:
+        if self.index is None:
+            async with self._reloading:
+                if self.index is None:
+                    await asyncio.to_thread(self.reload)
+            return self.index
+
+        try:
+            changed = self._stat_key() != self.stat_key
+        except OSError:
+            changed = False
+        if changed and not self._reloading.locked():
+            async with self._reloading:
+                try:
+                    await asyncio.to_thread(self.reload)
+                except (OSError, ValueError) as exc:
+                    # A file caught mid-write is retried on the next request.
+                    print(f"Keeping dataset {self.index.version}: {exc}", file=sys.stderr)
+        return self.index
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Query checkpoints by bbox, radius and attributes.")
+    parser.add_argument("--geojson", type=Path, default=GEOJSON_PATH)
+    parser.add_argument("--bbox", help="minLon,minLat,maxLon,maxLat")
+    parser.add_argument("--lon")
+    parser.add_argument("--lat")
+    parser.add_argument("--radius", help="Radius in km around --lon/--lat.")
+    for name, field in ATTRIBUTES.items():
+        parser.add_argument(f"--{name}", action="append", help=f"Match {field}; comma-separated values are OR-ed.")
+    parser.add_argument("--q", help="Case-insensitive text in names, addresses, regions and countries.")
+    parser.add_argument("--limit")
+    parser.add_argument("--offset")
+    args = parser.parse_args(argv)
+
+    params = {
+        name: value if isinstance(value, list) else [value]
+        for name, value in vars(args).items()
+        if name != "geojson" and value is not None
+    }
+    try:
+        query = parse_query_params(params)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    index = CheckpointIndex.from_geojson(json.loads(args.geojson.read_text(encoding="utf-8")))
+    sys.stdout.write(index.render(index.search(**query)).decode("utf-8") + "\n")
+
+
+if __name__ == "__main__":
+    main()
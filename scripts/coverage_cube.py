@@ -0,0 +1,223 @@
+"""Research coverage counts over combinations of checkpoint dimensions.
+
+Each cube cell holds measure totals for one combination of dimension values.
+Any roll-up or slice over those dimensions is then a sum over cells, with no
+rescan of the features. The JSON form stores each dimension's labels once
+and writes cells as rows of label indexes followed by measure values.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+SCHEMA_VERSION = 1
+CUBE_PATH = Path("data/research_coverage_cube.json")
+DIMENSIONS = {
+    "country": "foreign_country",
+    "subject": "subject_name",
+    "type": "checkpoint_type",
+    "district": "federal_district",
+    "status": "status",
+    "corridor": "transport_corridor",
+}
+MEASURES = (
+    "total",
+    "described",
+    "withEvents",
+    "officialVerification",
+    "qualityIssues",
+    "source",
+    "lastUpdated",
+    "coordinates",
+    "address",
+    "workingTime",
+    "operationalStatus",
+    "neighborCheckpoint",
+    "transportCorridor",
+    "branchContact",
+)
+
+
+class CoverageCube:
+    """Measure totals keyed by a tuple of dimension labels."""
+
+    def __init__(self, dimensions=tuple(DIMENSIONS), measures=MEASURES):
+        unknown = [name for name in dimensions if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError("Unknown coverage cube dimensions: " + ", ".join(unknown))
+
+        self.dimensions = tuple(dimensions)
+        self.measures = tuple(measures)
+        self.cells: dict[tuple[str, ...], list[int]] = {}
+
+    def add(self, labels: tuple[str, ...], values) -> None:
+        cell = self.cells.get(labels)
+        if cell is None:
+            cell = self.cells[labels] = [0] * len(self.measures)
+
+        for index, value in enumerate(values):
+            cell[index] += value
+
+    def _position(self, dimension: str) -> int:
+        if dimension not in self.dimensions:
+            raise ValueError(
+                f"Coverage cube has no dimension {dimension!r}; available: {', '.join(self.dimensions)}"
+            )
+        return self.dimensions.index(dimension)
+
+    def rollup(self, dimensions=(), *, where: dict | None = None) -> dict[tuple[str, ...], dict[str, int]]:
+        """Sum measures grouped by ``dimensions`` over cells matching ``where``.
+
+        ``where`` maps a dimension to one label or a collection of labels.
+        """
+        positions = [self._position(name) for name in dimensions]
+        filters = [
+            (self._position(name), {labels} if isinstance(labels, str) else set(labels))
+            for name, labels in (where or {}).items()
+        ]
+        groups: dict[tuple[str, ...], list[int]] = {}
+
+        for labels, cell in self.cells.items():
+            if any(labels[position] not in allowed for position, allowed in filters):
+                continue
+
+            key = tuple(labels[position] for position in positions)
+            totals = groups.get(key)
+            if totals is None:
+                totals = groups[key] = [0] * len(self.measures)
+            for index, value in enumerate(cell):
+                totals[index] += value
+
+        return {key: dict(zip(self.measures, totals)) for key, totals in groups.items()}
+
+    def rows(self, dimensions=(), *, where: dict | None = None) -> list[dict]:
+        rows = [
+            {**dict(zip(dimensions, key)), **measures}
+            for key, measures in self.rollup(dimensions, where=where).items()
+        ]
+        return sorted(rows, key=lambda row: (-row["total"], [row[name] for name in dimensions]))
+
+    def to_dict(self, **metadata) -> dict:
+        labels = {
+            name: sorted({cell_labels[position] for cell_labels in self.cells})
+            for position, name in enumerate(self.dimensions)
+        }
+        indexes = [
+            {label: index for index, label in enumerate(labels[name])}
+            for name in self.dimensions
+        ]
+        cells = sorted(
+            [
+                *(indexes[position][label] for position, label in enumerate(cell_labels)),
+                *values,
+            ]
+            for cell_labels, values in self.cells.items()
+        )
+
+        return {
+            "schemaVersion": SCHEMA_VERSION,
+            **metadata,
+            "dimensions": list(self.dimensions),
+            "measures": list(self.measures),
+            "labels": labels,
+            "cells": cells,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> CoverageCube:
+        if not isinstance(payload, dict) or payload.get("schemaVersion") != SCHEMA_VERSION:
+            raise ValueError(f"Coverage cube schemaVersion must be {SCHEMA_VERSION}.")
+
+        cube = cls(payload["dimensions"], payload["measures"])
+        labels = [payload["labels"][name] for name in cube.dimensions]
+        width = len(cube.dimensions) + len(cube.measures)
+
+        for row in payload["cells"]:
+            if len(row) != width:
+                raise ValueError(f"Coverage cube cell must have {width} values: {row!r}")
+            cube.add(
+                tuple(labels[position][index] for position, index in enumerate(row[: len(labels)])),
+                row[len(labels):],
+            )
+
+        return cube
+
+
+def serialize_coverage_cube(payload: dict) -> str:
+    """Indented JSON with one cell per line, so data refresh diffs stay readable."""
+    header = json.dumps(
+        {key: value for key, value in payload.items() if key != "cells"},
+        ensure_ascii=False,
+        indent=2,
+    )
+    cells = ",\n".join(f"    {json.dumps(cell, separators=(',', ':'))}" for cell in payload["cells"])
+    body = f"[\n{cells}\n  ]" if cells else "[]"
+    return f'{header[:-2]},\n  "cells": {body}\n}}\n'
+
+
+def load_coverage_cube(path: Path = CUBE_PATH) -> CoverageCube:
+    return CoverageCube.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _parse_filter(value: str) -> tuple[str, str]:
+    dimension, separator, label = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError("Filters look like dimension=label.")
+    return dimension.strip(), label.strip()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Roll up or slice the research coverage cube without rescanning features."
+    )
+    parser.add_argument("--cube", type=Path, default=CUBE_PATH)
+    parser.add_argument(
+        "--by",
+        nargs="*",
+        default=[],
+        metavar="DIMENSION",
+        help=f"Dimensions to group by: {', '.join(DIMENSIONS)}. Omit for grand totals.",
+    )
+    parser.add_argument(
+        "--where",
+        type=_parse_filter,
+        action="append",
+        default=[],
+        metavar="DIMENSION=LABEL",
+        help="Keep cells with this label; repeat a dimension to allow several labels.",
+    )
+    parser.add_argument("--measures", nargs="+", choices=MEASURES, help="Measures to include.")
+    parser.add_argument("--output", type=Path, help="Write the slice to this JSON file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    where: dict[str, list[str]] = {}
+    for dimension, label in args.where:
+        where.setdefault(dimension, []).append(label)
+
+    try:
+        rows = load_coverage_cube(args.cube).rows(args.by, where=where)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.measures:
+        rows = [
+            {key: value for key, value in row.items() if key in args.by or key in args.measures}
+            for row in rows
+        ]
+
+    payload = {"by": args.by, "where": where, "rows": rows}
+    serialized = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(serialized, encoding="utf-8")
+        print(f"Wrote {len(rows)} rows to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(serialized)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,553 @@
+"""Asyncio HTTP server for the app shell and the published data files.
+
+Files are served with gzip, and brotli when the ``brotli`` package is
+installed, either from precompressed ``.gz``/``.br`` siblings or compressed
+once and kept in memory. Every representation has a strong ETag; the
+GeoJSON dataset's ETag starts with its dataset version. Conditional GETs
+answer 304, byte ranges answer 206, and files with a content hash in their
+name are marked immutable. Each connection is a coroutine, so slow clients
+do not hold up others.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import sys
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from pathlib import Path, PurePosixPath
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from checkpoint_query import GEOJSON_PATH, CheckpointQueryService, parse_query_params
+from pipeline_validation import build_dataset_snapshot, build_dataset_version
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+CHECKPOINTS_API_PATH = "/api/checkpoints"
+DATASET_PATHS = {"data/checkpoints.geojson", "frontend/data/checkpoints.geojson"}
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/geo+json",
+    "application/javascript",
+    "application/manifest+json",
+    "application/wasm",
+    "image/svg+xml",
+)
+MIN_COMPRESSED_BYTES = 1024
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# A hex run of 8+ characters before the extension marks a content-addressed file.
+HASHED_ASSET = re.compile(r"[.-][0-9a-f]{8,64}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+MAX_HEADER_BYTES = 16 * 1024
+KEEP_ALIVE_SECONDS = 15
+ENCODING_PREFERENCE = ("br", "gzip")
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+mimetypes.add_type("application/geo+json", ".geojson")
+mimetypes.add_type("text/javascript", ".mjs")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class Request:
+    def __init__(self, method: str, target: str, version: str, headers: dict[str, str]):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.query = parse_qs(parts.query)
+
+
+class Response:
+    def __init__(self, status: int = 200, headers: dict[str, str] | None = None, body: bytes = b""):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    @classmethod
+    def json(cls, payload, *, status: int = 200, headers: dict[str, str] | None = None) -> Response:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(status, {"Content-Type": "application/json; charset=utf-8", **(headers or {})}, body)
+
+    @classmethod
+    def error(cls, status: int, message: str | None = None) -> Response:
+        text = message or HTTPStatus(status).phrase
+        return cls(status, {"Content-Type": "text/plain; charset=utf-8"}, f"{text}\n".encode("utf-8"))
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    weights = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def negotiate_encoding(header: str, available) -> str:
+    """Pick the preferred available content coding the client accepts."""
+    weights = parse_accept_encoding(header or "")
+    best, best_weight = "identity", 0.0
+
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """Return (start, end) for one satisfiable byte range, None to ignore, False if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Multipart ranges are answered with the whole file.
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etags: set[str]) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return bool(candidates & etags)
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class StaticFile:
+    """One file's bytes, encodings and validators, valid while its stat is unchanged."""
+
+    def __init__(self, path: Path, relative: str, body: bytes, stat):
+        self.path = path
+        self.stat_key = (stat.st_mtime_ns, stat.st_size)
+        self.last_modified = int(stat.st_mtime)
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in {"application/json", "application/geo+json"}:
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        self.compressible = _is_compressible(content_type) and len(body) >= MIN_COMPRESSED_BYTES
+        self.immutable = bool(HASHED_ASSET.search(path.name))
+        self.tag = self._build_tag(relative, body)
+        self.encodings: dict[str, bytes] = {"identity": body}
+        self._pending: dict[str, asyncio.Future] = {}
+
+        if self.compressible:
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                sibling = path.with_name(path.name + suffix)
+                if sibling.exists() and sibling.stat().st_mtime_ns >= stat.st_mtime_ns:
+                    self.encodings[encoding] = sibling.read_bytes()
+
+    @staticmethod
+    def _build_tag(relative: str, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        if relative in DATASET_PATHS:
+            try:
+                features = json.loads(body).get("features") or []
+                # The content hash keeps the tag strong if bytes change without a new version.
+                return f"{build_dataset_version(build_dataset_snapshot(features))}.{digest[:8]}"
+            except (ValueError, AttributeError):
+                pass
+        return digest[:24]
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.encodings.values())
+
+    def available_encodings(self) -> set[str]:
+        if not self.compressible:
+            return {"identity"}
+        available = {"identity", "gzip", *self.encodings}
+        if brotli is not None:
+            available.add("br")
+        return available
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.tag}"' if encoding == "identity" else f'"{self.tag}-{encoding}"'
+
+    async def body(self, encoding: str) -> bytes:
+        if encoding in self.encodings:
+            return self.encodings[encoding]
+
+        # Concurrent first requests share one compression job.
+        if encoding not in self._pending:
+            self._pending[encoding] = asyncio.ensure_future(asyncio.to_thread(self._compress, encoding))
+        try:
+            self.encodings[encoding] = await self._pending[encoding]
+        finally:
+            self._pending.pop(encoding, None)
+        return self.encodings[encoding]
+
+    def _compress(self, encoding: str) -> bytes:
+        body = self.encodings["identity"]
+        if encoding == "br":
+            return brotli.compress(body, quality=11)
+        return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+class StaticFiles:
+    """Serve files under ``root`` with an LRU cache of their representations."""
+
+    def __init__(self, root: Path, *, cache_max_bytes: int = CACHE_MAX_BYTES):
+        self.root = Path(root).resolve()
+        self.cache_max_bytes = cache_max_bytes
+        self.cache: OrderedDict[Path, StaticFile] = OrderedDict()
+
+    def resolve(self, request_path: str) -> Path | None:
+        relative = PurePosixPath(request_path.lstrip("/"))
+        if any(part in {"..", ""} or part.startswith(".") for part in relative.parts):
+            return None
+
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            return None
+        return path
+
+    async def load(self, path: Path) -> StaticFile:
+        stat = path.stat()
+        cached = self.cache.get(path)
+        if cached is not None and cached.stat_key == (stat.st_mtime_ns, stat.st_size):
+            self.cache.move_to_end(path)
+            return cached
+
+        relative = path.relative_to(self.root).as_posix()
+        body = await asyncio.to_thread(path.read_bytes)
+        entry = await asyncio.to_thread(StaticFile, path, relative, body, stat)
+        self.cache[path] = entry
+        self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        total = sum(entry.size for entry in self.cache.values())
+        while total > self.cache_max_bytes and len(self.cache) > 1:
+            _, entry = self.cache.popitem(last=False)
+            total -= entry.size
+
+    async def handle(self, request: Request) -> Response:
+        if request.method not in {"GET", "HEAD"}:
+            return Response(405, {"Allow": "GET, HEAD"}, b"")
+
+        path = self.resolve(request.path)
+        if path is not None and path.is_dir():
+            if not request.path.endswith("/"):
+                return Response(301, {"Location": request.path + "/"})
+            path = path / "index.html"
+        if path is None or not path.is_file():
+            return Response.error(404)
+
+        entry = await self.load(path)
+        headers = {"Accept-Ranges": "bytes", "Content-Type": entry.content_type}
+        range_header = request.headers.get("range")
+        encoding = "identity"
+        if entry.compressible:
+            headers["Vary"] = "Accept-Encoding"
+            if not range_header:
+                encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), entry.available_encodings())
+
+        etag = entry.etag(encoding)
+        headers.update(
+            {
+                "ETag": etag,
+                "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+                "Cache-Control": IMMUTABLE_CACHE if entry.immutable else REVALIDATE_CACHE,
+            }
+        )
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if self._not_modified(request, entry, {etag, entry.etag("identity")}):
+            return Response(304, headers)
+
+        body = await entry.body(encoding)
+        if range_header and self._range_applies(request, entry):
+            selected = parse_range(range_header, len(body))
+            if selected is False:
+                return Response(416, {**headers, "Content-Range": f"bytes */{len(body)}"})
+            if selected:
+                start, end = selected
+                headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                return Response(206, headers, body[start : end + 1])
+
+        return Response(200, headers, body)
+
+    @staticmethod
+    def _not_modified(request: Request, entry: StaticFile, etags: set[str]) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etags)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return entry.last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _range_applies(request: Request, entry: StaticFile) -> bool:
+        if_range = request.headers.get("if-range")
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == entry.etag("identity")
+        try:
+            return int(parsedate_to_datetime(if_range).timestamp()) == entry.last_modified
+        except (TypeError, ValueError):
+            return False
+
+
+class CheckpointQueryRoute:
+    """``/api/checkpoints``: one GeoJSON page of the checkpoints matching the query string."""
+
+    def __init__(self, path: Path):
+        self.service = CheckpointQueryService(path)
+
+    async def __call__(self, request: Request) -> Response:
+        if request.method not in {"GET", "HEAD"}:
+            return Response(405, {"Allow": "GET, HEAD"}, b"")
+        try:
+            query = parse_query_params(request.query)
+        except ValueError as exc:
+            return Response.json({"error": str(exc)}, status=400)
+
+        index = await self.service.current()
+        digest = hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+        headers = {
+            "Content-Type": "application/geo+json; charset=utf-8",
+            "ETag": f'"{index.version}.{digest[:12]}"',
+            "Cache-Control": REVALIDATE_CACHE,
+            "Access-Control-Allow-Origin": "*",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, {headers["ETag"]}):
+            return Response(304, headers)
+
+        result = index.search(**query)
+        links = [{"rel": "self", "href": request.target}]
+        next_offset = query["offset"] + query["limit"]
+        if next_offset < result["matched"]:
+            params = {**request.query, "offset": [str(next_offset)]}
+            links.append({"rel": "next", "href": f"{request.path}?{urlencode(params, doseq=True)}"})
+
+        return Response(200, headers, index.render(result, links=links))
+
+
+def default_routes(root: Path) -> dict:
+    return {CHECKPOINTS_API_PATH: CheckpointQueryRoute(Path(root) / GEOJSON_PATH)}
+
+
+class DataServer:
+    """HTTP/1.1 server with keep-alive; ``routes`` map exact paths to handlers.
+
+    A handler takes a ``Request`` and returns a ``Response`` or an awaitable
+    of one. Every other path is served from ``root``.
+    """
+
+    def __init__(self, root: Path = Path("."), *, routes: dict | None = None, quiet: bool = False):
+        self.static = StaticFiles(root)
+        self.routes = dict(routes or {})
+        self.quiet = quiet
+        self.server: asyncio.base_events.Server | None = None
+        self.connections: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.base_events.Server:
+        self.server = await asyncio.start_server(self._serve_connection, host, port, limit=MAX_HEADER_BYTES)
+        return self.server
+
+    async def stop(self) -> None:
+        """Stop listening and close open connections, idle keep-alive ones included.
+
+        Closing the sockets lets every connection task finish on its own; left
+        open, they would be cancelled by the event loop's shutdown instead.
+        """
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def dispatch(self, request: Request) -> Response:
+        handler = self.routes.get(request.path)
+        if handler is None:
+            return await self.static.handle(request)
+
+        response = handler(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | Response | None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            return Response.error(431)
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            return Response.error(400)
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if "transfer-encoding" in headers:
+            return Response.error(501, "Request bodies are not supported")
+        content_length = headers.get("content-length", "0")
+        if not content_length.isdigit():
+            return Response.error(400)
+        length = int(content_length)
+        if length > MAX_HEADER_BYTES:
+            return Response.error(413)
+        if length:
+            await reader.readexactly(length)
+
+        return Request(method, target, version, headers)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = (writer.get_extra_info("peername") or ("-",))[0]
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, Response):
+                    await self._write(writer, request, head_only=False, keep_alive=False)
+                    break
+
+                try:
+                    response = await self.dispatch(request)
+                except Exception as exc:  # noqa: BLE001 - one bad request must not stop the server
+                    print(f"Error serving {request.target}: {exc!r}", file=sys.stderr)
+                    response = Response.error(500)
+
+                connection = request.headers.get("connection", "").lower()
+                keep_alive = connection != "close" if request.version == "HTTP/1.1" else connection == "keep-alive"
+                await self._write(writer, response, head_only=request.method == "HEAD", keep_alive=keep_alive)
+                if not self.quiet:
+                    print(
+                        f'{peer} "{request.method} {request.target} {request.version}" '
+                        f"{response.status} {len(response.body)}",
+                        file=sys.stderr,
+                    )
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+        # Only reached when the task was not cancelled: a CancelledError (asyncio.run() shutting
+        # down without stop()) propagates after the close above instead of waiting for the peer.
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: Response, *, head_only: bool, keep_alive: bool) -> None:
+        headers = {
+            "Date": formatdate(usegmt=True),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        if response.status != 304:
+            headers["Content-Length"] = str(len(response.body))
+
+        phrase = HTTPStatus(response.status).phrase
+        head = f"HTTP/1.1 {response.status} {phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+        if not head_only and response.status != 304:
+            writer.write(response.body)
+        await writer.drain()
+
+
+async def serve(root: Path, host: str, port: int, *, quiet: bool = False, routes: dict | None = None) -> None:
+    server = DataServer(root, routes={**default_routes(root), **(routes or {})}, quiet=quiet)
+    await server.start(host, port)
+    try:
+        print(f"Serving {Path(root).resolve()} on http://{host}:{server.port}/", file=sys.stderr)
+        if brotli is None:
+            print("brotli is not installed; only gzip is compressed on the fly.", file=sys.stderr)
+        await server.server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve the map and its data with compression and caching.")
+    parser.add_argument("--root", type=Path, default=Path("."), help="Directory to serve; defaults to the repo root.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--quiet", action="store_true", help="Do not log requests.")
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args.root, args.host, args.port, quiet=args.quiet))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
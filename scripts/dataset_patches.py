@@ -0,0 +1,186 @@
+"""Delta patches from older dataset versions to the latest GeoJSON.
+
+A patch lists the features added since ``fromVersion``, the ids removed and,
+for changed checkpoints, only the properties that differ (plus the geometry
+when it moved). ``data/patches/manifest.json`` maps every ``fromVersion`` with
+a patch to its file and size, next to the size and SHA-256 of the full
+GeoJSON, so a client holding an older version fetches a few hundred bytes
+instead of the whole dataset. The manifest is small enough to poll: the
+service worker revalidates against it on every load.
+
+Every patch targets the latest version, so clients need one request and never
+chain patches. Older versions come from the previous GeoJSON kept during a
+pipeline run and from the retained releases in ``data/releases``; patches
+written for the same latest version survive even when their source snapshot
+has been pruned. Patches larger than ``MAX_PATCH_RATIO`` of the full file are
+not worth it and are left out.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from dataset_release import RELEASES_DIR, load_manifest, write_file_atomic
+from pipeline_dag import file_hash
+from pipeline_validation import build_dataset_snapshot, build_dataset_version, build_feature_hash
+
+PATCHES_DIR = Path("data/patches")
+PATCH_MANIFEST_PATH = PATCHES_DIR / "manifest.json"
+SCHEMA_VERSION = 1
+MAX_PATCH_RATIO = 0.5
+
+
+def _checkpoint_id(feature: dict) -> str:
+    return str((feature.get("properties") or {}).get("checkpoint_id") or "").strip()
+
+
+def _by_id(geojson: dict) -> dict[str, dict]:
+    features = {}
+    for feature in geojson.get("features") or []:
+        checkpoint_id = _checkpoint_id(feature)
+        if not checkpoint_id:
+            raise ValueError("Dataset patches need a checkpoint_id on every feature.")
+        features[checkpoint_id] = feature
+    return features
+
+
+def build_patch(previous: dict, current: dict, *, from_version: str, to_version: str) -> dict:
+    previous_by_id, current_by_id = _by_id(previous), _by_id(current)
+    changed = []
+    for checkpoint_id, feature in current_by_id.items():
+        old = previous_by_id.get(checkpoint_id)
+        if old is None or build_feature_hash(old) == build_feature_hash(feature):
+            continue
+
+        old_properties, new_properties = old.get("properties") or {}, feature.get("properties") or {}
+        item = {"id": checkpoint_id}
+        properties = {
+            key: value
+            for key, value in new_properties.items()
+            if key not in old_properties or old_properties[key] != value
+        }
+        if properties:
+            item["properties"] = properties
+        removed_properties = sorted(set(old_properties) - set(new_properties))
+        if removed_properties:
+            item["removedProperties"] = removed_properties
+        if old.get("geometry") != feature.get("geometry"):
+            item["geometry"] = feature.get("geometry")
+        changed.append(item)
+
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "fromVersion": from_version,
+        "toVersion": to_version,
+        "featureCount": len(current_by_id),
+        "added": [feature for checkpoint_id, feature in current_by_id.items() if checkpoint_id not in previous_by_id],
+        "removed": sorted(set(previous_by_id) - set(current_by_id)),
+        "changed": changed,
+    }
+
+
+def apply_patch(geojson: dict, patch: dict) -> dict:
+    """Reference client: the GeoJSON of ``patch["toVersion"]`` from one of ``patch["fromVersion"]``."""
+    features = {checkpoint_id: dict(feature) for checkpoint_id, feature in _by_id(geojson).items()}
+    for checkpoint_id in patch.get("removed") or []:
+        if features.pop(checkpoint_id, None) is None:
+            raise ValueError(f"Patch removes unknown checkpoint {checkpoint_id!r}; wrong base version?")
+
+    for item in patch.get("changed") or []:
+        feature = features.get(item["id"])
+        if feature is None:
+            raise ValueError(f"Patch changes unknown checkpoint {item['id']!r}; wrong base version?")
+        properties = {**(feature.get("properties") or {}), **(item.get("properties") or {})}
+        for key in item.get("removedProperties") or []:
+            properties.pop(key, None)
+        feature["properties"] = properties
+        if "geometry" in item:
+            feature["geometry"] = item["geometry"]
+
+    for feature in patch.get("added") or []:
+        features[_checkpoint_id(feature)] = feature
+
+    if len(features) != patch.get("featureCount", len(features)):
+        raise ValueError("Patched dataset does not have the expected number of features.")
+    return {**geojson, "features": list(features.values())}
+
+
+def _serialize(payload: dict) -> str:
+    # Patches are fetched by clients, so they are compact rather than indented.
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _release_sources(releases_dir: Path) -> list[tuple[str | None, Path]]:
+    sources = []
+    for release in sorted(Path(releases_dir).iterdir()) if Path(releases_dir).exists() else []:
+        if release.name.startswith(".") or release.is_symlink():
+            continue
+        manifest = load_manifest(release)
+        if manifest is not None and (release / "checkpoints.geojson").exists():
+            sources.append((manifest.get("datasetVersion"), release / "checkpoints.geojson"))
+    return sources
+
+
+def write_patches(
+    geojson: dict,
+    *,
+    latest_path: Path,
+    previous_paths: list[Path] = (),
+    releases_dir: Path = RELEASES_DIR,
+    patches_dir: Path = PATCHES_DIR,
+    max_ratio: float = MAX_PATCH_RATIO,
+) -> dict:
+    """Write patches from every known older version to ``geojson`` and the manifest; returns the manifest."""
+    patches_dir = Path(patches_dir)
+    manifest_path = patches_dir / PATCH_MANIFEST_PATH.name
+    latest_version = build_dataset_version(build_dataset_snapshot(geojson.get("features") or []))
+    latest_size = Path(latest_path).stat().st_size
+
+    previous_manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    entries = {}
+    if previous_manifest.get("latestVersion") == latest_version:
+        entries = {
+            version: entry
+            for version, entry in (previous_manifest.get("patches") or {}).items()
+            if (patches_dir / Path(entry["path"]).name).exists()
+        }
+
+    sources = [(None, Path(path)) for path in previous_paths if Path(path).exists()]
+    sources += _release_sources(releases_dir)
+    for version, path in sources:
+        if version in entries or version == latest_version:
+            continue
+        previous = json.loads(path.read_text(encoding="utf-8"))
+        version = version or build_dataset_version(build_dataset_snapshot(previous.get("features") or []))
+        if version in entries or version == latest_version:
+            continue
+
+        patch = build_patch(previous, geojson, from_version=version, to_version=latest_version)
+        serialized = _serialize(patch).encode("utf-8")
+        if len(serialized) > latest_size * max_ratio:
+            continue
+        patch_path = patches_dir / f"{version}--{latest_version}.json"
+        write_file_atomic(patch_path, serialized)
+        entries[version] = {
+            "path": patch_path.as_posix(),
+            "size": len(serialized),
+            "added": len(patch["added"]),
+            "removed": len(patch["removed"]),
+            "changed": len(patch["changed"]),
+        }
+
+    manifest = {
+        "schemaVersion": SCHEMA_VERSION,
+        "latestVersion": latest_version,
+        "latest": {"path": Path(latest_path).as_posix(), "size": latest_size, "sha256": file_hash(latest_path)},
+        "patches": dict(sorted(entries.items())),
+    }
+    write_file_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+
+    # Patches to an earlier latest version are no longer listed; clients that miss one fetch the full file.
+    kept = {Path(entry["path"]).name for entry in entries.values()}
+    for stale in patches_dir.glob("*--*.json"):
+        if stale.name not in kept:
+            stale.unlink()
+    return manifest
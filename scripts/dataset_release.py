@@ -0,0 +1,216 @@
+"""Atomic file writes and versioned dataset releases.
+
+Pipeline steps write through ``write_file_atomic``: the bytes go to a
+temporary file next to the target, are fsynced and renamed over it, so a
+reader opens either the old file or the new one, never a truncated one. A file
+whose bytes are unchanged is not touched at all, which keeps its mtime and
+every cache keyed on it valid.
+
+``publish_release`` then snapshots the published files into
+``data/releases/<dataset version>-<content hash>/`` next to a manifest of
+their hashes, built in a hidden staging directory and renamed into place once
+complete. Files whose hash matches the current release are hard-linked from it
+instead of copied. Replacing the ``data/releases/current`` symlink publishes
+the release in one rename; where symlinks are unavailable a ``CURRENT``
+pointer file is replaced instead. Releases beyond the retention count are
+pruned, never the current one.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pipeline_dag import file_hash
+
+RELEASES_DIR = Path("data/releases")
+RELEASE_BASE = Path("data")
+CURRENT_LINK = "current"
+POINTER_FILE = "CURRENT"
+MANIFEST_NAME = "manifest.json"
+DEFAULT_KEEP = 5
+STAGING_PREFIX = ".staging-"
+STALE_STAGING_SECONDS = 3600
+
+
+def _fsync_directory(path: Path) -> None:
+    # Makes the rename itself durable; directories cannot be opened this way on Windows.
+    if os.name != "posix":
+        return
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _temporary_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_file_atomic(path: Path, data: bytes | str) -> bool:
+    """Replace ``path`` with ``data`` atomically; returns False when the file already held those bytes."""
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with contextlib.suppress(FileNotFoundError):
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = _temporary_path(path)
+    try:
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            temporary.unlink()
+        raise
+    _fsync_directory(path.parent)
+    return True
+
+
+def current_release(root: Path = RELEASES_DIR) -> Path | None:
+    root = Path(root)
+    link = root / CURRENT_LINK
+    if link.is_symlink():
+        return root / os.readlink(link)
+    pointer = root / POINTER_FILE
+    if pointer.exists():
+        name = pointer.read_text(encoding="utf-8").strip()
+        return root / name if name else None
+    return None
+
+
+def load_manifest(release: Path | None) -> dict | None:
+    if release is None or not (Path(release) / MANIFEST_NAME).exists():
+        return None
+    return json.loads((Path(release) / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+
+def _copy_synced(source: Path, destination: Path) -> None:
+    with source.open("rb") as reader, destination.open("wb") as writer:
+        shutil.copyfileobj(reader, writer, 1024 * 1024)
+        writer.flush()
+        os.fsync(writer.fileno())
+    shutil.copystat(source, destination)
+
+
+def _point_current(root: Path, name: str) -> None:
+    temporary = root / f".{CURRENT_LINK}.{os.getpid()}.tmp"
+    with contextlib.suppress(FileNotFoundError):
+        temporary.unlink()
+    try:
+        os.symlink(name, temporary, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        write_file_atomic(root / POINTER_FILE, name + "\n")
+        return
+    os.replace(temporary, root / CURRENT_LINK)
+    _fsync_directory(root)
+
+
+def prune_releases(root: Path = RELEASES_DIR, keep: int = DEFAULT_KEEP) -> list[str]:
+    """Remove all but the ``keep`` newest releases, never the current one; returns the removed names."""
+    if keep < 1:
+        raise ValueError("At least one release must be kept.")
+    root = Path(root)
+    current = current_release(root)
+    releases = []
+    for path in root.iterdir() if root.exists() else []:
+        if path.name.startswith(".") or path.is_symlink() or not path.is_dir():
+            continue
+        manifest = load_manifest(path)
+        if manifest is not None:
+            releases.append((manifest.get("publishedAt") or "", path.name, path))
+
+    pruned = []
+    for _, name, path in sorted(releases, reverse=True)[keep:]:
+        if current is not None and name == current.name:
+            continue
+        shutil.rmtree(path)
+        pruned.append(name)
+
+    # Staging directories left behind by interrupted runs.
+    for staging in root.glob(f"{STAGING_PREFIX}*") if root.exists() else []:
+        if time.time() - staging.stat().st_mtime > STALE_STAGING_SECONDS:
+            shutil.rmtree(staging, ignore_errors=True)
+    return sorted(pruned)
+
+
+def publish_release(
+    files: list[Path],
+    *,
+    dataset_version: str,
+    root: Path = RELEASES_DIR,
+    base: Path = RELEASE_BASE,
+    keep: int = DEFAULT_KEEP,
+) -> dict:
+    """Snapshot ``files`` (paths under ``base``) as a release of ``dataset_version`` and make it current."""
+    root, base = Path(root), Path(base)
+    entries = {}
+    for path in files:
+        path = Path(path)
+        try:
+            name = path.relative_to(base).as_posix()
+        except ValueError as exc:
+            raise ValueError(f"Release file is outside {base}: {path}") from exc
+        entries[name] = {"sha256": file_hash(path), "size": path.stat().st_size}
+
+    content_hash = hashlib.sha256(json.dumps(entries, sort_keys=True).encode("utf-8")).hexdigest()
+    name = f"{dataset_version}-{content_hash[:8]}"
+    target = root / name
+    current = current_release(root)
+    result = {"release": name, "path": target, "copied": 0, "reused": 0}
+
+    if current is not None and current.name == name and load_manifest(target) is not None:
+        return {**result, "status": "current", "pruned": prune_releases(root, keep)}
+
+    if load_manifest(target) is None:
+        previous = (load_manifest(current) or {}).get("files") or {}
+        root.mkdir(parents=True, exist_ok=True)
+        staging = root / f"{STAGING_PREFIX}{name}.{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            for relative, entry in entries.items():
+                destination = staging / relative
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                if (previous.get(relative) or {}).get("sha256") == entry["sha256"]:
+                    try:
+                        os.link(current / relative, destination)
+                        result["reused"] += 1
+                        continue
+                    except OSError:
+                        pass
+                _copy_synced(base / relative, destination)
+                result["copied"] += 1
+
+            manifest = {
+                "release": name,
+                "datasetVersion": dataset_version,
+                "publishedAt": datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+                "files": entries,
+            }
+            write_file_atomic(staging / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Another run published the same content first.
+                if load_manifest(target) is None:
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        _fsync_directory(root)
+
+    _point_current(root, name)
+    return {**result, "status": "published", "pruned": prune_releases(root, keep)}
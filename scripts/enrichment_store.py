@@ -0,0 +1,306 @@
+"""SQLite store for checkpoint enrichment records.
+
+``data/checkpoint_enrichment.json`` stays the published, committed form of
+the enrichment data; the store is a local working copy of it with indexes
+on checkpoint id, kind and source. Importers upsert and delete records in
+the store and export the JSON file from it, and the coverage report queries
+it instead of re-indexing the flat record list. A store whose recorded
+fingerprint no longer matches the JSON file is reloaded from the file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+from dataset_release import write_file_atomic
+
+SCHEMA_VERSION = 1
+STORE_PATH = Path("data/checkpoint_enrichment.sqlite")
+PAYLOAD_KEYS = ("schemaVersion", "generatedAt", "description", "importSummary")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    position INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    checkpoint_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    source_title TEXT NOT NULL,
+    has_summary INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_by_checkpoint ON records (checkpoint_id, kind, source_id);
+CREATE INDEX IF NOT EXISTS records_by_kind ON records (kind, checkpoint_id);
+CREATE INDEX IF NOT EXISTS records_by_source ON records (source_id);
+"""
+# Records are exported in checkpoint order, independent of upsert history.
+EXPORT_ORDER = "CAST(checkpoint_id AS INTEGER), checkpoint_id, kind, source_id, payload"
+
+
+def _clean(value) -> str:
+    return str(value or "").strip()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def file_fingerprint(path: Path) -> str:
+    # Same line ending normalization as the research coverage fingerprint.
+    return hashlib.sha256(Path(path).read_bytes().replace(b"\r\n", b"\n")).hexdigest()
+
+
+def record_key(record: dict) -> tuple[str, str, str]:
+    return (
+        _clean(record.get("checkpointId") or record.get("checkpoint_id")),
+        _clean(record.get("kind")),
+        _clean(record.get("sourceId")),
+    )
+
+
+def _record_row(record: dict) -> tuple:
+    return (
+        *record_key(record),
+        _clean(record.get("sourceTitle")),
+        int(bool(_clean(record.get("summary")))),
+        _dumps(record),
+    )
+
+
+class EnrichmentStore:
+    """Enrichment sources, records and payload metadata in one SQLite file."""
+
+    def __init__(self, path: Path | str = STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path))
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The store is rebuilt from the JSON file, so an old layout is simply dropped.
+            self.connection.executescript(
+                "DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS sources; DROP TABLE IF EXISTS records;"
+            )
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> EnrichmentStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @property
+    def fingerprint(self) -> str | None:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_payload(self, payload: dict, *, fingerprint: str | None = None) -> None:
+        """Replace the store content with an enrichment payload."""
+        with self.connection:
+            self.connection.execute("DELETE FROM meta")
+            self.connection.execute("DELETE FROM sources")
+            self.connection.execute("DELETE FROM records")
+            self._set_meta({key: payload[key] for key in PAYLOAD_KEYS if key in payload})
+            for source in payload.get("sources") or []:
+                self._upsert_source(source)
+            records = payload.get("records") or []
+            self._insert_records(_record_row(record) for record in records if isinstance(record, dict))
+            if fingerprint:
+                self._set_meta({"fingerprint": fingerprint})
+
+    # The underscored writers run inside the caller's transaction.
+    def _set_meta(self, values: dict) -> None:
+        self.connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            [(key, _dumps(value)) for key, value in values.items()],
+        )
+
+    def _upsert_source(self, source: dict) -> None:
+        self.connection.execute(
+            "INSERT INTO sources (id, payload) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET payload = excluded.payload",
+            (_clean(source.get("id")), _dumps(source)),
+        )
+
+    def _insert_records(self, rows) -> None:
+        self.connection.executemany(
+            "INSERT INTO records (checkpoint_id, kind, source_id, source_title, has_summary, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def set_meta(self, **values) -> None:
+        with self.connection:
+            self._set_meta(values)
+
+    def meta(self) -> dict:
+        return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM meta")}
+
+    def upsert_source(self, source: dict) -> None:
+        with self.connection:
+            self._upsert_source(source)
+
+    def sources(self) -> list[dict]:
+        rows = self.connection.execute("SELECT payload FROM sources ORDER BY position")
+        return [json.loads(payload) for (payload,) in rows]
+
+    def upsert_records(self, records: list[dict]) -> int:
+        """Insert records, replacing stored ones with the same (checkpointId, kind, sourceId)."""
+        rows = {record_key(record): _record_row(record) for record in records}
+
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM records WHERE checkpoint_id = ? AND kind = ? AND source_id = ?",
+                list(rows),
+            )
+            self._insert_records(rows.values())
+
+        return len(rows)
+
+    def replace_records(self, records: list[dict], *, kind: str, source_id: str) -> int:
+        """Replace every stored record of ``kind`` from ``source_id`` with ``records`` in one transaction."""
+        rows = {record_key(record): _record_row(record) for record in records}
+        where, params = self._where(kind=kind, source_id=source_id)
+
+        with self.connection:
+            self.connection.execute(f"DELETE FROM records{where}", params)
+            self.connection.executemany(
+                "DELETE FROM records WHERE checkpoint_id = ? AND kind = ? AND source_id = ?",
+                list(rows),
+            )
+            self._insert_records(rows.values())
+
+        return len(rows)
+
+    def delete_records(
+        self,
+        *,
+        checkpoint_id: str | None = None,
+        kind: str | None = None,
+        source_id: str | None = None,
+    ) -> int:
+        """Delete records matching every given field; at least one is required."""
+        where, params = self._where(checkpoint_id=checkpoint_id, kind=kind, source_id=source_id)
+        if not params:
+            raise ValueError("delete_records needs a checkpoint_id, kind or source_id.")
+
+        with self.connection:
+            return self.connection.execute(f"DELETE FROM records{where}", params).rowcount
+
+    @staticmethod
+    def _where(
+        *,
+        checkpoint_id: str | None = None,
+        kind: str | None = None,
+        source_id: str | None = None,
+        exclude_kind: str | None = None,
+        with_summary: bool = False,
+    ) -> tuple[str, list]:
+        conditions = [
+            ("checkpoint_id = ?", checkpoint_id),
+            ("kind = ?", kind),
+            ("source_id = ?", source_id),
+            ("kind != ?", exclude_kind),
+        ]
+        clauses = [clause for clause, value in conditions if value is not None]
+        params = [value for _, value in conditions if value is not None]
+        if with_summary:
+            clauses.append("has_summary = 1")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def records(
+        self,
+        *,
+        checkpoint_id: str | None = None,
+        kind: str | None = None,
+        source_id: str | None = None,
+    ) -> list[dict]:
+        where, params = self._where(checkpoint_id=checkpoint_id, kind=kind, source_id=source_id)
+        rows = self.connection.execute(f"SELECT payload FROM records{where} ORDER BY {EXPORT_ORDER}", params)
+        return [json.loads(payload) for (payload,) in rows]
+
+    def count(self, *, kind: str | None = None, exclude_kind: str | None = None) -> int:
+        where, params = self._where(kind=kind, exclude_kind=exclude_kind)
+        return self.connection.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+
+    def checkpoint_ids(
+        self,
+        *,
+        kind: str | None = None,
+        exclude_kind: str | None = None,
+        with_summary: bool = False,
+    ) -> set[str]:
+        """Distinct checkpoint ids with a record of ``kind``, or of any kind but ``exclude_kind``."""
+        where, params = self._where(kind=kind, exclude_kind=exclude_kind, with_summary=with_summary)
+        where += (" AND" if where else " WHERE") + " checkpoint_id != ''"
+        rows = self.connection.execute(f"SELECT DISTINCT checkpoint_id FROM records{where}", params)
+        return {checkpoint_id for (checkpoint_id,) in rows}
+
+    def source_counts(self, *, unknown_label: str) -> dict[str, int]:
+        """Record counts by source id, falling back to source title and then ``unknown_label``."""
+        rows = self.connection.execute(
+            "SELECT COALESCE(NULLIF(source_id, ''), NULLIF(source_title, ''), ?) AS label, COUNT(*) "
+            "FROM records GROUP BY label",
+            (unknown_label,),
+        )
+        return dict(rows)
+
+    def to_payload(self) -> dict:
+        meta = self.meta()
+        payload = {
+            "schemaVersion": int(meta.get("schemaVersion") or 1),
+            "generatedAt": meta.get("generatedAt"),
+            "description": meta.get("description"),
+            "sources": self.sources(),
+        }
+        if "importSummary" in meta:
+            payload["importSummary"] = meta["importSummary"]
+        payload["records"] = self.records()
+        return payload
+
+    def export_json(self, path: Path) -> str:
+        """Write the JSON payload and remember its fingerprint; returns the fingerprint."""
+        path = Path(path)
+        write_file_atomic(path, json.dumps(self.to_payload(), ensure_ascii=False, indent=2) + "\n")
+        fingerprint = file_fingerprint(path)
+        self.set_meta(fingerprint=fingerprint)
+        return fingerprint
+
+
+def open_store(
+    json_path: Path,
+    store_path: Path | str = STORE_PATH,
+    *,
+    fingerprint: str | None = None,
+    payload: dict | None = None,
+) -> EnrichmentStore:
+    """Open the store for ``json_path``, reloading it if the JSON file changed since.
+
+    Callers that already hashed or parsed the JSON file can pass its
+    ``fingerprint`` and ``payload`` to skip doing it again.
+    """
+    store = EnrichmentStore(store_path)
+    json_path = Path(json_path)
+
+    if json_path.exists():
+        fingerprint = fingerprint or file_fingerprint(json_path)
+        if store.fingerprint != fingerprint:
+            if payload is None:
+                payload = json.loads(json_path.read_text(encoding="utf-8"))
+            store.load_payload(payload, fingerprint=fingerprint)
+
+    return store
@@ -0,0 +1,181 @@
+"""Minimal FlatBuffers encoding and decoding for the binary export formats.
+
+FlatGeobuf headers and features and Arrow IPC messages are FlatBuffers
+tables. Only what those schemas use is supported: scalars, strings, byte and
+double vectors, vectors of fixed-size structs, nested tables and vectors of
+tables. A union is its ``u8`` type field followed by a ``table`` field.
+"""
+
+from __future__ import annotations
+
+import struct
+
+SCALARS = {"bool": "<?", "u8": "<B", "i16": "<h", "u16": "<H", "i32": "<i", "i64": "<q", "u64": "<Q"}
+ABSENT = (None, None)
+
+
+def table_fields(count: int, values: dict) -> list:
+    """The ``fields`` list for a table with ``count`` field ids, from ``{field id: (kind, value)}``."""
+    return [values.get(index, ABSENT) for index in range(count)]
+
+
+class FlatBufferBuilder:
+    """Front-to-back FlatBuffers encoder: a vtable, then its table, then the objects it references.
+
+    Referenced objects always follow the field pointing at them, which keeps
+    every unsigned offset positive. Alignment is relative to the buffer start.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray(4)
+
+    def _align(self, alignment: int, extra: int = 0) -> None:
+        self.buffer.extend(b"\0" * (-(len(self.buffer) + extra) % alignment))
+
+    def finish(self, fields: list) -> bytes:
+        root = self.table(fields)
+        struct.pack_into("<I", self.buffer, 0, root)
+        self._align(8)
+        return bytes(self.buffer)
+
+    def table(self, fields: list) -> int:
+        """Write a table from ``fields[i] = (kind, value)`` per field id, with kind None for absent fields."""
+        present = [(index, kind, value) for index, (kind, value) in enumerate(fields) if kind is not None]
+        sizes = {index: 4 if kind not in SCALARS else struct.calcsize(SCALARS[kind]) for index, kind, _ in present}
+
+        offsets, cursor = {}, 4
+        for index, _, _ in sorted(present, key=lambda field: -sizes[field[0]]):
+            cursor += -cursor % sizes[index]
+            offsets[index] = cursor
+            cursor += sizes[index]
+        table_size = cursor + -cursor % 4
+
+        self._align(2)
+        vtable = len(self.buffer)
+        slots = [offsets.get(index, 0) for index in range(len(fields))]
+        self.buffer += struct.pack(f"<{2 + len(fields)}H", 4 + 2 * len(fields), table_size, *slots)
+        self._align(8)
+        table = len(self.buffer)
+        self.buffer += struct.pack("<i", table - vtable) + b"\0" * (table_size - 4)
+
+        references = []
+        for index, kind, value in present:
+            position = table + offsets[index]
+            if kind in SCALARS:
+                struct.pack_into(SCALARS[kind], self.buffer, position, value)
+            else:
+                references.append((position, kind, value))
+
+        for position, kind, value in references:
+            if kind == "string":
+                target = self.vector("B", value.encode("utf-8"), terminator=True)
+            elif kind == "bytes":
+                target = self.vector("B", value)
+            elif kind == "doubles":
+                target = self.vector("d", value)
+            elif kind == "structs":
+                target = self.structs(*value)
+            elif kind == "table":
+                target = self.table(value)
+            else:
+                target = self.tables(value)
+            struct.pack_into("<I", self.buffer, position, target - position)
+
+        return table
+
+    def vector(self, element: str, values, *, terminator: bool = False) -> int:
+        size = struct.calcsize(element)
+        self._align(max(size, 4), 4)
+        start = len(self.buffer)
+        self.buffer += struct.pack("<I", len(values))
+        self.buffer += values if element == "B" else struct.pack(f"<{len(values)}{element}", *values)
+        if terminator:
+            self.buffer += b"\0"
+        return start
+
+    def structs(self, layout: str, rows: list[tuple]) -> int:
+        """A vector of structs packed with ``layout``; the structs here all hold 64-bit members."""
+        self._align(8, 4)
+        start = len(self.buffer)
+        self.buffer += struct.pack("<I", len(rows))
+        for row in rows:
+            self.buffer += struct.pack(f"<{layout}", *row)
+        return start
+
+    def tables(self, items: list) -> int:
+        self._align(4)
+        start = len(self.buffer)
+        self.buffer += struct.pack(f"<{len(items) + 1}I", len(items), *([0] * len(items)))
+        for number, fields in enumerate(items):
+            slot = start + 4 + 4 * number
+            struct.pack_into("<I", self.buffer, slot, self.table(fields) - slot)
+        return start
+
+
+class FlatBufferTable:
+    """Read access to one table of a FlatBuffers buffer (bytes, mmap or memoryview)."""
+
+    def __init__(self, buffer, position: int):
+        self.buffer = buffer
+        self.position = position
+        self.vtable = position - struct.unpack_from("<i", buffer, position)[0]
+        self.vtable_size = struct.unpack_from("<H", buffer, self.vtable)[0]
+
+    @classmethod
+    def root(cls, buffer, start: int = 0) -> FlatBufferTable:
+        return cls(buffer, start + struct.unpack_from("<I", buffer, start)[0])
+
+    def _field(self, index: int) -> int | None:
+        if 4 + 2 * index >= self.vtable_size:
+            return None
+        offset = struct.unpack_from("<H", self.buffer, self.vtable + 4 + 2 * index)[0]
+        return self.position + offset if offset else None
+
+    def has(self, index: int) -> bool:
+        return self._field(index) is not None
+
+    def scalar(self, index: int, kind: str, default=0):
+        position = self._field(index)
+        return default if position is None else struct.unpack_from(SCALARS[kind], self.buffer, position)[0]
+
+    def _target(self, index: int) -> int | None:
+        position = self._field(index)
+        return None if position is None else position + struct.unpack_from("<I", self.buffer, position)[0]
+
+    def bytes(self, index: int) -> bytes | None:
+        target = self._target(index)
+        if target is None:
+            return None
+        length = struct.unpack_from("<I", self.buffer, target)[0]
+        return bytes(self.buffer[target + 4 : target + 4 + length])
+
+    def string(self, index: int) -> str | None:
+        data = self.bytes(index)
+        return None if data is None else data.decode("utf-8")
+
+    def doubles(self, index: int) -> list[float]:
+        target = self._target(index)
+        if target is None:
+            return []
+        length = struct.unpack_from("<I", self.buffer, target)[0]
+        return list(struct.unpack_from(f"<{length}d", self.buffer, target + 4))
+
+    def structs(self, index: int, layout: str) -> list[tuple]:
+        target = self._target(index)
+        if target is None:
+            return []
+        length = struct.unpack_from("<I", self.buffer, target)[0]
+        element = struct.Struct(f"<{layout}")
+        return [element.unpack_from(self.buffer, target + 4 + number * element.size) for number in range(length)]
+
+    def table(self, index: int) -> FlatBufferTable | None:
+        target = self._target(index)
+        return None if target is None else FlatBufferTable(self.buffer, target)
+
+    def tables(self, index: int) -> list[FlatBufferTable]:
+        target = self._target(index)
+        if target is None:
+            return []
+        length = struct.unpack_from("<I", self.buffer, target)[0]
+        slots = (target + 4 + 4 * number for number in range(length))
+        return [FlatBufferTable(self.buffer, slot + struct.unpack_from("<I", self.buffer, slot)[0]) for slot in slots]
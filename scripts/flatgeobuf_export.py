@@ -0,0 +1,388 @@
+"""FlatGeobuf export of the checkpoints with a packed Hilbert R-tree.
+
+A FlatGeobuf file is a magic number, a FlatBuffers header, a static packed
+R-tree over the feature bounding boxes and the size-prefixed FlatBuffers
+features. Features are written in Hilbert curve order of their points, so
+each leaf of the tree covers a compact area and the features it points to
+are contiguous. A client that supports HTTP range requests reads the header
+and walks the tree from the top, then fetches only the byte ranges of the
+features in its view from one static file.
+
+FlatBuffers go through the small codec in ``flatbuffers_codec``, so the
+export has no dependency beyond the standard library.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from pathlib import Path
+from urllib.request import Request, urlopen
+
+from dataset_release import write_file_atomic
+from flatbuffers_codec import FlatBufferBuilder, FlatBufferTable, table_fields
+
+FLATGEOBUF_PATH = Path("data/exports/checkpoints.fgb")
+MAGIC = b"fgb\x03fgb\x00"
+NODE_SIZE = 16
+NODE_ITEM = struct.Struct("<ddddQ")
+HILBERT_MAX = (1 << 16) - 1
+GEOMETRY_POINT = 1
+COLUMN_STRING = 11
+COLUMN_JSON = 12
+
+# Field ids from the FlatGeobuf header.fbs and feature.fbs schemas.
+HEADER_NAME, HEADER_ENVELOPE, HEADER_GEOMETRY_TYPE = 0, 1, 2
+HEADER_COLUMNS, HEADER_FEATURES_COUNT, HEADER_INDEX_NODE_SIZE, HEADER_CRS = 7, 8, 9, 10
+COLUMN_NAME, COLUMN_TYPE = 0, 1
+CRS_ORG, CRS_CODE = 0, 1
+FEATURE_GEOMETRY, FEATURE_PROPERTIES = 0, 1
+GEOMETRY_XY, GEOMETRY_TYPE = 1, 6
+
+
+def hilbert(x: int, y: int) -> int:
+    """Index of (x, y) on a 16-bit Hilbert curve, as in the FlatGeobuf reference implementation."""
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+
+    for shift, mask in ((8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)):
+        i0 = (i0 | (i0 << shift)) & mask
+        i1 = (i1 | (i1 << shift)) & mask
+
+    return (i1 << 1) | i0
+
+
+def level_bounds(item_count: int, node_size: int = NODE_SIZE) -> list[tuple[int, int]]:
+    """(start, end) node indexes per tree level, leaves first; the root is node 0."""
+    counts = [item_count]
+    total = item_count
+    while True:
+        item_count = -(-item_count // node_size)
+        counts.append(item_count)
+        total += item_count
+        if item_count == 1:
+            break
+
+    bounds = []
+    for count in counts:
+        total -= count
+        bounds.append((total, total + count))
+    return bounds
+
+
+def build_packed_rtree(boxes: list[tuple[float, float, float, float]], offsets: list[int], node_size: int = NODE_SIZE):
+    """Nodes (min_x, min_y, max_x, max_y, offset) of the packed tree over already sorted leaf boxes.
+
+    Leaf offsets are byte offsets into the feature section; a parent's offset is the index of its first child.
+    """
+    levels = level_bounds(len(boxes), node_size)
+    nodes = [None] * levels[0][1]
+    leaf_start = levels[0][0]
+    for index, (box, offset) in enumerate(zip(boxes, offsets)):
+        nodes[leaf_start + index] = (*box, offset)
+
+    for (start, end), (parent, _) in zip(levels, levels[1:]):
+        for first in range(start, end, node_size):
+            children = nodes[first : min(first + node_size, end)]
+            nodes[parent] = (
+                min(child[0] for child in children),
+                min(child[1] for child in children),
+                max(child[2] for child in children),
+                max(child[3] for child in children),
+                first,
+            )
+            parent += 1
+
+    return nodes
+
+
+def search_packed_rtree(read_nodes, item_count: int, bbox, node_size: int = NODE_SIZE) -> list[tuple[int, int]]:
+    """(feature byte offset, leaf index) for leaves intersecting ``bbox``, in file order.
+
+    ``read_nodes(start, end)`` returns the decoded nodes in that index range, so the
+    tree can be read from a file or over HTTP ranges one node block at a time.
+    """
+    min_x, min_y, max_x, max_y = bbox
+    levels = level_bounds(item_count, node_size)
+    leaf_start = levels[0][0]
+    pending = [(0, len(levels) - 1)]
+    found = []
+
+    while pending:
+        first, level = pending.pop()
+        end = min(first + node_size, levels[level][1])
+        for position, node in enumerate(read_nodes(first, end), start=first):
+            if node[0] > max_x or node[2] < min_x or node[1] > max_y or node[3] < min_y:
+                continue
+            if position >= leaf_start:
+                found.append((node[4], position - leaf_start))
+            else:
+                pending.append((node[4], level - 1))
+
+    return sorted(found)
+
+
+def _point(feature: dict) -> tuple[float, float]:
+    try:
+        lon, lat = (float(value) for value in feature["geometry"]["coordinates"][:2])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"FlatGeobuf export needs point coordinates: {feature.get('properties')!r}") from exc
+    return lon, lat
+
+
+def _columns(features: list[dict]) -> list[tuple[str, int]]:
+    """Property names in first-seen order; columns holding anything but strings are JSON."""
+    types: dict[str, int] = {}
+    for feature in features:
+        for name, value in (feature.get("properties") or {}).items():
+            if value is not None and not isinstance(value, str):
+                types[name] = COLUMN_JSON
+            else:
+                types.setdefault(name, COLUMN_STRING)
+    return list(types.items())
+
+
+def encode_properties(properties: dict, columns: list[tuple[str, int]]) -> bytes:
+    encoded = bytearray()
+    for index, (name, column_type) in enumerate(columns):
+        value = properties.get(name)
+        if value is None:
+            continue
+        if column_type == COLUMN_JSON:
+            value = json.dumps(value, ensure_ascii=False)
+        data = value.encode("utf-8")
+        encoded += struct.pack("<HI", index, len(data)) + data
+    return bytes(encoded)
+
+
+def encode_flatgeobuf(geojson: dict, *, name: str = "checkpoints", node_size: int = NODE_SIZE) -> bytes:
+    features = geojson.get("features") or []
+    columns = _columns(features)
+    points = [_point(feature) for feature in features]
+
+    if points:
+        min_x, min_y = min(x for x, _ in points), min(y for _, y in points)
+        max_x, max_y = max(x for x, _ in points), max(y for _, y in points)
+        width, height = max_x - min_x, max_y - min_y
+        order = sorted(
+            range(len(features)),
+            key=lambda index: (
+                -hilbert(
+                    math.floor(HILBERT_MAX * (points[index][0] - min_x) / width) if width else 0,
+                    math.floor(HILBERT_MAX * (points[index][1] - min_y) / height) if height else 0,
+                ),
+                index,
+            ),
+        )
+        envelope = [min_x, min_y, max_x, max_y]
+    else:
+        order, envelope = [], []
+
+    header = FlatBufferBuilder().finish(
+        table_fields(
+            11,
+            {
+                HEADER_NAME: ("string", name),
+                HEADER_ENVELOPE: ("doubles", envelope) if envelope else (None, None),
+                HEADER_GEOMETRY_TYPE: ("u8", GEOMETRY_POINT),
+                HEADER_COLUMNS: (
+                    "tables",
+                    [
+                        table_fields(2, {COLUMN_NAME: ("string", column), COLUMN_TYPE: ("u8", column_type)})
+                        for column, column_type in columns
+                    ],
+                ),
+                HEADER_FEATURES_COUNT: ("u64", len(features)),
+                HEADER_INDEX_NODE_SIZE: ("u16", node_size if features else 0),
+                HEADER_CRS: ("table", table_fields(2, {CRS_ORG: ("string", "EPSG"), CRS_CODE: ("i32", 4326)})),
+            },
+        )
+    )
+
+    encoded_features, offsets, boxes, offset = [], [], [], 0
+    for index in order:
+        lon, lat = points[index]
+        body = FlatBufferBuilder().finish(
+            table_fields(
+                2,
+                {
+                    FEATURE_GEOMETRY: (
+                        "table",
+                        table_fields(7, {GEOMETRY_XY: ("doubles", [lon, lat]), GEOMETRY_TYPE: ("u8", GEOMETRY_POINT)}),
+                    ),
+                    FEATURE_PROPERTIES: (
+                        "bytes",
+                        encode_properties(features[index].get("properties") or {}, columns),
+                    ),
+                },
+            )
+        )
+        encoded_features.append(struct.pack("<I", len(body)) + body)
+        offsets.append(offset)
+        boxes.append((lon, lat, lon, lat))
+        offset += len(encoded_features[-1])
+
+    index_bytes = b""
+    if features and node_size:
+        index_bytes = b"".join(NODE_ITEM.pack(*node) for node in build_packed_rtree(boxes, offsets, node_size))
+
+    return b"".join([MAGIC, struct.pack("<I", len(header)), header, index_bytes, *encoded_features])
+
+
+def write_flatgeobuf(path: Path, geojson: dict) -> int:
+    encoded = encode_flatgeobuf(geojson)
+    write_file_atomic(path, encoded)
+    return len(encoded)
+
+
+class FlatGeobufReader:
+    """Read a FlatGeobuf file through ``read_range(offset, length)``, from disk or over HTTP ranges."""
+
+    def __init__(self, read_range):
+        self.read_range = read_range
+        prefix = read_range(0, len(MAGIC) + 4)
+        if prefix[:3] != MAGIC[:3] or prefix[3] != MAGIC[3]:
+            raise ValueError("Not a FlatGeobuf version 3 file.")
+        header_size = struct.unpack_from("<I", prefix, len(MAGIC))[0]
+        header = FlatBufferTable.root(read_range(len(MAGIC) + 4, header_size))
+
+        self.name = header.string(HEADER_NAME)
+        self.envelope = header.doubles(HEADER_ENVELOPE)
+        self.features_count = header.scalar(HEADER_FEATURES_COUNT, "u64")
+        self.node_size = header.scalar(HEADER_INDEX_NODE_SIZE, "u16", NODE_SIZE)
+        self.columns = [
+            (column.string(COLUMN_NAME), column.scalar(COLUMN_TYPE, "u8"))
+            for column in header.tables(HEADER_COLUMNS)
+        ]
+        crs = header.table(HEADER_CRS)
+        self.crs = f"{crs.string(CRS_ORG)}:{crs.scalar(CRS_CODE, 'i32')}" if crs else None
+
+        self.index_offset = len(MAGIC) + 4 + header_size
+        index_nodes = level_bounds(self.features_count, self.node_size)[0][1] if self.has_index else 0
+        self.features_offset = self.index_offset + index_nodes * NODE_ITEM.size
+
+    @classmethod
+    def from_path(cls, path: Path) -> FlatGeobufReader:
+        handle = Path(path).open("rb")
+
+        def read_range(offset: int, length: int) -> bytes:
+            handle.seek(offset)
+            return handle.read(length)
+
+        reader = cls(read_range)
+        reader.close = handle.close
+        return reader
+
+    @classmethod
+    def from_url(cls, url: str) -> FlatGeobufReader:
+        def read_range(offset: int, length: int) -> bytes:
+            request = Request(url, headers={"Range": f"bytes={offset}-{offset + length - 1}"})
+            with urlopen(request) as response:
+                return response.read()
+
+        return cls(read_range)
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def has_index(self) -> bool:
+        return bool(self.node_size and self.features_count)
+
+    def _read_nodes(self, start: int, end: int) -> list[tuple]:
+        data = self.read_range(self.index_offset + start * NODE_ITEM.size, (end - start) * NODE_ITEM.size)
+        return list(NODE_ITEM.iter_unpack(data))
+
+    def _decode_feature(self, data: bytes) -> dict:
+        feature = FlatBufferTable.root(data)
+        geometry = feature.table(FEATURE_GEOMETRY)
+        properties = {}
+        encoded = feature.bytes(FEATURE_PROPERTIES) or b""
+        position = 0
+        while position < len(encoded):
+            index, length = struct.unpack_from("<HI", encoded, position)
+            value = encoded[position + 6 : position + 6 + length].decode("utf-8")
+            name, column_type = self.columns[index]
+            properties[name] = json.loads(value) if column_type == COLUMN_JSON else value
+            position += 6 + length
+
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": geometry.doubles(GEOMETRY_XY)[:2]} if geometry else None,
+            "properties": properties,
+        }
+
+    @staticmethod
+    def _runs(hits: list[tuple[int, int]]) -> list[list[int]]:
+        # Hilbert order keeps neighbours adjacent, so hits mostly come in runs of consecutive leaves.
+        runs = []
+        for offset, leaf in hits:
+            if runs and leaf == runs[-1][1] + 1:
+                runs[-1][1] = leaf
+                runs[-1][2].append(offset)
+            else:
+                runs.append([leaf, leaf, [offset]])
+        return [offsets for _, _, offsets in runs]
+
+    def _read_run(self, offsets: list[int]) -> list[dict]:
+        """Decode consecutive features with two range reads: the last size prefix, then the whole run."""
+        last = self.features_offset + offsets[-1]
+        size = struct.unpack("<I", self.read_range(last, 4))[0]
+        data = self.read_range(self.features_offset + offsets[0], last + 4 + size - self.features_offset - offsets[0])
+
+        features = []
+        for offset in offsets:
+            start = offset - offsets[0]
+            length = struct.unpack_from("<I", data, start)[0]
+            features.append(self._decode_feature(data[start + 4 : start + 4 + length]))
+        return features
+
+    def features(self, bbox: tuple[float, float, float, float] | None = None) -> list[dict]:
+        """All features in file order, or those whose points fall inside ``bbox`` found through the index."""
+        if bbox is not None and self.has_index:
+            hits = search_packed_rtree(self._read_nodes, self.features_count, bbox, self.node_size)
+            return [feature for run in self._runs(hits) for feature in self._read_run(run)]
+
+        features, offset = [], 0
+        for _ in range(self.features_count):
+            size = struct.unpack("<I", self.read_range(self.features_offset + offset, 4))[0]
+            features.append(self._decode_feature(self.read_range(self.features_offset + offset + 4, size)))
+            offset += 4 + size
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            features = [
+                feature
+                for feature in features
+                if min_x <= feature["geometry"]["coordinates"][0] <= max_x
+                and min_y <= feature["geometry"]["coordinates"][1] <= max_y
+            ]
+        return features
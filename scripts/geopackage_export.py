@@ -0,0 +1,492 @@
+"""GeoPackage export of the checkpoints and their enrichment records.
+
+The file follows OGC GeoPackage 1.3: a ``checkpoints`` point feature table
+in EPSG:4326 with an R*Tree spatial index (``gpkg_rtree_index``) and indexes
+on the attribute columns consumers filter by, plus the enrichment records as
+an attribute table linked to the checkpoints through the Related Tables
+extension. GIS tools and services can then query by area or attribute
+straight from disk.
+
+Writes are incremental: a file that already holds the current dataset
+version and enrichment fingerprint is left alone, and otherwise only the
+checkpoints whose feature hash changed are inserted, updated or deleted, in
+one transaction so readers never see a half-updated file. A new file, or one
+whose property columns changed, is built next to the target and moved into
+place with ``os.replace``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pipeline_validation import build_feature_hash
+
+GEOPACKAGE_PATH = Path("data/exports/checkpoints.gpkg")
+APPLICATION_ID = 0x47504B47  # "GPKG"
+USER_VERSION = 10300  # GeoPackage 1.3.0
+SRS_ID = 4326
+FEATURE_TABLE = "checkpoints"
+GEOMETRY_COLUMN = "geom"
+ENRICHMENT_TABLE = "checkpoint_enrichment"
+MAPPING_TABLE = "checkpoints_checkpoint_enrichment"
+META_TABLE = "export_meta"
+RTREE_TABLE = f"rtree_{FEATURE_TABLE}_{GEOMETRY_COLUMN}"
+INDEXED_COLUMNS = ("checkpoint_type", "status", "subject_name", "federal_district", "foreign_country")
+RTREE_DEFINITION = "http://www.geopackage.org/spec120/#extension_rtree"
+RELATED_TABLES_DEFINITION = "http://docs.opengeospatial.org/is/18-000/18-000.html"
+ENRICHMENT_COLUMNS = (
+    "checkpoint_id",
+    "kind",
+    "title",
+    "summary",
+    "source_id",
+    "source_title",
+    "confidence",
+    "tags",
+    "payload",
+)
+
+CORE_SCHEMA = f"""
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL,
+    srs_id INTEGER PRIMARY KEY,
+    organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL,
+    definition TEXT NOT NULL,
+    description TEXT
+);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY,
+    data_type TEXT NOT NULL,
+    identifier TEXT UNIQUE,
+    description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE,
+    min_y DOUBLE,
+    max_x DOUBLE,
+    max_y DOUBLE,
+    srs_id INTEGER,
+    CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL,
+    z TINYINT NOT NULL,
+    m TINYINT NOT NULL,
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+    CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+    CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_extensions (
+    table_name TEXT,
+    column_name TEXT,
+    extension_name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name)
+);
+CREATE TABLE gpkgext_relations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    base_table_name TEXT NOT NULL,
+    base_primary_column TEXT NOT NULL DEFAULT 'id',
+    related_table_name TEXT NOT NULL,
+    related_primary_column TEXT NOT NULL DEFAULT 'id',
+    relation_name TEXT NOT NULL,
+    mapping_table_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE {META_TABLE} (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+SPATIAL_REF_SYS = [
+    (
+        "WGS 84 geodetic",
+        4326,
+        "EPSG",
+        4326,
+        'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,'
+        'AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,'
+        'AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],'
+        'AXIS["Latitude",NORTH],AXIS["Longitude",EAST],AUTHORITY["EPSG","4326"]]',
+        "longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid",
+    ),
+    ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", "undefined cartesian coordinate reference system"),
+    ("Undefined geographic SRS", 0, "NONE", 0, "undefined", "undefined geographic coordinate reference system"),
+]
+# The trigger set of the gpkg_rtree_index extension keeps the R*Tree in step with the feature table.
+RTREE_TRIGGERS = """
+CREATE TRIGGER {rtree}_insert AFTER INSERT ON {table}
+WHEN (new.{geom} NOT NULL AND NOT ST_IsEmpty(NEW.{geom}))
+BEGIN
+  INSERT OR REPLACE INTO {rtree} VALUES (
+    NEW.fid, ST_MinX(NEW.{geom}), ST_MaxX(NEW.{geom}), ST_MinY(NEW.{geom}), ST_MaxY(NEW.{geom})
+  );
+END;
+CREATE TRIGGER {rtree}_update1 AFTER UPDATE OF {geom} ON {table}
+WHEN OLD.fid = NEW.fid AND (NEW.{geom} NOTNULL AND NOT ST_IsEmpty(NEW.{geom}))
+BEGIN
+  INSERT OR REPLACE INTO {rtree} VALUES (
+    NEW.fid, ST_MinX(NEW.{geom}), ST_MaxX(NEW.{geom}), ST_MinY(NEW.{geom}), ST_MaxY(NEW.{geom})
+  );
+END;
+CREATE TRIGGER {rtree}_update2 AFTER UPDATE OF {geom} ON {table}
+WHEN OLD.fid = NEW.fid AND (NEW.{geom} ISNULL OR ST_IsEmpty(NEW.{geom}))
+BEGIN
+  DELETE FROM {rtree} WHERE id = OLD.fid;
+END;
+CREATE TRIGGER {rtree}_update3 AFTER UPDATE ON {table}
+WHEN OLD.fid != NEW.fid AND (NEW.{geom} NOTNULL AND NOT ST_IsEmpty(NEW.{geom}))
+BEGIN
+  DELETE FROM {rtree} WHERE id = OLD.fid;
+  INSERT OR REPLACE INTO {rtree} VALUES (
+    NEW.fid, ST_MinX(NEW.{geom}), ST_MaxX(NEW.{geom}), ST_MinY(NEW.{geom}), ST_MaxY(NEW.{geom})
+  );
+END;
+CREATE TRIGGER {rtree}_update4 AFTER UPDATE ON {table}
+WHEN OLD.fid != NEW.fid AND (NEW.{geom} ISNULL OR ST_IsEmpty(NEW.{geom}))
+BEGIN
+  DELETE FROM {rtree} WHERE id IN (OLD.fid, NEW.fid);
+END;
+CREATE TRIGGER {rtree}_delete AFTER DELETE ON {table}
+WHEN old.{geom} NOT NULL
+BEGIN
+  DELETE FROM {rtree} WHERE id = OLD.fid;
+END;
+"""
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def encode_point(lon: float, lat: float, srs_id: int = SRS_ID) -> bytes:
+    """GeoPackageBinary header without envelope, followed by a little-endian WKB point.
+
+    NaN coordinates encode the empty point, with the header's empty flag set.
+    """
+    flags = 0b00000001 | (0b00010000 if math.isnan(lon) or math.isnan(lat) else 0)
+    return b"GP" + struct.pack("<BBi", 0, flags, srs_id) + struct.pack("<BIdd", 1, 1, lon, lat)
+
+
+def decode_point(blob: bytes) -> tuple[float, float] | None:
+    if blob is None or blob[:2] != b"GP":
+        raise ValueError("Not a GeoPackage geometry blob.")
+    flags = blob[3]
+    if flags & 0b00010000:
+        return None
+    envelope_size = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}[(flags >> 1) & 0b111]
+    wkb = blob[8 + envelope_size :]
+    byte_order = "<" if wkb[0] == 1 else ">"
+    geometry_type, lon, lat = struct.unpack(f"{byte_order}Idd", wkb[1:21])
+    if geometry_type != 1:
+        raise ValueError(f"Only WKB points are supported, got type {geometry_type}.")
+    return None if math.isnan(lon) and math.isnan(lat) else (lon, lat)
+
+
+def _st(index: int | None):
+    def function(blob):
+        point = decode_point(blob)
+        if index is None:
+            return int(point is None)
+        return None if point is None else point[index]
+
+    return function
+
+
+def register_functions(connection: sqlite3.Connection) -> None:
+    """The ST_ functions the R*Tree triggers call, for point geometries."""
+    connection.create_function("ST_IsEmpty", 1, _st(None), deterministic=True)
+    for name, index in (("ST_MinX", 0), ("ST_MaxX", 0), ("ST_MinY", 1), ("ST_MaxY", 1)):
+        connection.create_function(name, 1, _st(index), deterministic=True)
+
+
+def feature_columns(features: list[dict]) -> list[str]:
+    """Property names in first-seen order; each becomes a TEXT column."""
+    columns = {}
+    for feature in features:
+        for name in feature.get("properties") or {}:
+            columns.setdefault(name, None)
+    return list(columns)
+
+
+def _point(feature: dict) -> tuple[float, float] | None:
+    try:
+        lon, lat = (float(value) for value in feature["geometry"]["coordinates"][:2])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return lon, lat
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _create(connection: sqlite3.Connection, columns: list[str]) -> None:
+    connection.execute(f"PRAGMA application_id = {APPLICATION_ID}")
+    connection.execute(f"PRAGMA user_version = {USER_VERSION}")
+    connection.executescript(CORE_SCHEMA)
+    connection.executemany("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", SPATIAL_REF_SYS)
+
+    attribute_columns = ",\n".join(
+        f"    {_quote(name)} TEXT{' UNIQUE' if name == 'checkpoint_id' else ''}" for name in columns
+    )
+    connection.executescript(
+        f"""
+        CREATE TABLE {FEATURE_TABLE} (
+            fid INTEGER PRIMARY KEY AUTOINCREMENT,
+            {GEOMETRY_COLUMN} POINT,
+        {attribute_columns},
+            feature_hash TEXT NOT NULL
+        );
+        CREATE VIRTUAL TABLE {RTREE_TABLE} USING rtree(id, minx, maxx, miny, maxy);
+        CREATE TABLE {ENRICHMENT_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            checkpoint_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            title TEXT,
+            summary TEXT,
+            source_id TEXT,
+            source_title TEXT,
+            confidence TEXT,
+            tags TEXT,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX {ENRICHMENT_TABLE}_checkpoint ON {ENRICHMENT_TABLE} (checkpoint_id, kind);
+        CREATE TABLE {MAPPING_TABLE} (
+            base_id INTEGER NOT NULL,
+            related_id INTEGER NOT NULL
+        );
+        CREATE INDEX {MAPPING_TABLE}_base ON {MAPPING_TABLE} (base_id);
+        CREATE INDEX {MAPPING_TABLE}_related ON {MAPPING_TABLE} (related_id);
+        """
+    )
+    for name in INDEXED_COLUMNS:
+        if name in columns:
+            connection.execute(f"CREATE INDEX {FEATURE_TABLE}_{name} ON {FEATURE_TABLE} ({_quote(name)})")
+    connection.executescript(RTREE_TRIGGERS.format(rtree=RTREE_TABLE, table=FEATURE_TABLE, geom=GEOMETRY_COLUMN))
+
+    connection.executemany(
+        "INSERT INTO gpkg_contents (table_name, data_type, identifier, description, srs_id) VALUES (?, ?, ?, ?, ?)",
+        [
+            (FEATURE_TABLE, "features", FEATURE_TABLE, "Russian border checkpoints", SRS_ID),
+            (ENRICHMENT_TABLE, "attributes", ENRICHMENT_TABLE, "Research records per checkpoint", None),
+            (MAPPING_TABLE, "attributes", MAPPING_TABLE, "Checkpoint to enrichment record links", None),
+        ],
+    )
+    connection.execute(
+        "INSERT INTO gpkg_geometry_columns VALUES (?, ?, 'POINT', ?, 0, 0)",
+        (FEATURE_TABLE, GEOMETRY_COLUMN, SRS_ID),
+    )
+    connection.executemany(
+        "INSERT INTO gpkg_extensions VALUES (?, ?, ?, ?, ?)",
+        [
+            (FEATURE_TABLE, GEOMETRY_COLUMN, "gpkg_rtree_index", RTREE_DEFINITION, "write-only"),
+            ("gpkgext_relations", None, "related_tables", RELATED_TABLES_DEFINITION, "read-write"),
+            (MAPPING_TABLE, None, "related_tables", RELATED_TABLES_DEFINITION, "read-write"),
+        ],
+    )
+    connection.execute(
+        "INSERT INTO gpkgext_relations "
+        "(base_table_name, base_primary_column, related_table_name, related_primary_column, "
+        "relation_name, mapping_table_name) VALUES (?, 'fid', ?, 'id', 'attributes', ?)",
+        (FEATURE_TABLE, ENRICHMENT_TABLE, MAPPING_TABLE),
+    )
+    connection.execute(
+        f"INSERT INTO {META_TABLE} (key, value) VALUES ('columns', ?)",
+        (json.dumps(columns, ensure_ascii=False),),
+    )
+
+
+def _stored_meta(connection: sqlite3.Connection) -> dict | None:
+    try:
+        rows = connection.execute(f"SELECT key, value FROM {META_TABLE}").fetchall()
+    except sqlite3.DatabaseError:
+        return None
+    return {key: json.loads(value) for key, value in rows}
+
+
+def open_geopackage(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(str(path))
+    register_functions(connection)
+    return connection
+
+
+def _rebuild_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def _sync_checkpoints(connection: sqlite3.Connection, features: list[dict], columns: list[str]) -> dict:
+    stored = {
+        checkpoint_id: (fid, feature_hash)
+        for fid, checkpoint_id, feature_hash in connection.execute(
+            f"SELECT fid, checkpoint_id, feature_hash FROM {FEATURE_TABLE}"
+        )
+    }
+    assignments = ", ".join(f"{_quote(name)} = ?" for name in [GEOMETRY_COLUMN, *columns, "feature_hash"])
+    placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+    insert = (
+        f"INSERT INTO {FEATURE_TABLE} ({_quote(GEOMETRY_COLUMN)}, "
+        f"{', '.join(_quote(name) for name in columns)}, feature_hash) VALUES ({placeholders})"
+    )
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    seen = set()
+
+    for feature in features:
+        properties = feature.get("properties") or {}
+        checkpoint_id = str(properties.get("checkpoint_id") or "").strip()
+        point = _point(feature)
+        geometry = encode_point(*point) if point else encode_point(math.nan, math.nan)
+        feature_hash = build_feature_hash(feature)
+        values = [geometry, *(_text(properties.get(name)) for name in columns), feature_hash]
+        seen.add(checkpoint_id)
+
+        existing = stored.get(checkpoint_id)
+        if existing is None:
+            connection.execute(insert, values)
+            counts["inserted"] += 1
+        elif existing[1] != feature_hash:
+            connection.execute(f"UPDATE {FEATURE_TABLE} SET {assignments} WHERE fid = ?", [*values, existing[0]])
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    removed = [(fid,) for checkpoint_id, (fid, _) in stored.items() if checkpoint_id not in seen]
+    connection.executemany(f"DELETE FROM {FEATURE_TABLE} WHERE fid = ?", removed)
+    counts["deleted"] = len(removed)
+    return counts
+
+
+def _sync_enrichment(connection: sqlite3.Connection, records: list[dict]) -> int:
+    # A few hundred rows, so the records and their links are simply rewritten.
+    connection.execute(f"DELETE FROM {MAPPING_TABLE}")
+    connection.execute(f"DELETE FROM {ENRICHMENT_TABLE}")
+    placeholders = ", ".join("?" for _ in ENRICHMENT_COLUMNS)
+    connection.executemany(
+        f"INSERT INTO {ENRICHMENT_TABLE} ({', '.join(ENRICHMENT_COLUMNS)}) VALUES ({placeholders})",
+        [
+            (
+                str(record.get("checkpointId") or "").strip(),
+                str(record.get("kind") or "").strip(),
+                record.get("title"),
+                record.get("summary"),
+                record.get("sourceId"),
+                record.get("sourceTitle"),
+                record.get("confidence"),
+                json.dumps(record.get("tags") or [], ensure_ascii=False),
+                json.dumps(record, ensure_ascii=False),
+            )
+            for record in records
+            if isinstance(record, dict)
+        ],
+    )
+    connection.execute(
+        f"INSERT INTO {MAPPING_TABLE} (base_id, related_id) "
+        f"SELECT c.fid, e.id FROM {ENRICHMENT_TABLE} e "
+        f"JOIN {FEATURE_TABLE} c ON c.checkpoint_id = e.checkpoint_id"
+    )
+    return connection.execute(f"SELECT COUNT(*) FROM {ENRICHMENT_TABLE}").fetchone()[0]
+
+
+def write_geopackage(
+    path: Path,
+    geojson: dict,
+    enrichment_payload: dict | None,
+    *,
+    dataset_version: str,
+    enrichment_fingerprint: str | None = None,
+) -> dict:
+    """Bring the GeoPackage at ``path`` up to date and return what changed."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    features = geojson.get("features") or []
+    columns = feature_columns(features)
+    rebuild = None
+    connection = open_geopackage(path) if path.exists() else None
+
+    try:
+        meta = _stored_meta(connection) if connection is not None else None
+        if meta is None or meta.get("columns") != columns:
+            # A new or dropped property changes the table layout, so the file is rebuilt aside.
+            if connection is not None:
+                connection.close()
+            rebuild = _rebuild_path(path)
+            rebuild.unlink(missing_ok=True)
+            connection = open_geopackage(rebuild)
+            meta = None
+
+        if meta and meta.get("datasetVersion") == dataset_version and (
+            meta.get("enrichmentFingerprint") == enrichment_fingerprint
+        ):
+            return {"status": "current", "datasetVersion": dataset_version}
+
+        with connection:
+            if meta is None:
+                _create(connection, columns)
+                meta = {}
+            counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+            if meta.get("datasetVersion") != dataset_version:
+                counts = _sync_checkpoints(connection, features, columns)
+            records = _sync_enrichment(connection, (enrichment_payload or {}).get("records") or [])
+
+            # The R*Tree holds float32 bounds, so the exact extent comes from the geometries.
+            extent = connection.execute(
+                f"SELECT MIN(ST_MinX({GEOMETRY_COLUMN})), MIN(ST_MinY({GEOMETRY_COLUMN})), "
+                f"MAX(ST_MaxX({GEOMETRY_COLUMN})), MAX(ST_MaxY({GEOMETRY_COLUMN})) FROM {FEATURE_TABLE}"
+            ).fetchone()
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            connection.execute(
+                "UPDATE gpkg_contents SET last_change = ?, min_x = ?, min_y = ?, max_x = ?, max_y = ? "
+                "WHERE table_name = ?",
+                (now, *extent, FEATURE_TABLE),
+            )
+            connection.execute(
+                "UPDATE gpkg_contents SET last_change = ? WHERE table_name IN (?, ?)",
+                (now, ENRICHMENT_TABLE, MAPPING_TABLE),
+            )
+            connection.executemany(
+                f"INSERT INTO {META_TABLE} (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [
+                    ("datasetVersion", json.dumps(dataset_version)),
+                    ("enrichmentFingerprint", json.dumps(enrichment_fingerprint)),
+                ],
+            )
+        connection.close()
+        if rebuild is not None:
+            os.replace(rebuild, path)
+            rebuild = None
+    finally:
+        if connection is not None:
+            connection.close()
+        if rebuild is not None:
+            rebuild.unlink(missing_ok=True)
+
+    return {"status": "written", "datasetVersion": dataset_version, "records": records, **counts}
+
+
+def query_bbox(path: Path, bbox: tuple[float, float, float, float], **where) -> list[dict]:
+    """Checkpoint rows inside ``bbox``, found through the R*Tree, whose columns equal ``where``."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    conditions = "".join(f" AND c.{_quote(name)} = ?" for name in where)
+    connection = open_geopackage(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(
+            f"SELECT c.* FROM {FEATURE_TABLE} c JOIN {RTREE_TABLE} r ON r.id = c.fid "
+            f"WHERE r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ?{conditions} ORDER BY c.fid",
+            (max_lon, min_lon, max_lat, min_lat, *where.values()),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [{key: row[key] for key in row.keys() if key != GEOMETRY_COLUMN} for row in rows]
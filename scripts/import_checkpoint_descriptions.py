@@ -1,18 +1,41 @@
-"""Import checkpoint descriptions from the local deep research markdown report."""
+"""Import checkpoint descriptions from local deep research markdown reports."""
 
 from __future__ import annotations
 
 import argparse
+import io
 import json
+import os
 import re
 import unicodedata
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from enrichment_store import STORE_PATH, EnrichmentStore, open_store, record_key
+
 
 DEFAULT_GENERATED_AT = "2026-04-19T00:00:00.000Z"
 DESCRIPTION_SOURCE_ID = "deep-research-report"
 DESCRIPTION_TITLE = "Описание КПП"
 DESCRIPTION_SOURCE_TITLE = "Deep research report: карточки КПП"
+REPORT_GLOB = "*.md"
+CONFIDENCE_RANK = {"low": 1, "medium": 2, "high": 3}
+CARD_SECTION_START = "## Карточки КПП"
+CARD_SECTION_END = "## Примечание по экспорту"
+REPORT_MARKUP = re.compile(r"\ue200(?:entity\ue202(?P<entity>\[.*?\])|cite\ue202[^\ue201]+)\ue201")
+MAX_RETRIEVED_CANDIDATES = 20
+CONTEXT_STEM_LENGTH = 5
+CONTEXT_STOPWORDS = {"область", "край", "республика", "автономный", "автономная", "округ", "город"}
+NAME_WEIGHT = 0.8
+SUBJECT_WEIGHT = 0.1
+COUNTRY_WEIGHT = 0.05
+AUTO_WEIGHT = 0.05
+LOOSE_NAME_SCORE = 0.85
+FUZZY_MIN_SIMILARITY = 0.85
+FUZZY_CONTEXT_SIMILARITY = 0.75
+MATCH_MIN_SCORE = 0.6
+MATCH_MIN_MARGIN = 0.04
 
 
 def normalize_text(value: str) -> str:
@@ -28,115 +51,301 @@ def normalize_key(value: str, *, keep_parentheses: bool = True) -> str:
     return normalize_text(re.sub(pattern, " ", normalized))
 
 
+def _entity_text(payload: str) -> str:
+    try:
+        entity = json.loads(payload)
+    except json.JSONDecodeError:
+        return ""
+
+    return str(entity[1]) if len(entity) > 1 else ""
+
+
 def clean_report_markup(text: str) -> str:
-    def entity_replacement(match: re.Match[str]) -> str:
-        try:
-            payload = json.loads(match.group(1))
-        except json.JSONDecodeError:
-            return ""
+    """Replace entity markup with its display name and drop citations in one scan."""
+    pieces: list[str] = []
+    position = 0
 
-        return str(payload[1]) if len(payload) > 1 else ""
+    for match in REPORT_MARKUP.finditer(text):
+        pieces.append(text[position : match.start()])
+        position = match.end()
 
-    text = re.sub(r"\ue200entity\ue202(\[.*?\])\ue201", entity_replacement, text)
-    text = re.sub(r"\s*\ue200cite\ue202[^\ue201]+\ue201", "", text)
-    return normalize_text(text)
+        if match.group("entity") is not None:
+            pieces.append(_entity_text(match.group("entity")))
+            continue
 
+        # A citation takes the whitespace before it along.
+        while pieces and not pieces[-1].strip():
+            pieces.pop()
+        if pieces:
+            pieces[-1] = pieces[-1].rstrip()
 
-def extract_cards(report_text: str) -> list[dict[str, str]]:
-    start_marker = "## Карточки КПП"
-    end_marker = "## Примечание по экспорту"
+    pieces.append(text[position:])
+    return " ".join("".join(pieces).split())
 
-    try:
-        start = report_text.index(start_marker) + len(start_marker)
-        end = report_text.index(end_marker, start)
-    except ValueError as error:
-        raise SystemExit("Report does not contain the expected checkpoint card section.") from error
 
-    cards: list[dict[str, str]] = []
-    section = report_text[start:end]
+def parse_card(block: str) -> dict[str, str] | None:
+    block = normalize_text(block)
+    if not block.startswith("**"):
+        return None
 
-    for block in re.split(r"\n\s*\n", section.strip()):
-        block = normalize_text(block)
-        if not block.startswith("**"):
-            continue
+    name_end = block.find(".**")
+    if name_end == -1:
+        return None
 
-        name_end = block.find(".**")
-        if name_end == -1:
-            continue
+    name = block[2:name_end].strip()
+    summary = clean_report_markup(block[name_end + 3 :])
+    if name and summary:
+        return {"name": name, "summary": summary}
 
-        name = block[2:name_end].strip()
-        summary = clean_report_markup(block[name_end + 3 :])
-        if name and summary:
-            cards.append({"name": name, "summary": summary})
+    return None
 
-    return cards
 
+def iter_cards(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    """Yield cards from the checkpoint card section while reading ``lines``.
 
-def build_feature_index(features: list[dict]) -> tuple[dict[str, list[dict]], dict[str, list[dict]]]:
-    by_full_name: dict[str, list[dict]] = {}
-    by_loose_name: dict[str, list[dict]] = {}
+    Only the current card block is held in memory, so the report can be
+    read straight from an open file of any size.
+    """
+    in_section = False
+    block: list[str] = []
 
-    for feature in features:
-        props = feature.get("properties") or {}
-        item = {
-            "id": str(props.get("checkpoint_id") or props.get("__id") or ""),
-            "name": str(props.get("checkpoint_name") or props.get("__name") or props.get("name") or ""),
-            "type": str(props.get("checkpoint_type") or props.get("__type") or ""),
-            "subject": str(props.get("subject_name") or props.get("__subject") or ""),
-            "country": str(props.get("foreign_country") or props.get("__country") or "")
-        }
+    for line in lines:
+        if not in_section:
+            start = line.find(CARD_SECTION_START)
+            if start == -1:
+                continue
+            in_section = True
+            line = line[start + len(CARD_SECTION_START) :]
+
+        end = line.find(CARD_SECTION_END)
+        if end != -1:
+            block.append(line[:end])
+            break
 
-        if not item["id"] or not item["name"]:
+        if line.strip():
+            block.append(line)
             continue
 
-        by_full_name.setdefault(normalize_key(item["name"]), []).append(item)
-        by_loose_name.setdefault(normalize_key(item["name"], keep_parentheses=False), []).append(item)
+        card = parse_card("".join(block)) if block else None
+        block = []
+        if card:
+            yield card
+    else:
+        raise SystemExit("Report does not contain the expected checkpoint card section.")
+
+    card = parse_card("".join(block)) if block else None
+    if card:
+        yield card
+
+
+def extract_cards(report_text: str) -> list[dict[str, str]]:
+    return list(iter_cards(io.StringIO(report_text)))
+
+
+def read_report_cards(report_path: Path) -> Iterator[dict[str, str]]:
+    """Yield the cards of ``report_path`` as the file is read; the report is never held in full."""
+    with report_path.open(encoding="utf-8") as report:
+        yield from iter_cards(report)
+
 
-    return by_full_name, by_loose_name
+def build_feature_item(feature: dict) -> dict[str, str]:
+    props = feature.get("properties") or {}
+    return {
+        "id": str(props.get("checkpoint_id") or props.get("__id") or ""),
+        "name": str(props.get("checkpoint_name") or props.get("__name") or props.get("name") or ""),
+        "type": str(props.get("checkpoint_type") or props.get("__type") or ""),
+        "subject": str(props.get("subject_name") or props.get("__subject") or ""),
+        "country": str(props.get("foreign_country") or props.get("__country") or "")
+    }
 
 
 def is_auto_checkpoint(feature: dict) -> bool:
     return "авто" in normalize_key(feature["type"])
 
 
-def resolve_ambiguous_match(card: dict[str, str], matches: list[dict]) -> dict | None:
-    name_key = normalize_key(card["name"], keep_parentheses=False)
-    summary_key = normalize_key(card["summary"], keep_parentheses=False)
+def name_trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
 
-    if name_key == "пограничный":
-        if "калининград" in summary_key:
-            return next((item for item in matches if "Калининградская область" in item["subject"]), None)
-        if "приморск" in summary_key:
-            return next((item for item in matches if "Приморский край" in item["subject"]), None)
 
-    return None
+def context_stems(text: str) -> list[str]:
+    # Russian inflects region and country names, so mentions are compared by prefix.
+    return [
+        token[:CONTEXT_STEM_LENGTH]
+        for token in normalize_key(text, keep_parentheses=False).split()
+        if len(token) >= CONTEXT_STEM_LENGTH - 1 and token not in CONTEXT_STOPWORDS
+    ]
+
+
+def mention_weights(text: str) -> dict[str, float]:
+    """Weight of each stem by its first mention; cards name their own region first."""
+    stems = context_stems(text)
+    weights: dict[str, float] = {}
+    for position, stem in enumerate(stems):
+        weights.setdefault(stem, 1 - position / len(stems))
+    return weights
+
+
+def fuzzy_key(value: str) -> str:
+    return normalize_text(normalize_key(value).replace("(", " ").replace(")", " "))
+
+
+def bounded_edit_distance(left: str, right: str, limit: int) -> int:
+    """Levenshtein distance, or ``limit + 1`` once it is known to exceed ``limit``."""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    if len(left) > len(right):
+        left, right = right, left
+
+    previous = list(range(len(left) + 1))
+    for row, right_char in enumerate(right, start=1):
+        current = [row]
+        for column, left_char in enumerate(left, start=1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (left_char != right_char),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return min(previous[-1], limit + 1)
+
+
+class FeatureIndex:
+    """Candidate retrieval and scoring of checkpoints for report cards.
+
+    Exact normalized names are looked up directly; other names retrieve
+    candidates through character trigram postings, which keeps matching
+    close to linear in the number of cards. Candidates are scored by
+    bounded edit distance between names, mentions of their subject and
+    country in the card summary, and a preference for road checkpoints,
+    which the report cards describe.
+    """
+
+    def __init__(self, features: list[dict]):
+        self.items: list[dict] = []
+        self.by_full_name: dict[str, list[int]] = {}
+        self.by_loose_name: dict[str, list[int]] = {}
+        self.postings: dict[str, list[int]] = {}
+        self.trigram_counts: list[int] = []
+
+        for feature in features:
+            item = build_feature_item(feature)
+            if not item["id"] or not item["name"]:
+                continue
+
+            position = len(self.items)
+            loose_key = normalize_key(item["name"], keep_parentheses=False)
+            key = fuzzy_key(item["name"])
+            trigrams = name_trigrams(key)
+            self.items.append(
+                {
+                    **item,
+                    "key": key,
+                    "subjectStems": set(context_stems(item["subject"])),
+                    "countryStems": set(context_stems(item["country"])),
+                }
+            )
+            self.trigram_counts.append(len(trigrams))
+            self.by_full_name.setdefault(normalize_key(item["name"]), []).append(position)
+            self.by_loose_name.setdefault(loose_key, []).append(position)
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(position)
+
+    def retrieve(self, name: str, limit: int = MAX_RETRIEVED_CANDIDATES) -> list[int]:
+        """Positions of items whose names share the most trigrams with ``name``."""
+        trigrams = name_trigrams(fuzzy_key(name))
+        shared: dict[int, int] = {}
+        for trigram in trigrams:
+            for position in self.postings.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        def dice(position: int) -> float:
+            return 2 * shared[position] / (len(trigrams) + self.trigram_counts[position])
+
+        return sorted(shared, key=lambda position: (-dice(position), position))[:limit]
+
+    def rank(self, card: dict[str, str]) -> list[dict]:
+        """Candidates for ``card`` with their scores, best first."""
+        full_key = normalize_key(card["name"])
+        loose_key = normalize_key(card["name"], keep_parentheses=False)
+        key = fuzzy_key(card["name"])
+        mentions = mention_weights(card["summary"])
+        exact = set(self.by_full_name.get(full_key, []))
+        loose = set(self.by_loose_name.get(loose_key, []))
+        limit = max(1, int(len(key) * (1 - FUZZY_CONTEXT_SIMILARITY)))
+        candidates = exact or loose.union(self.retrieve(card["name"]))
+        ranked = []
+
+        for position in sorted(candidates):
+            item = self.items[position]
+            context = (
+                SUBJECT_WEIGHT * max((mentions.get(stem, 0.0) for stem in item["subjectStems"]), default=0.0)
+                + COUNTRY_WEIGHT * max((mentions.get(stem, 0.0) for stem in item["countryStems"]), default=0.0)
+            )
+            method = "exact"
+            if position in exact:
+                name_score = 1.0
+            else:
+                distance = bounded_edit_distance(key, item["key"], limit)
+                similarity = 1 - distance / max(len(key), len(item["key"])) if distance <= limit else 0.0
+                # Near misses on short names need the summary to mention their region.
+                if similarity < (FUZZY_MIN_SIMILARITY if not context else FUZZY_CONTEXT_SIMILARITY):
+                    similarity = 0.0
+                # A name that only matches without its parenthesized part is
+                # worth less than a near miss on the full name.
+                name_score = max(similarity, LOOSE_NAME_SCORE if position in loose else 0.0)
+                if not name_score:
+                    continue
+                if name_score == similarity:
+                    method = "fuzzy"
+
+            score = NAME_WEIGHT * name_score + context + AUTO_WEIGHT * is_auto_checkpoint(item)
+            ranked.append({"feature": item, "score": round(score, 3), "method": method})
+
+        return sorted(ranked, key=lambda candidate: -candidate["score"])
+
+    def match(self, card: dict[str, str]) -> tuple[dict | None, list[dict]]:
+        """The confident best candidate for ``card``, if any, and all ranked candidates."""
+        ranked = self.rank(card)
+        if not ranked or ranked[0]["score"] < MATCH_MIN_SCORE:
+            return None, ranked
+        if len(ranked) > 1 and ranked[0]["score"] - ranked[1]["score"] < MATCH_MIN_MARGIN:
+            return None, ranked
+        return ranked[0], ranked
 
 
 def match_cards_to_features(cards: list[dict[str, str]], features: list[dict]) -> tuple[list[dict], list[dict]]:
-    by_full_name, by_loose_name = build_feature_index(features)
+    return match_cards(cards, FeatureIndex(features))
+
+
+def match_cards(cards: Iterable[dict[str, str]], index: FeatureIndex) -> tuple[list[dict], list[dict]]:
+    """Match cards as they are yielded; every card ends up in exactly one of the two lists."""
     matched: list[dict] = []
     skipped: list[dict] = []
 
     for card in cards:
-        full_matches = by_full_name.get(normalize_key(card["name"]), [])
-        loose_matches = by_loose_name.get(normalize_key(card["name"], keep_parentheses=False), [])
-        matches = full_matches or loose_matches
-        auto_matches = [item for item in matches if is_auto_checkpoint(item)]
-        exact_auto_matches = [item for item in full_matches if is_auto_checkpoint(item)]
-        candidates = exact_auto_matches or auto_matches or matches
-
-        if len(candidates) == 1:
-            feature = candidates[0]
-        else:
-            feature = resolve_ambiguous_match(card, candidates)
+        best, ranked = index.match(card)
 
-        if feature:
-            matched.append({"card": card, "feature": feature})
+        if best:
+            matched.append(
+                {
+                    "card": card,
+                    "feature": best["feature"],
+                    "score": best["score"],
+                    "method": best["method"]
+                }
+            )
         else:
             skipped.append(
                 {
                     "name": card["name"],
-                    "candidateIds": [item["id"] for item in candidates]
+                    "candidateIds": [candidate["feature"]["id"] for candidate in ranked],
+                    "candidateScores": [candidate["score"] for candidate in ranked]
                 }
             )
 
@@ -146,7 +355,7 @@ def match_cards_to_features(cards: list[dict[str, str]], features: list[dict]) -
 def build_description_records(matches: list[dict]) -> list[dict]:
     records = []
 
-    for item in sorted(matches, key=lambda match: int(match["feature"]["id"])):
+    for item in sorted(matches, key=lambda match: _natural_key(match["feature"]["id"])):
         records.append(
             {
                 "checkpointId": item["feature"]["id"],
@@ -155,7 +364,7 @@ def build_description_records(matches: list[dict]) -> list[dict]:
                 "summary": item["card"]["summary"],
                 "sourceId": DESCRIPTION_SOURCE_ID,
                 "sourceTitle": DESCRIPTION_SOURCE_TITLE,
-                "confidence": "medium",
+                "confidence": "medium" if item.get("method", "exact") == "exact" else "low",
                 "tags": ["описание", "исследование"]
             }
         )
@@ -163,10 +372,99 @@ def build_description_records(matches: list[dict]) -> list[dict]:
     return records
 
 
-def update_enrichment_payload(payload: dict, records: list[dict], skipped: list[dict], report_path: Path) -> dict:
-    sources = list(payload.get("sources") or [])
-    if not any(source.get("id") == DESCRIPTION_SOURCE_ID for source in sources):
-        sources.append(
+def collect_report_paths(paths: list[Path]) -> list[Path]:
+    """Expand directories to their markdown reports; the result is sorted and unique."""
+    reports = set()
+
+    for path in paths:
+        if path.is_dir():
+            reports.update(path.glob(REPORT_GLOB))
+        elif path.exists():
+            reports.add(path)
+        else:
+            raise SystemExit(f"Report not found: {path}")
+
+    if not reports:
+        raise SystemExit("No markdown reports found.")
+
+    return sorted(reports)
+
+
+_worker_index: FeatureIndex | None = None
+
+
+def _init_worker(features: list[dict]) -> None:
+    # Each worker builds the index once instead of receiving it with every report.
+    global _worker_index
+    _worker_index = FeatureIndex(features)
+
+
+def import_report(report_path: Path, index: FeatureIndex | None = None) -> dict:
+    """Parse and match one report; the result only holds plain data for the merge."""
+    matches, skipped = match_cards(read_report_cards(report_path), index or _worker_index)
+
+    return {
+        "source": report_path.name,
+        "cards": len(matches) + len(skipped),
+        "fuzzyMatches": sum(match["method"] == "fuzzy" for match in matches),
+        "records": build_description_records(matches),
+        "skipped": [{**item, "source": report_path.name} for item in skipped]
+    }
+
+
+def import_reports(report_paths: list[Path], features: list[dict], *, jobs: int = 1) -> list[dict]:
+    """Import reports in a process pool; results keep the order of ``report_paths``."""
+    if jobs <= 1 or len(report_paths) <= 1:
+        index = FeatureIndex(features)
+        return [import_report(path, index) for path in report_paths]
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(report_paths)),
+        initializer=_init_worker,
+        initargs=(features,),
+    ) as pool:
+        return list(pool.map(import_report, report_paths))
+
+
+def _natural_key(value: str) -> tuple:
+    # "9" < "10" < "K-2"; works for any id, including empty or non-numeric ones.
+    return tuple((0, int(part), "") if part.isdecimal() else (1, 0, part) for part in re.split(r"(\d+)", value) if part)
+
+
+def merge_report_records(results: list[dict]) -> list[dict]:
+    """One record per (checkpointId, kind, sourceId) across all reports.
+
+    Conflicts go to the higher confidence, then to the report that sorts
+    last by name. File times are not used: after a checkout they only record
+    when the checkout happened, so the merge would differ between machines.
+    """
+    chosen: dict[tuple[str, str, str], tuple[tuple, dict]] = {}
+
+    for result in results:
+        for record in result["records"]:
+            rank = (CONFIDENCE_RANK.get(record.get("confidence"), 0), result["source"])
+            key = record_key(record)
+            if key not in chosen or rank > chosen[key][0]:
+                chosen[key] = (rank, record)
+
+    return [
+        record
+        for _, (_, record) in sorted(
+            chosen.items(), key=lambda item: (_natural_key(item[0][0]), item[0][1:])
+        )
+    ]
+
+
+def apply_import(store: EnrichmentStore, records: list[dict], skipped: list[dict], reports: list[dict]) -> None:
+    """Replace the imported descriptions in the store and record the import summary.
+
+    Every stored description from the research source is deleted in the
+    same transaction that writes the new batch, so a card that now matches a
+    different checkpoint leaves nothing behind. Records of other kinds and
+    sources are left untouched.
+    """
+    if not any(source.get("id") == DESCRIPTION_SOURCE_ID for source in store.sources()):
+        store.upsert_source(
             {
                 "id": DESCRIPTION_SOURCE_ID,
                 "title": DESCRIPTION_SOURCE_TITLE,
@@ -175,61 +473,75 @@ def update_enrichment_payload(payload: dict, records: list[dict], skipped: list[
             }
         )
 
-    existing_records = [
-        record
-        for record in payload.get("records", [])
-        if not (record.get("kind") == "description" and record.get("sourceId") == DESCRIPTION_SOURCE_ID)
-    ]
-
-    return {
-        "schemaVersion": int(payload.get("schemaVersion") or 1),
-        "generatedAt": DEFAULT_GENERATED_AT,
-        "description": (
+    store.replace_records(records, kind="description", source_id=DESCRIPTION_SOURCE_ID)
+    store.set_meta(
+        schemaVersion=int(store.meta().get("schemaVersion") or 1),
+        generatedAt=DEFAULT_GENERATED_AT,
+        description=(
             "Verified per-checkpoint enrichment records. Includes local research descriptions "
-            "extracted from the deep research markdown report."
+            "extracted from deep research markdown reports."
         ),
-        "sources": sources,
-        "importSummary": {
-            "source": report_path.name,
+        importSummary={
+            "source": ", ".join(report["source"] for report in reports),
+            "reports": [
+                {
+                    "source": report["source"],
+                    "cards": report["cards"],
+                    "matchedDescriptions": len(report["records"])
+                }
+                for report in reports
+            ],
             "matchedDescriptions": len(records),
             "skippedDescriptions": skipped
-        },
-        "records": [*existing_records, *records]
-    }
+        }
+    )
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--report",
-        default=r"C:\Users\ARSENII\Downloads\deep-research-report.md",
-        help="Path to the markdown deep research report."
+        type=Path,
+        nargs="+",
+        action="extend",
+        required=True,
+        help="Markdown deep research reports, or directories of them; may be repeated."
     )
     parser.add_argument("--geojson", default="data/checkpoints.geojson")
     parser.add_argument("--enrichment", default="data/checkpoint_enrichment.json")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=STORE_PATH,
+        help="SQLite enrichment store; reloaded from --enrichment when that file has changed."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for parsing and matching reports; 1 imports in this process."
+    )
     args = parser.parse_args()
 
-    report_path = Path(args.report)
+    report_paths = collect_report_paths(args.report)
     geojson_path = Path(args.geojson)
     enrichment_path = Path(args.enrichment)
 
-    report_text = report_path.read_text(encoding="utf-8")
     geojson = json.loads(geojson_path.read_text(encoding="utf-8"))
-    payload = json.loads(enrichment_path.read_text(encoding="utf-8"))
 
-    cards = extract_cards(report_text)
-    matches, skipped = match_cards_to_features(cards, geojson.get("features", []))
-    records = build_description_records(matches)
-    next_payload = update_enrichment_payload(payload, records, skipped, report_path)
+    reports = import_reports(report_paths, geojson.get("features", []), jobs=args.jobs)
+    records = merge_report_records(reports)
+    skipped = [item for report in reports for item in report["skipped"]]
 
-    enrichment_path.write_text(
-        json.dumps(next_payload, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8"
-    )
+    with open_store(enrichment_path, args.store) as store:
+        apply_import(store, records, skipped, reports)
+        store.export_json(enrichment_path)
 
+    cards = sum(report["cards"] for report in reports)
+    fuzzy = sum(report["fuzzyMatches"] for report in reports)
     print(
-        f"Imported {len(records)} checkpoint descriptions from {len(cards)} report cards; "
-        f"skipped {len(skipped)}."
+        f"Imported {len(records)} checkpoint descriptions from {cards} cards in {len(reports)} reports "
+        f"({fuzzy} by fuzzy name match, recorded with low confidence); skipped {len(skipped)}."
     )
     if skipped:
         print("Skipped cards were recorded in importSummary.")
@@ -0,0 +1,387 @@
+"""Concurrent load test for the data server.
+
+Each virtual client keeps one HTTP/1.1 keep-alive connection and sends
+requests drawn from a weighted mix until the duration runs out, pausing for
+the think time between responses:
+
+- ``cold``: no validators and no compression, like a first visit with an
+  empty cache.
+- ``conditional``: ``If-None-Match`` with the ETag seen while priming, like a
+  repeat visit that revalidates.
+- ``compressed``: ``Accept-Encoding: gzip, br`` without validators.
+
+Latencies run from sending the request to reading the last body byte, or to
+the failure. The report holds p50/p95/p99, a latency histogram, throughput,
+status counts and error rates, both overall and per request kind. Every
+completed request counts towards the percentiles and the histogram, errors
+included; ``successLatencyMs`` repeats the percentiles for 2xx/3xx responses
+only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+SCHEMA_VERSION = 1
+DEFAULT_PATHS = ("/data/checkpoints.geojson", "/", "/app.js", "/style.css")
+DEFAULT_MIX = {"cold": 1, "conditional": 3, "compressed": 2}
+REQUEST_KINDS = ("cold", "conditional", "compressed")
+REQUEST_TIMEOUT_SECONDS = 30
+# Upper bounds of the latency histogram buckets, in milliseconds.
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+SERVER_SCRIPT = Path(__file__).with_name("data_server.py")
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        kind, separator, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS or not separator or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(
+                f"Mix entries look like kind=weight with kind in {', '.join(REQUEST_KINDS)}."
+            )
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("At least one request kind needs a positive weight.")
+    return mix
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def latency_summary(ordered: list[float]) -> dict:
+    return {
+        "p50": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99": round(percentile(ordered, 0.99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+    }
+
+
+class Stats:
+    """Latencies, statuses and byte counts for one request kind or the total."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.success_latencies: list[float] = []
+        self.statuses: dict[str, int] = {}
+        self.errors = 0
+        self.bytes = 0
+
+    def record(self, latency: float, status: int | None, body_bytes: int) -> None:
+        key = str(status) if status is not None else "error"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.latencies.append(latency)
+        self.bytes += body_bytes
+        if status is None or status >= 400:
+            self.errors += 1
+        else:
+            self.success_latencies.append(latency)
+
+    def summary(self, seconds: float) -> dict:
+        ordered = sorted(self.latencies)
+        requests = sum(self.statuses.values())
+        histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for latency in ordered:
+            milliseconds = latency * 1000
+            bucket = next(
+                (index for index, bound in enumerate(HISTOGRAM_BOUNDS_MS) if milliseconds <= bound),
+                len(HISTOGRAM_BOUNDS_MS),
+            )
+            histogram[bucket] += 1
+
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "errorRate": round(self.errors / requests, 6) if requests else 0.0,
+            "requestsPerSecond": round(requests / seconds, 2) if seconds else 0.0,
+            "bytesPerSecond": round(self.bytes / seconds) if seconds else 0,
+            "latencyMs": latency_summary(ordered),
+            "successLatencyMs": latency_summary(sorted(self.success_latencies)),
+            "histogram": [
+                {"leMs": bound, "count": count}
+                for bound, count in zip((*HISTOGRAM_BOUNDS_MS, None), histogram)
+            ],
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection that reads Content-Length framed responses."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def request(self, path: str, headers: dict[str, str]) -> tuple[int, dict[str, str], int]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "User-Agent: load-test"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ")[1])
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+        if status == 304 or "content-length" not in response_headers:
+            length = 0
+        else:
+            length = int(response_headers["content-length"])
+            await self.reader.readexactly(length)
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, length
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+def request_headers(kind: str, etag: str | None) -> dict[str, str]:
+    if kind == "compressed":
+        return {"Accept-Encoding": "gzip, br"}
+    if kind == "conditional":
+        headers = {"Accept-Encoding": "gzip, br"}
+        if etag:
+            headers["If-None-Match"] = etag
+        return headers
+    return {}
+
+
+async def prime_etags(host: str, port: int, paths) -> dict[str, str]:
+    """ETags of the compressed representations, as a returning browser would hold them."""
+    connection = Connection(host, port)
+    etags = {}
+    try:
+        for path in paths:
+            _, headers, _ = await connection.request(path, request_headers("compressed", None))
+            if "etag" in headers:
+                etags[path] = headers["etag"]
+    finally:
+        await connection.close()
+    return etags
+
+
+async def run_load_test(
+    base_url: str,
+    *,
+    paths=DEFAULT_PATHS,
+    concurrency: int = 8,
+    duration: float = 10.0,
+    think_time: float = 0.0,
+    mix: dict[str, int] | None = None,
+    seed: int = 0,
+) -> dict:
+    """Drive ``concurrency`` clients against ``base_url`` for ``duration`` seconds and report."""
+    target = urlsplit(base_url)
+    host, port = target.hostname or "127.0.0.1", target.port or 80
+    mix = {kind: weight for kind, weight in (mix or DEFAULT_MIX).items() if weight > 0}
+    kinds, weights = list(mix), list(mix.values())
+    paths = list(paths)
+    etags = await prime_etags(host, port, paths)
+    totals = Stats()
+    by_kind = {kind: Stats() for kind in kinds}
+
+    async def client(number: int, deadline: float) -> None:
+        rng = random.Random(seed * 1_000_003 + number)
+        connection = Connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                path = rng.choice(paths)
+                started = time.perf_counter()
+                try:
+                    status, _, length = await asyncio.wait_for(
+                        connection.request(path, request_headers(kind, etags.get(path))),
+                        REQUEST_TIMEOUT_SECONDS,
+                    )
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                    status, length = None, 0
+                    await connection.close()
+                latency = time.perf_counter() - started
+                totals.record(latency, status, length)
+                by_kind[kind].record(latency, status, length)
+                if think_time > 0:
+                    # Uniform jitter around the mean keeps clients from marching in lockstep.
+                    await asyncio.sleep(rng.uniform(0, 2 * think_time))
+        finally:
+            await connection.close()
+
+    started_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(number, deadline) for number in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "target": base_url,
+        "startedAt": started_at,
+        "seconds": round(seconds, 3),
+        "config": {
+            "paths": paths,
+            "concurrency": concurrency,
+            "duration": duration,
+            "thinkTime": think_time,
+            "mix": mix,
+            "seed": seed,
+        },
+        "totals": totals.summary(seconds),
+        "byKind": {kind: stats.summary(seconds) for kind, stats in by_kind.items()},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 10.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Data server exited with code {process.returncode} before accepting connections.")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.05)
+            continue
+        writer.close()
+        return
+    raise SystemExit(f"Data server did not accept connections on port {port} within {timeout:.0f}s.")
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['target']}: {report['config']['concurrency']} clients for {report['seconds']:.1f}s")
+    print(
+        f"{'kind':<12} {'requests':>9} {'req/s':>9} {'MiB/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for kind, summary in [*report["byKind"].items(), ("total", report["totals"])]:
+        latency = summary["latencyMs"]
+        print(
+            f"{kind:<12} {summary['requests']:>9} {summary['requestsPerSecond']:>9.1f} "
+            f"{summary['bytesPerSecond'] / 1_048_576:>8.2f} {latency['p50']:>8.2f} {latency['p95']:>8.2f} "
+            f"{latency['p99']:>8.2f} {summary['errorRate']:>7.2%}"
+        )
+
+
+async def _run(args) -> dict:
+    process = None
+    base_url = args.url
+    if args.start_server:
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, str(SERVER_SCRIPT), "--root", str(args.root), "--port", str(port), "--quiet"],
+            stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        if process is not None:
+            await _wait_for_port(port, process)
+        return await run_load_test(
+            base_url,
+            paths=args.path or DEFAULT_PATHS,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            think_time=args.think_time,
+            mix=args.mix,
+            seed=args.seed,
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Load test the data server with a mix of cold, conditional and compressed requests."
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000.")
+    target.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Start scripts/data_server.py on a free local port.",
+    )
+    parser.add_argument("--root", type=Path, default=Path("."), help="Directory the started server serves.")
+    parser.add_argument(
+        "--path",
+        action="append",
+        help="Path to request; may be repeated. Defaults to the app shell and dataset.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent keep-alive clients.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run.")
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Mean pause in seconds between a client's requests.",
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Request kind weights, e.g. cold=1,conditional=3,compressed=2.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file.")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        help="Exit with status 1 when the overall error rate is above this fraction.",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.duration <= 0 or args.think_time < 0:
+        parser.error("--concurrency must be positive, --duration positive and --think-time non-negative.")
+
+    report = asyncio.run(_run(args))
+    print_report(report)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+    if args.max_error_rate is not None and report["totals"]["errorRate"] > args.max_error_rate:
+        print(f"Error rate {report['totals']['errorRate']:.2%} is above {args.max_error_rate:.2%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Shared state for pipeline steps that run in one Python process."""
+
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+
+from pipeline_metrics import Profiler
+from pipeline_validation import build_dataset_snapshot
+
+_MISSING = object()
+
+
+class PipelineContext:
+    """Parsed documents, snapshots and validation results reused across steps.
+
+    Steps still read and write their files, so every step also works on its
+    own; the context only saves re-reading, re-parsing and re-hashing data an
+    earlier step in the same run already holds in memory. Access is locked
+    because independent steps may run on parallel threads.
+    """
+
+    def __init__(self, profiler: Profiler | None = None):
+        self.documents: dict[str, object] = {}
+        self.validation: dict[str, object] = {}
+        self.profiler = profiler or Profiler.from_environment()
+        self._snapshot_source = None
+        self._snapshot = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return Path(path).as_posix()
+
+    def load_json(self, path: Path, default=_MISSING):
+        key = self._key(path)
+
+        with self._lock:
+            if key not in self.documents:
+                if not Path(path).exists() and default is not _MISSING:
+                    return default
+                self.documents[key] = json.loads(Path(path).read_text(encoding="utf-8"))
+
+            return self.documents[key]
+
+    def remember(self, path: Path, payload) -> None:
+        with self._lock:
+            self.documents[self._key(path)] = payload
+
+    def forget(self, path: Path) -> None:
+        with self._lock:
+            self.documents.pop(self._key(path), None)
+
+    def phase(self, name: str):
+        if self.profiler is None:
+            return nullcontext({})
+
+        return self.profiler.phase(name)
+
+    def dataset_snapshot(self, geojson: dict) -> dict:
+        features = geojson.get("features") or []
+
+        with self._lock:
+            if self._snapshot_source is not features:
+                self._snapshot = build_dataset_snapshot(features)
+                self._snapshot_source = features
+
+            return self._snapshot
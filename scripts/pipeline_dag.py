@@ -0,0 +1,227 @@
+"""Content-hash scheduling for pipeline steps declared with inputs and outputs."""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+CACHE_SCHEMA_VERSION = 1
+CACHE_PATH = Path("data/.pipeline_cache.json")
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def file_hash(path: Path) -> str | None:
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _local_imports(script: Path, scripts_dir: Path = SCRIPTS_DIR) -> set[Path]:
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    names = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+
+    return {
+        scripts_dir / f"{name}.py"
+        for name in names
+        if (scripts_dir / f"{name}.py").exists()
+    }
+
+
+def code_hash(script: Path, scripts_dir: Path = SCRIPTS_DIR) -> str:
+    """Hash ``script`` and every local module it imports, directly or transitively."""
+    scripts_dir = Path(scripts_dir).resolve()
+    pending = [(scripts_dir / Path(script).name).resolve()]
+    seen: set[Path] = set()
+
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        pending.extend(_local_imports(current, scripts_dir) - seen)
+
+    digest = hashlib.sha256()
+    for path in sorted(seen):
+        # Line endings are normalized so CRLF checkouts hash the same.
+        source_hash = hashlib.sha256(path.read_bytes().replace(b"\r\n", b"\n")).hexdigest()
+        digest.update(f"{path.name}\t{source_hash}\n".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def step_dependencies(steps: list[dict]) -> dict[str, set[str]]:
+    producers = {
+        Path(output).as_posix(): step["name"]
+        for step in steps
+        for output in step["outputs"]
+    }
+
+    return {
+        step["name"]: {
+            producers[Path(item).as_posix()]
+            for item in step["inputs"]
+            if Path(item).as_posix() in producers and producers[Path(item).as_posix()] != step["name"]
+        }
+        for step in steps
+    }
+
+
+def select_steps(steps: list[dict], *, only=None, start=None) -> list[str]:
+    names = [step["name"] for step in steps]
+    requested = set(only or []) | ({start} if start else set())
+    unknown = sorted(requested - set(names))
+    if unknown:
+        raise ValueError("Unknown pipeline steps: " + ", ".join(unknown))
+
+    if only:
+        return [name for name in names if name in set(only)]
+
+    if not start:
+        return names
+
+    dependencies = step_dependencies(steps)
+    selected = {start}
+
+    for name in names:
+        if dependencies[name] & selected:
+            selected.add(name)
+
+    return [name for name in names if name in selected]
+
+
+def load_cache(path: Path = CACHE_PATH) -> dict:
+    if not path.exists():
+        return {"schemaVersion": CACHE_SCHEMA_VERSION, "steps": {}}
+
+    cache = json.loads(path.read_text(encoding="utf-8"))
+    if cache.get("schemaVersion") != CACHE_SCHEMA_VERSION:
+        return {"schemaVersion": CACHE_SCHEMA_VERSION, "steps": {}}
+
+    return cache
+
+
+def save_cache(cache: dict, path: Path = CACHE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cache, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def step_state(step: dict) -> dict:
+    return {
+        "inputs": {Path(item).as_posix(): file_hash(item) for item in step["inputs"]},
+        "code": code_hash(step["script"]),
+    }
+
+
+def is_step_current(step: dict, cached: dict | None, state: dict) -> bool:
+    # Steps without inputs read from outside the repository and always run.
+    if not step["inputs"] or not cached:
+        return False
+
+    if cached.get("inputs") != state["inputs"] or cached.get("code") != state["code"]:
+        return False
+
+    recorded_outputs = cached.get("outputs") or {}
+    return all(
+        Path(output).exists()
+        and recorded_outputs.get(Path(output).as_posix()) == file_hash(output)
+        for output in step["outputs"]
+    )
+
+
+def run_dag(
+    steps: list[dict],
+    runner,
+    *,
+    selected: list[str],
+    forced: set[str] | None = None,
+    cache: dict | None = None,
+    cache_path: Path | None = CACHE_PATH,
+    jobs: int | None = None,
+) -> dict[str, str]:
+    """Run the selected steps in dependency order, in parallel where possible.
+
+    ``runner(step)`` returns a process-style exit code. The returned mapping
+    holds ``ran``, ``cached``, ``failed`` or ``blocked`` for each selected step.
+    """
+    by_name = {step["name"]: step for step in steps}
+    dependencies = step_dependencies(steps)
+    selected_set = set(selected)
+    forced = forced or set()
+    if cache is None:
+        cache = load_cache(cache_path) if cache_path else {"steps": {}}
+    cached_steps = cache.setdefault("steps", {})
+    results: dict[str, str] = {}
+    lock = threading.Lock()
+
+    def execute(name: str) -> str:
+        step = by_name[name]
+        state = step_state(step)
+
+        if name not in forced and is_step_current(step, cached_steps.get(name), state):
+            print(f"=== {step['title']} === up to date, skipped.\n")
+            return "cached"
+
+        if runner(step) != 0:
+            return "failed"
+
+        with lock:
+            cached_steps[name] = {
+                **state,
+                "outputs": {Path(output).as_posix(): file_hash(output) for output in step["outputs"]},
+            }
+            if cache_path:
+                save_cache(cache, cache_path)
+
+        return "ran"
+
+    pending = [name for name in selected if name in by_name]
+    running = {}
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=jobs or max(len(pending), 1)) as executor:
+        while pending or running:
+            ready = [
+                name
+                for name in pending
+                if not failed
+                and all(
+                    results.get(dependency) in {"ran", "cached"}
+                    for dependency in dependencies[name]
+                    if dependency in selected_set
+                )
+            ]
+
+            for name in ready:
+                pending.remove(name)
+                running[executor.submit(execute, name)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                failed = failed or results[name] == "failed"
+
+    for name in pending:
+        results[name] = "blocked"
+
+    return results
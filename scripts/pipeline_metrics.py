@@ -0,0 +1,258 @@
+"""Timing, memory and throughput metrics for pipeline steps and their phases.
+
+Memory is measured per step. ``tracemallocPeakBytes`` is the peak of Python
+allocations inside the step (in-process mode, and per phase in both modes).
+``peakRssBytes`` is the peak resident set size of the step's own subprocess
+and is recorded in subprocess mode only. In-process steps share one process
+whose RSS peak cannot be reset, so they record ``processPeakRssBytes``
+instead: the running maximum of the whole pipeline run up to that step.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import pstats
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCHEMA_VERSION = 2
+METRICS_PATH = Path("data/pipeline_metrics.json")
+PHASES_ENV = "PIPELINE_PHASES_PATH"
+MAX_RECORDED_RUNS = 50
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+SPEEDSCOPE_MIN_WEIGHT = 1e-6
+SPEEDSCOPE_MAX_DEPTH = 128
+
+
+def _maxrss_bytes(usage) -> int:
+    # Linux reports kilobytes, macOS reports bytes.
+    return usage.ru_maxrss if os.uname().sysname == "Darwin" else usage.ru_maxrss * 1024
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak RSS of this process so far; never decreases between steps."""
+    if resource is None:
+        return None
+
+    return _maxrss_bytes(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def run_child(command: list[str], env=None) -> tuple[int, int | None]:
+    """Run ``command`` and return its exit code and the peak RSS of that child alone."""
+    process = subprocess.Popen(command, env=env)
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, _maxrss_bytes(usage)
+
+
+def children_cpu_seconds() -> float:
+    if resource is None:
+        return 0.0
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _file_size(path: Path) -> int:
+    path = Path(path)
+    return path.stat().st_size if path.exists() else 0
+
+
+class Profiler:
+    """Collects named phase measurements inside one pipeline step."""
+
+    def __init__(self):
+        self.phases: list[dict] = []
+
+    @classmethod
+    def from_environment(cls):
+        # Steps launched in subprocess mode report their phases through a file.
+        path = os.environ.get(PHASES_ENV)
+        if not path:
+            return None
+
+        profiler = cls()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        atexit.register(profiler.dump, Path(path))
+        return profiler
+
+    @contextmanager
+    def phase(self, name: str):
+        record = {"name": name}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+
+        try:
+            yield record
+        finally:
+            record["wallSeconds"] = round(time.perf_counter() - wall_start, 6)
+            record["cpuSeconds"] = round(time.thread_time() - cpu_start, 6)
+            if tracing:
+                record["tracemallocPeakBytes"] = tracemalloc.get_traced_memory()[1]
+            if record.get("rows") and record["wallSeconds"]:
+                record["rowsPerSecond"] = round(record["rows"] / record["wallSeconds"], 1)
+            self.phases.append(record)
+
+    def dump(self, path: Path) -> None:
+        path.write_text(json.dumps(self.phases), encoding="utf-8")
+
+
+@contextmanager
+def measure_step(step: dict, *, in_process: bool):
+    """Measure one step; the yielded record is filled in when the block exits.
+
+    In subprocess mode the caller adds ``peakRssBytes`` from :func:`run_child`.
+    """
+    record = {"name": step["name"], "title": step["title"]}
+    tracing = in_process and tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    bytes_read = sum(_file_size(item) for item in step["inputs"])
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time() if in_process else children_cpu_seconds()
+
+    try:
+        yield record
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu_end = time.thread_time() if in_process else children_cpu_seconds()
+        record["wallSeconds"] = round(wall, 6)
+        record["cpuSeconds"] = round(cpu_end - cpu_start, 6)
+        if in_process:
+            record["processPeakRssBytes"] = peak_rss_bytes()
+        if tracing:
+            record["tracemallocPeakBytes"] = tracemalloc.get_traced_memory()[1]
+        record["bytesRead"] = bytes_read
+        record["bytesWritten"] = sum(_file_size(item) for item in step["outputs"])
+
+        phases = record.setdefault("phases", [])
+        rows = max((phase.get("rows") or 0 for phase in phases), default=0)
+        if rows:
+            record["rows"] = rows
+            record["rowsPerSecond"] = round(rows / wall, 1) if wall else None
+
+
+def write_metrics(run: dict, path: Path = METRICS_PATH) -> dict:
+    payload = {"schemaVersion": SCHEMA_VERSION, "runs": []}
+    if path.exists():
+        existing = json.loads(path.read_text(encoding="utf-8"))
+        if existing.get("schemaVersion") == SCHEMA_VERSION:
+            payload = existing
+
+    payload["runs"] = [run, *payload.get("runs", [])][:MAX_RECORDED_RUNS]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return payload
+
+
+def new_run(mode: str) -> dict:
+    return {
+        "startedAt": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "mode": mode,
+        "steps": [],
+    }
+
+
+def _frame_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def pstats_to_speedscope(stats: pstats.Stats, name: str) -> dict:
+    """Convert cProfile statistics to a speedscope sampled profile.
+
+    cProfile only keeps caller/callee pairs, so call paths are reconstructed
+    by splitting each function's cumulative time across its callers, as
+    flame graph converters for pstats do.
+    """
+    raw = stats.stats
+    frames: list[dict] = []
+    frame_index: dict = {}
+    callees: dict = {}
+
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    def index_of(func) -> int:
+        if func not in frame_index:
+            frame_index[func] = len(frames)
+            filename, line, _ = func
+            frames.append({"name": _frame_name(func), "file": filename, "line": line})
+        return frame_index[func]
+
+    samples: list[list[int]] = []
+    weights: list[float] = []
+
+    def visit(func, stack: list[int], path_time: float) -> None:
+        _, _, self_time, cumulative_time, _ = raw[func]
+        share = path_time / cumulative_time if cumulative_time else 0.0
+        stack = [*stack, index_of(func)]
+
+        if self_time * share >= SPEEDSCOPE_MIN_WEIGHT:
+            samples.append(stack)
+            weights.append(self_time * share)
+
+        if len(stack) >= SPEEDSCOPE_MAX_DEPTH:
+            return
+
+        for callee, edge_time in callees.get(func, []):
+            child_time = edge_time * share
+            if callee in raw and child_time >= SPEEDSCOPE_MIN_WEIGHT and index_of(callee) not in stack:
+                visit(callee, stack, child_time)
+
+    roots = [func for func, values in raw.items() if not values[4]]
+    for root in sorted(roots):
+        visit(root, [], raw[root][3])
+
+    total = sum(weights)
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "russia-border-checkpoints-map pipeline_metrics",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def write_speedscope(profile_path: Path, output_path: Path, name: str) -> Path:
+    stats = pstats.Stats(str(profile_path))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(pstats_to_speedscope(stats, name)), encoding="utf-8")
+    return output_path
@@ -1,4 +1,5 @@
 import hashlib
+import json
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
@@ -7,6 +8,8 @@ UNKNOWN_LABEL = "\u041d\u0435 \u0443\u043a\u0430\u0437\u0430\u043d\u043e"
 ALLOWED_CONFIDENCE_LEVELS = {"high", "medium", "low"}
 CHECKPOINT_TYPE_MARKER = "\u043f\u0443\u043d\u043a\u0442 \u043f\u0440\u043e\u043f\u0443\u0441\u043a\u0430"
 FUTURE_DATE_TOLERANCE = timedelta(days=1)
+FEATURE_HASH_LENGTH = 16
+MERKLE_SCHEMA_VERSION = 1
 
 try:
     from tqdm import tqdm as _tqdm
@@ -163,9 +166,273 @@ def _validate_changelog_snapshot(snapshot, context):
     _validate_count_map(snapshot.get("byStatus"), total, f"{context} snapshot byStatus")
     _validate_count_map(snapshot.get("byType"), total, f"{context} snapshot byType")
 
+    merkle_root = snapshot.get("merkleRoot")
+    if merkle_root is not None and (not isinstance(merkle_root, str) or len(merkle_root) != 64):
+        raise ValidationError(f"{context} snapshot merkleRoot must be a SHA-256 hex digest.")
+
+    feature_hashes = snapshot.get("featureHashes")
+    if feature_hashes is None:
+        return
+
+    if not isinstance(feature_hashes, dict):
+        raise ValidationError(f"{context} snapshot featureHashes must be an object.")
+
+    if list(feature_hashes) != cleaned_ids:
+        raise ValidationError(f"{context} snapshot featureHashes keys must match ids.")
+
+    invalid_hashes = [
+        checkpoint_id
+        for checkpoint_id, value in feature_hashes.items()
+        if not isinstance(value, str) or len(value) != FEATURE_HASH_LENGTH
+    ]
+    if invalid_hashes:
+        raise ValidationError(
+            f"{context} snapshot featureHashes contains invalid hashes: "
+            + _preview(invalid_hashes)
+        )
+
+
+def _validate_modified_checkpoints(changes, previous_snapshot, snapshot, context):
+    modified = changes.get("modifiedCheckpoints")
+    if modified is None:
+        return
+
+    if not isinstance(modified, list) or any(not isinstance(item, dict) for item in modified):
+        raise ValidationError(f"{context} changes.modifiedCheckpoints must be a list of objects.")
+
+    modified_ids = [_clean(item.get("id")) for item in modified]
+    expected_ids = _changed_feature_ids(
+        (previous_snapshot or {}).get("featureHashes") or {},
+        snapshot.get("featureHashes") or {},
+    )
+
+    if modified_ids != expected_ids:
+        raise ValidationError(
+            f"{context} changes.modifiedCheckpoints does not match snapshot featureHashes."
+        )
+
+    invalid_fields = [
+        checkpoint_id
+        for checkpoint_id, item in zip(modified_ids, modified)
+        if "fields" in item and not isinstance(item["fields"], dict)
+    ]
+    if invalid_fields:
+        raise ValidationError(
+            f"{context} changes.modifiedCheckpoints fields must be objects: "
+            + _preview(invalid_fields)
+        )
+
+
+def build_feature_hash(feature):
+    properties = feature.get("properties") or {}
+    coordinates = (feature.get("geometry") or {}).get("coordinates") or []
+    canonical = json.dumps(
+        {"coordinates": coordinates, "properties": properties},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:FEATURE_HASH_LENGTH]
+
+
+def _changed_feature_ids(previous_hashes, current_hashes):
+    return sorted(
+        checkpoint_id
+        for checkpoint_id, feature_hash in current_hashes.items()
+        if checkpoint_id in previous_hashes and previous_hashes[checkpoint_id] != feature_hash
+    )
+
+
+def _hash_children(children):
+    lines = "\n".join(f"{name}\t{child_hash}" for name, child_hash in children)
+    return hashlib.sha256(lines.encode("utf-8")).hexdigest()
+
+
+def _merkle_group(properties, key):
+    return _clean(properties.get(key)) or UNKNOWN_LABEL
+
+
+def _build_merkle_tree(features, hashes_by_id):
+    grouped = {}
+
+    for feature in features:
+        checkpoint_id = _feature_id(feature)
+        if not checkpoint_id:
+            continue
+
+        properties = feature.get("properties") or {}
+        district = _merkle_group(properties, "federal_district")
+        subject = _merkle_group(properties, "subject_name")
+        grouped.setdefault(district, {}).setdefault(subject, {})[checkpoint_id] = (
+            hashes_by_id[checkpoint_id]
+        )
+
+    districts = {}
+
+    for district in sorted(grouped):
+        subjects = {}
+
+        for subject in sorted(grouped[district]):
+            checkpoints = dict(sorted(grouped[district][subject].items()))
+            subjects[subject] = {
+                "hash": _hash_children(checkpoints.items()),
+                "checkpoints": checkpoints,
+            }
+
+        districts[district] = {
+            "hash": _hash_children((name, node["hash"]) for name, node in subjects.items()),
+            "subjects": subjects,
+        }
+
+    return {
+        "root": _hash_children((name, node["hash"]) for name, node in districts.items()),
+        "districts": districts,
+    }
+
+
+def build_dataset_merkle_tree(features, *, dataset_version=None, feature_hashes=None):
+    hashes_by_id = feature_hashes or {
+        _feature_id(feature): build_feature_hash(feature)
+        for feature in features
+        if _feature_id(feature)
+    }
+    tree = {"schemaVersion": MERKLE_SCHEMA_VERSION}
+
+    if dataset_version:
+        tree["datasetVersion"] = dataset_version
+
+    tree.update(_build_merkle_tree(features, hashes_by_id))
+    return tree
+
+
+def _diff_hash_maps(previous, current):
+    return {
+        "added": sorted(set(current) - set(previous)),
+        "removed": sorted(set(previous) - set(current)),
+        "changed": sorted(
+            name for name in set(previous) & set(current) if previous[name] != current[name]
+        ),
+    }
+
+
+def diff_dataset_merkle_trees(previous_tree, current_tree):
+    diff = {
+        "rootChanged": (previous_tree or {}).get("root") != current_tree.get("root"),
+        "districts": [],
+        "subjects": [],
+        "checkpoints": {"added": [], "removed": [], "modified": []},
+    }
+
+    if not diff["rootChanged"]:
+        return diff
+
+    previous_districts = (previous_tree or {}).get("districts") or {}
+    current_districts = current_tree.get("districts") or {}
+    district_diff = _diff_hash_maps(
+        {name: node["hash"] for name, node in previous_districts.items()},
+        {name: node["hash"] for name, node in current_districts.items()},
+    )
+    changed_districts = sorted(
+        district_diff["added"] + district_diff["removed"] + district_diff["changed"]
+    )
+    diff["districts"] = changed_districts
+
+    previous_checkpoints = {}
+    current_checkpoints = {}
+
+    for district in changed_districts:
+        previous_subjects = (previous_districts.get(district) or {}).get("subjects") or {}
+        current_subjects = (current_districts.get(district) or {}).get("subjects") or {}
+        subject_diff = _diff_hash_maps(
+            {name: node["hash"] for name, node in previous_subjects.items()},
+            {name: node["hash"] for name, node in current_subjects.items()},
+        )
+
+        for subject in sorted(
+            subject_diff["added"] + subject_diff["removed"] + subject_diff["changed"]
+        ):
+            diff["subjects"].append([district, subject])
+            previous_checkpoints.update(
+                (previous_subjects.get(subject) or {}).get("checkpoints") or {}
+            )
+            current_checkpoints.update(
+                (current_subjects.get(subject) or {}).get("checkpoints") or {}
+            )
+
+    # A checkpoint that moved between subjects shows up as removed in one
+    # subtree and added in another; pairing them here reports it as modified.
+    checkpoint_diff = _diff_hash_maps(previous_checkpoints, current_checkpoints)
+    diff["checkpoints"] = {
+        "added": checkpoint_diff["added"],
+        "removed": checkpoint_diff["removed"],
+        "modified": checkpoint_diff["changed"],
+    }
+
+    return diff
+
+
+def validate_dataset_merkle_tree(tree, geojson=None):
+    if not isinstance(tree, dict):
+        raise ValidationError("Dataset Merkle tree must be a JSON object.")
+
+    if tree.get("schemaVersion") != MERKLE_SCHEMA_VERSION:
+        raise ValidationError(
+            f"Dataset Merkle tree schemaVersion must be {MERKLE_SCHEMA_VERSION}."
+        )
+
+    districts = tree.get("districts")
+    if not isinstance(districts, dict):
+        raise ValidationError("Dataset Merkle tree districts must be an object.")
+
+    checkpoint_count = 0
+
+    for district, district_node in districts.items():
+        subjects = (district_node or {}).get("subjects")
+        if not isinstance(subjects, dict):
+            raise ValidationError(f"Dataset Merkle tree district {district} has no subjects.")
+
+        for subject, subject_node in subjects.items():
+            checkpoints = (subject_node or {}).get("checkpoints")
+            if not isinstance(checkpoints, dict):
+                raise ValidationError(
+                    f"Dataset Merkle tree subject {subject} has no checkpoints."
+                )
+
+            checkpoint_count += len(checkpoints)
+            if subject_node.get("hash") != _hash_children(checkpoints.items()):
+                raise ValidationError(
+                    f"Dataset Merkle tree subject hash does not match leaves: {subject}"
+                )
+
+        expected_hash = _hash_children((name, node["hash"]) for name, node in subjects.items())
+        if district_node.get("hash") != expected_hash:
+            raise ValidationError(
+                f"Dataset Merkle tree district hash does not match subjects: {district}"
+            )
+
+    expected_root = _hash_children((name, node["hash"]) for name, node in districts.items())
+    if tree.get("root") != expected_root:
+        raise ValidationError("Dataset Merkle tree root does not match districts.")
+
+    if geojson is not None:
+        features = geojson.get("features") if isinstance(geojson, dict) else None
+        if not isinstance(features, list):
+            raise ValidationError("GeoJSON input for Merkle tree validation is missing features.")
+
+        if tree.get("root") != build_dataset_merkle_tree(features)["root"]:
+            raise ValidationError("Dataset Merkle tree root does not match current GeoJSON.")
+
+    return checkpoint_count
+
 
 def build_dataset_snapshot(features):
     ids = sorted({_feature_id(feature) for feature in features if _feature_id(feature)})
+    hashes_by_id = {
+        _feature_id(feature): build_feature_hash(feature)
+        for feature in features
+        if _feature_id(feature)
+    }
     latest_updated_at = max(
         (
             _clean((feature.get("properties") or {}).get("last_updated"))
@@ -182,12 +449,16 @@ def build_dataset_snapshot(features):
         "latestUpdatedAt": latest_updated_at or None,
         "byStatus": _count_features_by(features, "status"),
         "byType": _count_features_by(features, "checkpoint_type"),
+        "featureHashes": {checkpoint_id: hashes_by_id[checkpoint_id] for checkpoint_id in ids},
+        "merkleRoot": _build_merkle_tree(features, hashes_by_id)["root"],
     }
 
 
 def build_dataset_version(snapshot):
     date_part = (snapshot["latestUpdatedAt"] or "unknown-date")[:10]
-    return f"{date_part}-{snapshot['total']}-{snapshot['idsHash'][:8]}"
+    # Snapshots recorded before content hashing only identify the id set.
+    content_hash = snapshot.get("merkleRoot") or snapshot["idsHash"]
+    return f"{date_part}-{snapshot['total']}-{content_hash[:8]}"
 
 
 def summarize_dataset_changes(previous_snapshot, current_snapshot):
@@ -200,13 +471,92 @@ def summarize_dataset_changes(previous_snapshot, current_snapshot):
 
     previous_ids = set(previous_snapshot.get("ids") or [])
     current_ids = set(current_snapshot.get("ids") or [])
-
-    return {
+    changes = {
         "totalDelta": current_snapshot["total"] - int(previous_snapshot.get("total") or 0),
         "added": len(current_ids - previous_ids),
         "removed": len(previous_ids - current_ids),
     }
 
+    previous_hashes = previous_snapshot.get("featureHashes")
+    current_hashes = current_snapshot.get("featureHashes")
+    if isinstance(previous_hashes, dict) and isinstance(current_hashes, dict):
+        changes["modified"] = len(_changed_feature_ids(previous_hashes, current_hashes))
+
+    return changes
+
+
+def _field_changes(previous_feature, current_feature):
+    previous_properties = previous_feature.get("properties") or {}
+    current_properties = current_feature.get("properties") or {}
+    fields = {}
+
+    for field_name in sorted(set(previous_properties) | set(current_properties)):
+        old_value = previous_properties.get(field_name)
+        new_value = current_properties.get(field_name)
+        if old_value != new_value:
+            fields[field_name] = {"old": old_value, "new": new_value}
+
+    old_coordinates = (previous_feature.get("geometry") or {}).get("coordinates")
+    new_coordinates = (current_feature.get("geometry") or {}).get("coordinates")
+    if old_coordinates != new_coordinates:
+        fields["coordinates"] = {"old": old_coordinates, "new": new_coordinates}
+
+    return fields
+
+
+def diff_dataset_features(
+    previous_snapshot,
+    current_snapshot,
+    previous_features=None,
+    current_features=None,
+):
+    previous_snapshot = previous_snapshot or {}
+    previous_ids = set(previous_snapshot.get("ids") or [])
+    current_ids = set(current_snapshot.get("ids") or [])
+    previous_hashes = previous_snapshot.get("featureHashes")
+    current_hashes = current_snapshot.get("featureHashes")
+    diff = {
+        "added": sorted(current_ids - previous_ids),
+        "removed": sorted(previous_ids - current_ids),
+        "modified": [],
+    }
+
+    if not isinstance(previous_hashes, dict) or not isinstance(current_hashes, dict):
+        return diff
+
+    changed_ids = _changed_feature_ids(previous_hashes, current_hashes)
+    if not changed_ids:
+        return diff
+
+    wanted_ids = set(changed_ids)
+    previous_by_id = {
+        _feature_id(feature): feature
+        for feature in previous_features or []
+        if _feature_id(feature) in wanted_ids
+    }
+    current_by_id = {
+        _feature_id(feature): feature
+        for feature in current_features or []
+        if _feature_id(feature) in wanted_ids
+    }
+
+    for checkpoint_id in changed_ids:
+        item = {"id": checkpoint_id}
+        previous_feature = previous_by_id.get(checkpoint_id)
+        current_feature = current_by_id.get(checkpoint_id)
+
+        # A stale previous file must not report old values it cannot vouch for.
+        if (
+            previous_feature is not None
+            and current_feature is not None
+            and build_feature_hash(previous_feature) == previous_hashes[checkpoint_id]
+        ):
+            item["fields"] = _field_changes(previous_feature, current_feature)
+
+        diff["modified"].append(item)
+
+    return diff
+
 
 def normalize_longitude(coordinate):
     if -180 <= coordinate <= 180:
@@ -471,7 +821,7 @@ def validate_geojson(geojson):
     return len(features)
 
 
-def validate_dataset_changelog(changelog, geojson=None):
+def validate_dataset_changelog(changelog, geojson=None, *, current_snapshot=None):
     if not isinstance(changelog, dict):
         raise ValidationError("Dataset changelog must be a JSON object.")
 
@@ -526,12 +876,14 @@ def validate_dataset_changelog(changelog, geojson=None):
         expected_changes = summarize_dataset_changes(previous_snapshot, snapshot)
 
         for field_name, expected_value in expected_changes.items():
-            if changes[field_name] != expected_value:
+            if changes.get(field_name) != expected_value:
                 raise ValidationError(
                     f"{context} changes.{field_name} does not match snapshots: "
-                    f"expected {expected_value}, got {changes[field_name]}"
+                    f"expected {expected_value}, got {changes.get(field_name)}"
                 )
 
+        _validate_modified_checkpoints(changes, previous_snapshot, snapshot, context)
+
     if geojson is not None:
         if not isinstance(geojson, dict):
             raise ValidationError("GeoJSON input for changelog validation must be an object.")
@@ -540,7 +892,7 @@ def validate_dataset_changelog(changelog, geojson=None):
         if not isinstance(features, list):
             raise ValidationError("GeoJSON input for changelog validation is missing features.")
 
-        current_snapshot = build_dataset_snapshot(features)
+        current_snapshot = current_snapshot or build_dataset_snapshot(features)
         current_entry = entries[0]
 
         if current_entry.get("snapshot") != current_snapshot:
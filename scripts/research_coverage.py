@@ -1,31 +1,102 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from collections import Counter
 from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
 from urllib.parse import urlparse
 
+from coverage_cube import DIMENSIONS, CoverageCube
+from enrichment_store import EnrichmentStore
+from pipeline_dag import code_hash
 from pipeline_validation import build_dataset_snapshot, build_dataset_version
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 2
+QUEUE_PAGE_SIZE = 100
+QUEUE_PAGES_DIR = Path("data/research_coverage")
 UNKNOWN_LABEL = "Не указано"
 DESCRIPTION_KIND = "description"
 VERIFICATION_KIND = "official_verification"
+FEATURE_COVERAGE_FIELDS = (
+    "source",
+    "lastUpdated",
+    "coordinates",
+    "address",
+    "workingTime",
+    "operationalStatus",
+    "neighborCheckpoint",
+    "transportCorridor",
+    "branchContact",
+)
+REPORT_STEP_SCRIPT = Path(__file__).resolve().parent / "05_write_research_coverage_report.py"
+WORKING_TIME_INDEX = FEATURE_COVERAGE_FIELDS.index("workingTime")
+UNIQUE_ID_MEASURES = ("described", "withEvents", "officialVerification")
+CUBE_MEASURES = ("total", *UNIQUE_ID_MEASURES, "qualityIssues", *FEATURE_COVERAGE_FIELDS)
+REPORT_GROUPS = {
+    "byCountry": "country",
+    "bySubject": "subject",
+    "byType": "type",
+}
 
 
 def _clean(value) -> str:
     return str(value or "").strip()
 
 
-def _is_http_url(value) -> bool:
-    parsed = urlparse(_clean(value))
+def _text_file_hash(path: Path) -> str:
+    # Line endings are normalized so CRLF checkouts fingerprint the same.
+    return hashlib.sha256(Path(path).read_bytes().replace(b"\r\n", b"\n")).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def report_code_version() -> str:
+    # The whole import closure of the report step, so cube, store and dataset version changes count too.
+    return code_hash(REPORT_STEP_SCRIPT)[:16]
+
+
+def build_input_fingerprint(geojson_path: Path, enrichment_path: Path) -> dict:
+    """Identify the input files and report code a report is built from."""
+    return {
+        "geojson": _text_file_hash(geojson_path),
+        "enrichment": _text_file_hash(enrichment_path),
+        "code": report_code_version(),
+    }
+
+
+def check_input_fingerprint(report: dict, input_fingerprint: dict) -> None:
+    fingerprint = report.get("inputFingerprint") if isinstance(report, dict) else None
+    stale = [
+        name
+        for name, value in input_fingerprint.items()
+        if not isinstance(fingerprint, dict) or fingerprint.get(name) != value
+    ]
+
+    if stale:
+        raise ValueError(
+            "Research coverage report is stale; inputFingerprint differs for: " + ", ".join(stale)
+        )
+
+
+@lru_cache(maxsize=1024)
+def _is_http_url_text(text: str) -> bool:
+    parsed = urlparse(text)
     return parsed.scheme in {"http", "https"} and bool(parsed.netloc)
 
 
+def _is_http_url(value) -> bool:
+    # Sources repeat the same few URLs, so parsed results are cached by text.
+    return _is_http_url_text(_clean(value))
+
+
 def _pick(properties: dict, *keys: str) -> str:
     for key in keys:
-        value = _clean(properties.get(key))
+        value = properties.get(key)
         if value:
-            return value
+            value = str(value).strip()
+            if value:
+                return value
     return ""
 
 
@@ -72,45 +143,65 @@ def _coverage_item(covered: int, total: int) -> dict:
 
 
 def _build_enrichment_index(payload: dict) -> dict:
-    records = payload.get("records") if isinstance(payload, dict) else []
-    by_checkpoint: dict[str, list[dict]] = {}
+    records = list((payload.get("records") if isinstance(payload, dict) else None) or [])
+    described_ids = set()
+    event_ids = set()
+    verification_ids = set()
+    source_counts: Counter[str] = Counter()
+    description_records = 0
+    verification_records = 0
+
+    for record in records:
+        kind = _clean(record.get("kind"))
+        description_records += kind == DESCRIPTION_KIND
+        verification_records += kind == VERIFICATION_KIND
+        source_counts[_clean(record.get("sourceId")) or _clean(record.get("sourceTitle")) or UNKNOWN_LABEL] += 1
 
-    for record in records or []:
         checkpoint_id = _clean(record.get("checkpointId") or record.get("checkpoint_id"))
         if not checkpoint_id:
             continue
-        by_checkpoint.setdefault(checkpoint_id, []).append(record)
 
-    described_ids = {
-        checkpoint_id
-        for checkpoint_id, items in by_checkpoint.items()
-        if any(_clean(item.get("kind")) == DESCRIPTION_KIND and _clean(item.get("summary")) for item in items)
-    }
-    verification_ids = {
-        checkpoint_id
-        for checkpoint_id, items in by_checkpoint.items()
-        if any(_clean(item.get("kind")) == VERIFICATION_KIND for item in items)
-    }
-    event_ids = {
-        checkpoint_id
-        for checkpoint_id, items in by_checkpoint.items()
-        if any(_clean(item.get("kind")) != DESCRIPTION_KIND for item in items)
-    }
+        if kind == DESCRIPTION_KIND:
+            if _clean(record.get("summary")):
+                described_ids.add(checkpoint_id)
+        else:
+            event_ids.add(checkpoint_id)
+            if kind == VERIFICATION_KIND:
+                verification_ids.add(checkpoint_id)
 
     return {
-        "records": list(records or []),
-        "byCheckpointId": by_checkpoint,
         "describedIds": described_ids,
         "eventIds": event_ids,
         "verificationIds": verification_ids,
+        "recordCount": len(records),
+        "descriptionRecordCount": description_records,
+        "eventRecordCount": len(records) - description_records,
+        "verificationRecordCount": verification_records,
+        "sourceCounts": source_counts,
     }
 
 
-def _quality_issues(feature: dict) -> list[str]:
-    properties = feature.get("properties") or {}
+def build_enrichment_index_from_store(store: EnrichmentStore) -> dict:
+    """The same index as built from the JSON payload, answered by indexed queries."""
+    record_count = store.count()
+    description_records = store.count(kind=DESCRIPTION_KIND)
+
+    return {
+        "describedIds": store.checkpoint_ids(kind=DESCRIPTION_KIND, with_summary=True),
+        "eventIds": store.checkpoint_ids(exclude_kind=DESCRIPTION_KIND),
+        "verificationIds": store.checkpoint_ids(kind=VERIFICATION_KIND),
+        "recordCount": record_count,
+        "descriptionRecordCount": description_records,
+        "eventRecordCount": record_count - description_records,
+        "verificationRecordCount": store.count(kind=VERIFICATION_KIND),
+        "sourceCounts": store.source_counts(unknown_label=UNKNOWN_LABEL),
+    }
+
+
+def _quality_issues(properties: dict, *, has_source: bool, has_coordinates: bool) -> list[str]:
     issues = []
 
-    if not _is_http_url(_pick(properties, "source", "source_url", "url", "href")):
+    if not has_source:
         issues.append("missing_source")
 
     if not _pick(properties, "last_updated", "updated_at", "date_updated"):
@@ -119,39 +210,48 @@ def _quality_issues(feature: dict) -> list[str]:
     if not _pick(properties, "is_functional", "condition", "current_status", "operational_status"):
         issues.append("missing_operational_status")
 
-    if not _has_coordinates(feature):
+    if not has_coordinates:
         issues.append("missing_coordinates")
 
     return issues
 
 
-def _task_entry(feature: dict, *, reason: str, issues: list[str] | None = None) -> dict:
-    entry = {
-        **_feature_label(feature),
-        "reason": reason,
-    }
-
-    if issues:
-        entry["issues"] = issues
-
-    return entry
-
+def _feature_facts(feature: dict, enrichment: dict, dimensions: tuple[str, ...]) -> dict:
+    """Everything the report needs to know about one feature, computed once."""
+    properties = feature.get("properties") or {}
+    checkpoint_id = _feature_id(feature)
+    has_source = _is_http_url(_pick(properties, "source", "source_url", "url", "href"))
+    has_coordinates = _has_coordinates(feature)
 
-def _coverage_by(features: list[dict], key: str, described_ids: set[str], event_ids: set[str]) -> list[dict]:
-    buckets: dict[str, list[dict]] = {}
+    return {
+        "id": checkpoint_id,
+        "described": checkpoint_id in enrichment["describedIds"],
+        "withEvents": checkpoint_id in enrichment["eventIds"],
+        "officialVerification": checkpoint_id in enrichment["verificationIds"],
+        "issues": _quality_issues(properties, has_source=has_source, has_coordinates=has_coordinates),
+        # Same order as FEATURE_COVERAGE_FIELDS.
+        "covered": (
+            has_source,
+            bool(_pick(properties, "last_updated", "updated_at")),
+            has_coordinates,
+            bool(_pick(properties, "address", "checkpoint_address")),
+            bool(_pick(properties, "working_time", "work_time")),
+            bool(_pick(properties, "is_functional", "condition", "current_status")),
+            bool(_pick(properties, "foreign_checkpoint", "neighbor_checkpoint")),
+            bool(_pick(properties, "transport_corridor")),
+            _has_branch_contact(properties),
+        ),
+        "labels": tuple(_pick(properties, DIMENSIONS[name]) or UNKNOWN_LABEL for name in dimensions),
+    }
 
-    for feature in features:
-        properties = feature.get("properties") or {}
-        value = _pick(properties, key) or UNKNOWN_LABEL
-        buckets.setdefault(value, []).append(feature)
 
+def _group_rows(cube: CoverageCube, dimension: str) -> list[dict]:
     rows = []
-    for label, bucket_features in buckets.items():
-        ids = {_feature_id(feature) for feature in bucket_features}
-        described = len(ids & described_ids)
-        with_events = len(ids & event_ids)
-        quality_issues = sum(1 for feature in bucket_features if _quality_issues(feature))
-        total = len(bucket_features)
+
+    for (label,), measures in cube.rollup([dimension]).items():
+        total = measures["total"]
+        described = measures["described"]
+        with_events = measures["withEvents"]
 
         rows.append(
             {
@@ -161,7 +261,7 @@ def _coverage_by(features: list[dict], key: str, described_ids: set[str], event_
                 "missingDescriptions": total - described,
                 "withEvents": with_events,
                 "missingEvents": total - with_events,
-                "qualityIssues": quality_issues,
+                "qualityIssues": measures["qualityIssues"],
                 "descriptionPercent": round((described / total) * 100, 1) if total else 0.0,
                 "eventPercent": round((with_events / total) * 100, 1) if total else 0.0,
             }
@@ -170,54 +270,107 @@ def _coverage_by(features: list[dict], key: str, described_ids: set[str], event_
     return sorted(rows, key=lambda item: (-item["missingDescriptions"], -item["total"], item["label"]))
 
 
-def _top_source_ids(records: list[dict]) -> list[dict]:
-    counts = Counter(_clean(record.get("sourceId") or record.get("sourceTitle")) or UNKNOWN_LABEL for record in records)
+def _aggregate_features(features: list[dict], enrichment: dict, dimensions: tuple[str, ...]) -> dict:
+    """Fold per-feature facts into the coverage cube and queues in one pass."""
+    seen_ids: set[str] = set()
+    cube = CoverageCube(dimensions, CUBE_MEASURES)
+    queues: dict[str, list[dict]] = {
+        "missingDescriptions": [],
+        "missingEvents": [],
+        "qualityIssues": [],
+        "missingWorkingTime": [],
+    }
+
+    for feature in features:
+        facts = _feature_facts(feature, enrichment, dimensions)
+        checkpoint_id = facts["id"]
+        issues = facts["issues"]
+
+        # Enrichment coverage counts unique checkpoint ids; other measures count features.
+        first_seen = checkpoint_id not in seen_ids
+        seen_ids.add(checkpoint_id)
+        cube.add(
+            facts["labels"],
+            (
+                1,
+                *(first_seen and facts[name] for name in UNIQUE_ID_MEASURES),
+                bool(issues),
+                *facts["covered"],
+            ),
+        )
 
+        pending = []
+        gaps = len(issues)
+        if not facts["described"]:
+            pending.append(("missingDescriptions", "missing_description"))
+        if not facts["withEvents"]:
+            pending.append(("missingEvents", "missing_events_or_verification"))
+        if issues:
+            pending.append(("qualityIssues", "quality_issue"))
+        if not facts["covered"][WORKING_TIME_INDEX]:
+            pending.append(("missingWorkingTime", "missing_working_time"))
+
+        if pending:
+            label = _feature_label(feature)
+            # A checkpoint with more open gaps is worth researching first.
+            priority = gaps + sum(queue != "qualityIssues" for queue, _ in pending)
+            for queue, reason in pending:
+                entry = {**label, "reason": reason, "priority": priority}
+                if queue == "qualityIssues":
+                    entry["issues"] = issues
+                queues[queue].append(entry)
+
+    for entries in queues.values():
+        entries.sort(key=lambda entry: -entry["priority"])
+
+    return {"cube": cube, "queues": queues}
+
+
+def _top_source_ids(source_counts: dict[str, int]) -> list[dict]:
     return [
         {
             "id": source_id,
             "records": count,
         }
-        for source_id, count in counts.most_common()
+        for source_id, count in sorted(source_counts.items(), key=lambda item: (-item[1], item[0]))
     ]
 
 
-def build_research_coverage_report(
+def build_research_coverage(
     geojson: dict,
     enrichment_payload: dict,
     *,
     generated_at: str | None = None,
-) -> dict:
+    snapshot: dict | None = None,
+    input_fingerprint: dict | None = None,
+    dimensions: tuple[str, ...] = tuple(DIMENSIONS),
+    enrichment_index: dict | None = None,
+) -> tuple[dict, CoverageCube]:
+    """Build the report and the coverage cube it is derived from.
+
+    ``enrichment_index`` may come from ``build_enrichment_index_from_store``;
+    otherwise the records in ``enrichment_payload`` are indexed here.
+    """
+    missing = [name for name in REPORT_GROUPS.values() if name not in dimensions]
+    if missing:
+        raise ValueError("Coverage cube must include report dimensions: " + ", ".join(missing))
+
     features = list(geojson.get("features") or [])
     total = len(features)
-    snapshot = build_dataset_snapshot(features)
-    enrichment = _build_enrichment_index(enrichment_payload)
-    feature_ids = {_feature_id(feature) for feature in features}
-    described_ids = enrichment["describedIds"] & feature_ids
-    event_ids = enrichment["eventIds"] & feature_ids
-    verification_ids = enrichment["verificationIds"] & feature_ids
-    missing_description_features = [
-        feature for feature in features if _feature_id(feature) not in described_ids
-    ]
-    missing_event_features = [feature for feature in features if _feature_id(feature) not in event_ids]
-    quality_issue_features = [
-        (feature, _quality_issues(feature)) for feature in features if _quality_issues(feature)
-    ]
-    records = enrichment["records"]
-    description_records = [
-        record for record in records if _clean(record.get("kind")) == DESCRIPTION_KIND
-    ]
-    event_records = [
-        record for record in records if _clean(record.get("kind")) != DESCRIPTION_KIND
-    ]
-    verification_records = [
-        record for record in records if _clean(record.get("kind")) == VERIFICATION_KIND
-    ]
+    snapshot = snapshot or build_dataset_snapshot(features)
+    enrichment = enrichment_index or _build_enrichment_index(enrichment_payload)
+    aggregate = _aggregate_features(features, enrichment, tuple(dimensions))
+    cube = aggregate["cube"]
+    covered = cube.rollup().get((), dict.fromkeys(cube.measures, 0))
+    described = covered["described"]
+    with_events = covered["withEvents"]
+    verified = covered["officialVerification"]
+    queues = aggregate["queues"]
 
     if not generated_at:
         generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
-    return {
+    report = {
         "schemaVersion": SCHEMA_VERSION,
         "generatedAt": generated_at,
         "datasetVersion": build_dataset_version(snapshot),
@@ -227,97 +380,161 @@ def build_research_coverage_report(
         },
         "summary": {
             "totalCheckpoints": total,
-            "describedCheckpoints": len(described_ids),
-            "missingDescriptionCount": total - len(described_ids),
-            "descriptionCoveragePercent": _coverage_item(len(described_ids), total)["percent"],
-            "withEventCoverage": len(event_ids),
-            "missingEventCoverage": total - len(event_ids),
-            "eventCoveragePercent": _coverage_item(len(event_ids), total)["percent"],
-            "officialVerificationCoverage": len(verification_ids),
-            "qualityIssueCount": len(quality_issue_features),
-            "enrichmentRecordCount": len(records),
-            "descriptionRecordCount": len(description_records),
-            "eventRecordCount": len(event_records),
-            "officialVerificationRecordCount": len(verification_records),
+            "describedCheckpoints": described,
+            "missingDescriptionCount": total - described,
+            "descriptionCoveragePercent": _coverage_item(described, total)["percent"],
+            "withEventCoverage": with_events,
+            "missingEventCoverage": total - with_events,
+            "eventCoveragePercent": _coverage_item(with_events, total)["percent"],
+            "officialVerificationCoverage": verified,
+            "qualityIssueCount": len(queues["qualityIssues"]),
+            "enrichmentRecordCount": enrichment["recordCount"],
+            "descriptionRecordCount": enrichment["descriptionRecordCount"],
+            "eventRecordCount": enrichment["eventRecordCount"],
+            "officialVerificationRecordCount": enrichment["verificationRecordCount"],
         },
         "coverage": {
-            "description": _coverage_item(len(described_ids), total),
-            "eventsOrVerification": _coverage_item(len(event_ids), total),
-            "officialVerification": _coverage_item(len(verification_ids), total),
-            "source": _coverage_item(
-                sum(
-                    1
-                    for feature in features
-                    if _is_http_url(_pick(feature.get("properties") or {}, "source", "source_url", "url", "href"))
-                ),
-                total,
-            ),
-            "lastUpdated": _coverage_item(
-                sum(1 for feature in features if _pick(feature.get("properties") or {}, "last_updated", "updated_at")),
-                total,
-            ),
-            "coordinates": _coverage_item(sum(1 for feature in features if _has_coordinates(feature)), total),
-            "address": _coverage_item(
-                sum(1 for feature in features if _pick(feature.get("properties") or {}, "address", "checkpoint_address")),
-                total,
-            ),
-            "workingTime": _coverage_item(
-                sum(1 for feature in features if _pick(feature.get("properties") or {}, "working_time", "work_time")),
-                total,
-            ),
-            "operationalStatus": _coverage_item(
-                sum(
-                    1
-                    for feature in features
-                    if _pick(feature.get("properties") or {}, "is_functional", "condition", "current_status")
-                ),
-                total,
-            ),
-            "neighborCheckpoint": _coverage_item(
-                sum(
-                    1
-                    for feature in features
-                    if _pick(feature.get("properties") or {}, "foreign_checkpoint", "neighbor_checkpoint")
-                ),
-                total,
-            ),
-            "transportCorridor": _coverage_item(
-                sum(1 for feature in features if _pick(feature.get("properties") or {}, "transport_corridor")),
-                total,
-            ),
-            "branchContact": _coverage_item(
-                sum(1 for feature in features if _has_branch_contact(feature.get("properties") or {})),
-                total,
-            ),
-        },
-        "byCountry": _coverage_by(features, "foreign_country", described_ids, event_ids),
-        "bySubject": _coverage_by(features, "subject_name", described_ids, event_ids),
-        "byType": _coverage_by(features, "checkpoint_type", described_ids, event_ids),
-        "queues": {
-            "missingDescriptions": [
-                _task_entry(feature, reason="missing_description")
-                for feature in missing_description_features
-            ],
-            "missingEvents": [
-                _task_entry(feature, reason="missing_events_or_verification")
-                for feature in missing_event_features
-            ],
-            "qualityIssues": [
-                _task_entry(feature, reason="quality_issue", issues=issues)
-                for feature, issues in quality_issue_features
-            ],
-            "missingWorkingTime": [
-                _task_entry(feature, reason="missing_working_time")
-                for feature in features
-                if not _pick(feature.get("properties") or {}, "working_time", "work_time")
-            ],
+            "description": _coverage_item(described, total),
+            "eventsOrVerification": _coverage_item(with_events, total),
+            "officialVerification": _coverage_item(verified, total),
+            **{name: _coverage_item(covered[name], total) for name in FEATURE_COVERAGE_FIELDS},
         },
-        "enrichmentSources": _top_source_ids(records),
+        **{name: _group_rows(cube, dimension) for name, dimension in REPORT_GROUPS.items()},
+        "queues": queues,
+        "enrichmentSources": _top_source_ids(enrichment["sourceCounts"]),
         "importSummary": enrichment_payload.get("importSummary") or {},
     }
 
+    if input_fingerprint:
+        report = {
+            **{key: report[key] for key in ("schemaVersion", "generatedAt", "datasetVersion", "generatedFrom")},
+            "inputFingerprint": input_fingerprint,
+            **report,
+        }
+
+    return report, cube
+
 
-def validate_research_coverage_report(report: dict, geojson: dict, enrichment_payload: dict) -> int:
+def build_research_coverage_report(
+    geojson: dict,
+    enrichment_payload: dict,
+    *,
+    generated_at: str | None = None,
+    snapshot: dict | None = None,
+    input_fingerprint: dict | None = None,
+) -> dict:
+    report, _ = build_research_coverage(
+        geojson,
+        enrichment_payload,
+        generated_at=generated_at,
+        snapshot=snapshot,
+        input_fingerprint=input_fingerprint,
+    )
+    return report
+
+
+def _serialize(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+
+
+def paginate_research_coverage_report(
+    report: dict,
+    *,
+    page_size: int = QUEUE_PAGE_SIZE,
+    pages_dir: Path = QUEUE_PAGES_DIR,
+) -> tuple[dict, dict[str, str]]:
+    """Split a report into a summary document and serialized queue pages.
+
+    The summary keeps every section except the queue entries, which move to
+    pages of ``page_size`` entries in priority order. ``queuePages`` in the
+    summary lists each page with its entry count and SHA-256, so readers can
+    fetch one page and verify it. Pages are returned by POSIX path.
+    """
+    if page_size < 1:
+        raise ValueError("Queue page size must be positive.")
+
+    directory = Path(pages_dir).as_posix()
+    pages: dict[str, str] = {}
+    index = {"pageSize": page_size, "directory": directory, "queues": {}}
+
+    for queue, entries in (report.get("queues") or {}).items():
+        page_count = (len(entries) + page_size - 1) // page_size
+        listed = []
+
+        for number in range(1, page_count + 1):
+            items = entries[(number - 1) * page_size : number * page_size]
+            path = f"{directory}/{queue}/page-{number:04d}.json"
+            serialized = _serialize(
+                {
+                    "schemaVersion": SCHEMA_VERSION,
+                    "datasetVersion": report.get("datasetVersion"),
+                    "queue": queue,
+                    "page": number,
+                    "pageCount": page_count,
+                    "items": items,
+                }
+            )
+            pages[path] = serialized
+            listed.append(
+                {
+                    "path": path,
+                    "items": len(items),
+                    "maxPriority": items[0].get("priority", 0),
+                    "sha256": hashlib.sha256(serialized.encode("utf-8")).hexdigest(),
+                }
+            )
+
+        index["queues"][queue] = {"items": len(entries), "pageCount": page_count, "pages": listed}
+
+    summary = {key: value for key, value in report.items() if key != "queues"}
+    summary["queuePages"] = index
+    return summary, pages
+
+
+def check_queue_pages(summary: dict, root: Path = Path(".")) -> int:
+    """Check that every page listed in a summary exists and matches its hash."""
+    queues = ((summary.get("queuePages") or {}).get("queues") or {}) if isinstance(summary, dict) else {}
+    checked = 0
+
+    for queue, listing in queues.items():
+        pages = listing.get("pages") or []
+        counted = sum(page.get("items", 0) for page in pages)
+        if len(pages) != listing.get("pageCount") or counted != listing.get("items"):
+            raise ValueError(f"Research coverage {queue} pages do not add up to the queue length.")
+
+        for page in pages:
+            path = Path(root) / page["path"]
+            if not path.exists():
+                raise ValueError(f"Research coverage queue page is missing: {page['path']}")
+            if hashlib.sha256(path.read_bytes()).hexdigest() != page.get("sha256"):
+                raise ValueError(f"Research coverage queue page does not match its hash: {page['path']}")
+            checked += 1
+
+    return checked
+
+
+def _queue_length(report: dict, queue: str) -> int:
+    if "queuePages" in report:
+        return ((report["queuePages"].get("queues") or {}).get(queue) or {}).get("items", 0)
+    return len((report.get("queues") or {}).get(queue) or [])
+
+
+def validate_research_coverage_report(
+    report: dict,
+    geojson: dict,
+    enrichment_payload: dict,
+    *,
+    snapshot: dict | None = None,
+    input_fingerprint: dict | None = None,
+    deep: bool = False,
+) -> int:
+    """Check that a report matches the current inputs.
+
+    ``report`` may be a full report or its paginated summary document.
+    With ``input_fingerprint`` the check compares hashes instead of
+    rebuilding the report. Without it, or with ``deep``, the report is
+    rebuilt and every section except ``generatedAt`` is compared.
+    """
     if not isinstance(report, dict):
         raise ValueError("Research coverage report must be an object.")
 
@@ -327,26 +544,41 @@ def validate_research_coverage_report(report: dict, geojson: dict, enrichment_pa
     features = list(geojson.get("features") or [])
     total = len(features)
     summary = report.get("summary") or {}
-    queues = report.get("queues") or {}
 
     if summary.get("totalCheckpoints") != total:
         raise ValueError("Research coverage totalCheckpoints does not match GeoJSON.")
 
-    if summary.get("missingDescriptionCount") != len(queues.get("missingDescriptions") or []):
+    if summary.get("missingDescriptionCount") != _queue_length(report, "missingDescriptions"):
         raise ValueError("Research coverage missingDescriptions queue does not match summary.")
 
-    if summary.get("missingEventCoverage") != len(queues.get("missingEvents") or []):
+    if summary.get("missingEventCoverage") != _queue_length(report, "missingEvents"):
         raise ValueError("Research coverage missingEvents queue does not match summary.")
 
+    if input_fingerprint:
+        check_input_fingerprint(report, input_fingerprint)
+        if not deep:
+            return total
+
     expected = build_research_coverage_report(
         geojson,
         enrichment_payload,
         generated_at=report.get("generatedAt") or "validation",
+        snapshot=snapshot,
+        input_fingerprint=report.get("inputFingerprint"),
     )
-    expected_summary = dict(expected["summary"])
-    actual_summary = dict(summary)
+    if "queuePages" in report:
+        # Page hashes in the rebuilt index cover the content of every page.
+        expected, _ = paginate_research_coverage_report(
+            expected,
+            page_size=report["queuePages"].get("pageSize") or QUEUE_PAGE_SIZE,
+            pages_dir=report["queuePages"].get("directory") or QUEUE_PAGES_DIR,
+        )
+    mismatched = [key for key in expected if report.get(key) != expected[key]]
 
-    if actual_summary != expected_summary:
-        raise ValueError("Research coverage summary does not match current inputs.")
+    if mismatched:
+        raise ValueError(
+            "Research coverage report does not match a rebuild from current inputs: "
+            + ", ".join(mismatched)
+        )
 
     return total
@@ -1,61 +1,226 @@
-import subprocess
+import argparse
+import cProfile
+import importlib
+import json
+import os
+import shutil
 import sys
+import tempfile
+import tracemalloc
+import traceback
 from datetime import datetime
 from pathlib import Path
 
-GENERATED_FILES = [
-    Path("data/.checkpoints_normalized.json"),
-    Path("data/checkpoints.geojson"),
-    Path("data/data_quality_report.json"),
-    Path("data/research_coverage_report.json"),
-    Path("frontend/data/checkpoints.geojson"),
-]
-INTERMEDIATE_FILES = [Path("data/.checkpoints_normalized.json")]
+from pipeline_context import PipelineContext
+from pipeline_dag import run_dag, select_steps
+from pipeline_metrics import (
+    PHASES_ENV,
+    Profiler,
+    measure_step,
+    new_run,
+    run_child,
+    write_metrics,
+    write_speedscope,
+)
+
+RAW_FILE = Path("raw_data/rosgranstroy_map_data.json")
+NORMALIZED_FILE = Path("data/.checkpoints_normalized.json")
+PUBLISHED_GEOJSON = Path("data/checkpoints.geojson")
+FRONTEND_GEOJSON = Path("frontend/data/checkpoints.geojson")
+PREVIOUS_GEOJSON = Path("data/.checkpoints_previous.geojson")
+ENRICHMENT_FILE = Path("data/checkpoint_enrichment.json")
+INTERMEDIATE_FILES = [PREVIOUS_GEOJSON]
+
+
+def preserve_previous_dataset():
+    # The changelog step diffs field values against the last published GeoJSON.
+    if PUBLISHED_GEOJSON.exists():
+        shutil.copyfile(PUBLISHED_GEOJSON, PREVIOUS_GEOJSON)
+        print(f"Preserved previous dataset: {PREVIOUS_GEOJSON}")
+
 
 PIPELINE_STEPS = [
-    ("STEP 1. Fetch Rosgranstroy data", ["python", "scripts/00_fetch_rosgranstroy.py"]),
-    ("STEP 2. Normalize data to JSON", ["python", "scripts/01_parse_rosgranstroy.py"]),
-    ("STEP 3. Build final GeoJSON", ["python", "scripts/02_build_geojson.py"]),
-    ("STEP 4. Update dataset changelog", ["python", "scripts/03_update_changelog.py"]),
-    ("STEP 5. Write data quality report", ["python", "scripts/04_write_quality_report.py"]),
-    (
-        "STEP 6. Write research coverage report",
-        ["python", "scripts/05_write_research_coverage_report.py"],
-    ),
+    {
+        "name": "fetch",
+        "title": "STEP 1. Fetch Rosgranstroy data",
+        "script": "scripts/00_fetch_rosgranstroy.py",
+        "inputs": [],
+        "outputs": [RAW_FILE],
+    },
+    {
+        "name": "parse",
+        "title": "STEP 2. Normalize data to JSON",
+        "script": "scripts/01_parse_rosgranstroy.py",
+        "inputs": [RAW_FILE],
+        "outputs": [NORMALIZED_FILE],
+    },
+    {
+        "name": "build",
+        "title": "STEP 3. Build final GeoJSON",
+        "script": "scripts/02_build_geojson.py",
+        "inputs": [NORMALIZED_FILE],
+        "outputs": [PUBLISHED_GEOJSON, FRONTEND_GEOJSON],
+        "before": preserve_previous_dataset,
+    },
+    {
+        "name": "changelog",
+        "title": "STEP 4. Update dataset changelog",
+        "script": "scripts/03_update_changelog.py",
+        "inputs": [PUBLISHED_GEOJSON],
+        "outputs": [
+            Path("data/dataset_changelog.json"),
+            Path("data/dataset_merkle_tree.json"),
+            Path("data/checkpoint_history.json"),
+        ],
+    },
+    {
+        "name": "quality",
+        "title": "STEP 5. Write data quality report",
+        "script": "scripts/04_write_quality_report.py",
+        "inputs": [PUBLISHED_GEOJSON],
+        "outputs": [Path("data/data_quality_report.json")],
+    },
+    {
+        "name": "coverage",
+        "title": "STEP 6. Write research coverage report",
+        "script": "scripts/05_write_research_coverage_report.py",
+        "inputs": [PUBLISHED_GEOJSON, ENRICHMENT_FILE],
+        "outputs": [
+            Path("data/research_coverage_report.json"),
+            Path("data/research_coverage_cube.json"),
+        ],
+    },
+    {
+        "name": "exports",
+        "title": "STEP 7. Write dataset exports",
+        "script": "scripts/06_write_exports.py",
+        "inputs": [PUBLISHED_GEOJSON, ENRICHMENT_FILE],
+        "outputs": [
+            Path("data/exports/checkpoints.gpkg"),
+            Path("data/exports/checkpoints.fgb"),
+            Path("data/exports/checkpoints.arrow"),
+            Path("data/exports/checkpoint_enrichment.arrow"),
+        ],
+    },
+    {
+        "name": "release",
+        "title": "STEP 8. Publish dataset release",
+        "script": "scripts/07_publish_release.py",
+        "inputs": [
+            PUBLISHED_GEOJSON,
+            ENRICHMENT_FILE,
+            Path("data/dataset_changelog.json"),
+            Path("data/dataset_merkle_tree.json"),
+            Path("data/checkpoint_history.json"),
+            Path("data/data_quality_report.json"),
+            Path("data/research_coverage_report.json"),
+            Path("data/research_coverage_cube.json"),
+            Path("data/exports/checkpoints.gpkg"),
+            Path("data/exports/checkpoints.fgb"),
+            Path("data/exports/checkpoints.arrow"),
+            Path("data/exports/checkpoint_enrichment.arrow"),
+        ],
+        "outputs": [Path("data/releases/current/manifest.json")],
+    },
+    {
+        "name": "patches",
+        "title": "STEP 9. Write dataset patches",
+        "script": "scripts/08_write_patches.py",
+        # Retained releases are the older versions patches start from.
+        "inputs": [PUBLISHED_GEOJSON, Path("data/releases/current/manifest.json")],
+        "outputs": [Path("data/patches/manifest.json")],
+    },
 ]
+STEP_NAMES = [step["name"] for step in PIPELINE_STEPS]
 
 
-def remove_old_files():
-    print("=== Pipeline cleanup ===")
+def run_step(step, *, phases_path=None, cprofile_path=None, record=None):
+    title = step["title"]
+    command = [sys.executable, step["script"]]
+    if cprofile_path:
+        command[1:1] = ["-m", "cProfile", "-o", str(cprofile_path)]
+    env = None
+    if phases_path:
+        env = {**os.environ, PHASES_ENV: str(phases_path)}
+    print(f"=== {title} ===")
+    print("Command:", " ".join(command))
 
-    removed_any = False
+    returncode, peak_rss = run_child(command, env=env)
+    if record is not None:
+        record["peakRssBytes"] = peak_rss
 
-    for file in GENERATED_FILES:
-        if file.exists():
-            file.unlink()
-            print(f"Removed file: {file}")
-            removed_any = True
-        else:
-            print(f"File not found, skipping: {file}")
+    if returncode != 0:
+        print(f"Pipeline failed on step: {title}")
+        print(f"Exit code: {returncode}")
+        return returncode
+
+    print(f"{title} completed successfully.\n")
+    return 0
 
-    if not removed_any:
-        print("No generated files needed cleanup.")
 
-    print("=== Cleanup completed ===\n")
+def step_module(step):
+    return importlib.import_module(Path(step["script"]).stem)
 
 
-def run_step(title, command):
+def run_step_in_process(step, context, *, cprofile_path=None):
+    title = step["title"]
     print(f"=== {title} ===")
-    print("Command:", " ".join(command))
+    print("Module:", step["script"])
+    profile = cProfile.Profile() if cprofile_path else None
 
-    result = subprocess.run(command)
-
-    if result.returncode != 0:
+    try:
+        if profile:
+            profile.enable()
+        try:
+            step_module(step).run(context)
+        finally:
+            if profile:
+                profile.disable()
+                profile.dump_stats(str(cprofile_path))
+    except Exception:
+        traceback.print_exc()
         print(f"Pipeline failed on step: {title}")
-        print(f"Exit code: {result.returncode}")
-        sys.exit(result.returncode)
+        return 1
 
     print(f"{title} completed successfully.\n")
+    return 0
+
+
+def run_profiled_step(step, context, metrics_run, *, subprocess_mode, cprofile_dir=None):
+    cprofile_path = None
+    if cprofile_dir:
+        Path(cprofile_dir).mkdir(parents=True, exist_ok=True)
+        cprofile_path = Path(cprofile_dir) / f"{step['name']}.prof"
+
+    with measure_step(step, in_process=not subprocess_mode) as record:
+        if subprocess_mode:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                phases_path = Path(temp_dir) / "phases.json"
+                exit_code = run_step(step, phases_path=phases_path, cprofile_path=cprofile_path, record=record)
+                if phases_path.exists():
+                    record["phases"] = json.loads(phases_path.read_text(encoding="utf-8"))
+        else:
+            context.profiler = Profiler()
+            exit_code = run_step_in_process(step, context, cprofile_path=cprofile_path)
+            record["phases"] = context.profiler.phases
+            context.profiler = None
+
+    record["exitCode"] = exit_code
+    metrics_run["steps"].append(record)
+
+    if cprofile_path and cprofile_path.exists():
+        output_path = write_speedscope(
+            cprofile_path,
+            cprofile_path.with_suffix(".speedscope.json"),
+            step["title"],
+        )
+        print(f"Speedscope profile: {output_path}")
+
+    print(
+        f"Profile: {record['wallSeconds']:.3f}s wall, {record['cpuSeconds']:.3f}s CPU, "
+        f"{record.get('rows', 0)} rows\n"
+    )
+    return exit_code
 
 
 def remove_intermediate_files():
@@ -65,23 +230,134 @@ def remove_intermediate_files():
             print(f"Removed intermediate file: {file}")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the checkpoint data pipeline. Steps whose inputs and code are "
+            "unchanged since their last successful run are skipped."
+        )
+    )
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Run every step in its own Python process instead of sharing one context.",
+    )
+    parser.add_argument(
+        "--force",
+        nargs="*",
+        choices=STEP_NAMES,
+        metavar="STEP",
+        help="Re-run these steps even if cached; without names, re-run every selected step.",
+    )
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument(
+        "--only",
+        nargs="+",
+        choices=STEP_NAMES,
+        metavar="STEP",
+        help="Run only these steps.",
+    )
+    selection.add_argument(
+        "--from",
+        dest="start",
+        choices=STEP_NAMES,
+        metavar="STEP",
+        help="Run this step and every step that depends on it.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of steps to run in parallel.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Record time, memory and throughput per step and phase in "
+            "data/pipeline_metrics.json. Steps run one at a time."
+        ),
+    )
+    parser.add_argument(
+        "--cprofile-dir",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="With --profile, also write cProfile and speedscope files per step to DIR.",
+    )
+    args = parser.parse_args(argv)
+    if args.cprofile_dir and not args.profile:
+        parser.error("--cprofile-dir requires --profile")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
     start_time = datetime.now()
+    selected = select_steps(PIPELINE_STEPS, only=args.only, start=args.start)
+    forced = set(selected) if args.force == [] else set(args.force or [])
 
     print("=== Full data update pipeline ===")
     print("Project: russia-border-checkpoints-map")
     print("Started at:", start_time.strftime("%Y-%m-%d %H:%M:%S"))
+    print("Mode:", "subprocess" if args.subprocess else "in-process")
+    print("Steps:", ", ".join(selected), "\n")
 
-    remove_old_files()
+    context = PipelineContext()
+    metrics_run = new_run("subprocess" if args.subprocess else "in-process") if args.profile else None
+    jobs = args.jobs
 
-    for title, command in PIPELINE_STEPS:
-        run_step(title, command)
+    if args.profile:
+        # Phase and memory measurements are process-wide, so steps must not overlap.
+        jobs = 1
+        if not args.subprocess:
+            tracemalloc.start()
+
+    def runner(step):
+        if step.get("before"):
+            step["before"]()
+
+        if metrics_run is not None:
+            return run_profiled_step(
+                step,
+                context,
+                metrics_run,
+                subprocess_mode=args.subprocess,
+                cprofile_dir=args.cprofile_dir,
+            )
+
+        if args.subprocess:
+            return run_step(step)
+
+        return run_step_in_process(step, context)
+
+    results = run_dag(
+        PIPELINE_STEPS,
+        runner,
+        selected=selected,
+        forced=forced,
+        jobs=jobs,
+    )
+
+    if metrics_run is not None:
+        tracemalloc.stop()
+        metrics_run["wallSeconds"] = round((datetime.now() - start_time).total_seconds(), 6)
+        metrics_run["results"] = {name: results.get(name, "blocked") for name in selected}
+        write_metrics(metrics_run)
+        print("Metrics written to data/pipeline_metrics.json")
 
     remove_intermediate_files()
 
     end_time = datetime.now()
     duration = end_time - start_time
 
+    for name in selected:
+        print(f"{name}: {results.get(name, 'blocked')}")
+
+    if any(status in {"failed", "blocked"} for status in results.values()):
+        print("=== Pipeline failed ===")
+        sys.exit(1)
+
     print("=== Pipeline completed ===")
     print("Finished at:", end_time.strftime("%Y-%m-%d %H:%M:%S"))
     print("Duration:", duration)
@@ -0,0 +1,328 @@
+"""Deterministic synthetic Rosgranstroy payloads for scaling benchmarks.
+
+The generated raw payload follows the real ``data.federal_districts ->
+subjects -> checkpoints`` shape, with value frequencies and gaps close to the
+published snapshot: missing working hours, checkpoints without a foreign
+country, placeholder coordinates and longitudes past the antimeridian. The
+vocabulary is fixed here rather than read from ``raw_data`` so benchmark
+inputs do not drift when the dataset is refreshed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+SCALES = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+SOURCE_URL = "https://rosgranstroy.ru/api/map_data"
+CHECKPOINTS_PER_SUBJECT = 100
+
+FEDERAL_DISTRICTS = [
+    (1, "Северо-Западный", ["Мурманская область", "Республика Карелия", "Ленинградская область", "Псковская область"]),
+    (2, "Центральный", ["Брянская область", "Курская область", "Белгородская область", "Москва"]),
+    (3, "Южный", ["Ростовская область", "Астраханская область", "Краснодарский край", "Республика Крым"]),
+    (4, "Северо-Кавказский", ["Республика Дагестан", "Республика Северная Осетия — Алания"]),
+    (5, "Приволжский", ["Оренбургская область", "Самарская область", "Саратовская область"]),
+    (6, "Уральский", ["Челябинская область", "Курганская область", "Тюменская область"]),
+    (7, "Сибирский", ["Алтайский край", "Республика Алтай", "Республика Тыва", "Новосибирская область"]),
+    (8, "Дальневосточный", ["Приморский край", "Хабаровский край", "Амурская область", "Чукотский автономный округ"]),
+]
+DISTRICT_BOUNDS = {
+    1: ((56.0, 69.5), (27.5, 40.0)),
+    2: ((50.0, 56.5), (31.5, 39.5)),
+    3: ((44.0, 48.5), (33.0, 48.0)),
+    4: ((41.2, 44.5), (43.0, 48.5)),
+    5: ((50.5, 54.0), (45.0, 61.0)),
+    6: ((53.5, 58.0), (60.0, 70.0)),
+    7: ((49.5, 54.5), (78.0, 97.0)),
+    8: ((42.5, 66.0), (127.0, 190.0)),
+}
+CHECKPOINT_TYPES = [
+    ("Автомобильный пункт пропуска", 135),
+    ("Воздушный пункт пропуска", 92),
+    ("Железнодорожный пункт пропуска", 70),
+    ("Морской пункт пропуска", 69),
+    ("Смешанный пункт пропуска", 11),
+    ("Речной пункт пропуска", 5),
+    ("Пешеходный пункт пропуска", 2),
+    ("Озерный пункт пропуска", 1),
+]
+STATUSES = [("Многосторонний", 309), ("Двусторонний", 76)]
+PATTERNS = [("Грузопассажирский", 6), ("Пассажирский", 3), ("Грузовой", 1)]
+DIRECTIONS = [
+    ("Не является признаком отнесения к МТК", 160),
+    ("Запад", 101),
+    ("Восток", 62),
+    ("Северо-Запад", 20),
+    ("АЧБ", 18),
+    ("Север-Юг", 12),
+    ("Арктика", 12),
+]
+FOREIGN_COUNTRIES = [
+    "Казахстан",
+    "Китай",
+    "Монголия",
+    "КНДР",
+    "Финляндия",
+    "Норвегия",
+    "Эстония",
+    "Латвия",
+    "Литва",
+    "Польша",
+    "Беларусь",
+    "Грузия",
+    "Азербайджан",
+    "Абхазия",
+    "Южная Осетия",
+    "Япония",
+]
+WORKING_TIMES = ["круглосуточно", "с 08:00 до 20:00", "с 09:00 до 18:00 (местное время)", "по заявкам"]
+ENRICHMENT_SOURCES = [
+    {
+        "id": "rosgranstroy-map-api",
+        "title": "ФГКУ Росгранстрой: карта пунктов пропуска",
+        "url": SOURCE_URL,
+        "kind": "official",
+    },
+    {
+        "id": "rosgranstroy-news",
+        "title": "ФГКУ Росгранстрой: новости",
+        "url": "https://www.rosgranstroy.ru/press-center/news",
+        "kind": "news",
+    },
+    {
+        "id": "deep-research-report",
+        "title": "Deep research report: карточки КПП",
+        "url": "",
+        "kind": "research",
+    },
+]
+
+
+def _title(text: str | None) -> dict:
+    return {"ru": text}
+
+
+def _weighted(rng: random.Random, values: list[tuple[str, int]]) -> str:
+    return rng.choices([value for value, _ in values], [weight for _, weight in values])[0]
+
+
+def _coordinate(rng: random.Random, bounds: tuple[float, float], digits: int) -> str:
+    return f"{rng.uniform(*bounds):.{digits}f}".rstrip("0").rstrip(".")
+
+
+def _subject_names(count: int) -> list[tuple[int, str, str]]:
+    base = [
+        (district_id, district_name, subject_name)
+        for district_id, district_name, subjects in FEDERAL_DISTRICTS
+        for subject_name in subjects
+    ]
+    total = max(len(base), -(-count // CHECKPOINTS_PER_SUBJECT))
+    names = []
+
+    for index in range(total):
+        district_id, district_name, subject_name = base[index % len(base)]
+        copy = index // len(base)
+        names.append((district_id, district_name, subject_name if not copy else f"{subject_name} {copy + 1}"))
+
+    return names
+
+
+def _checkpoint(rng: random.Random, checkpoint_id: int, subject_id: int, district_id: int) -> dict:
+    checkpoint_type = _weighted(rng, CHECKPOINT_TYPES)
+    country = rng.choice(FOREIGN_COUNTRIES) if rng.random() < 0.5 else None
+    latitude_bounds, longitude_bounds = DISTRICT_BOUNDS[district_id]
+
+    if rng.random() < 0.004:
+        latitude = longitude = "55"
+    else:
+        latitude = _coordinate(rng, latitude_bounds, rng.choice((4, 6, 6, 6)))
+        longitude = _coordinate(rng, longitude_bounds, rng.choice((4, 6, 6, 6)))
+
+    updated_at = (
+        f"20{rng.randint(23, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.000000Z"
+    )
+    filial_id = district_id * 10 + checkpoint_id % 3
+
+    return {
+        "id": checkpoint_id,
+        "title": _title(f"Пункт пропуска {checkpoint_id}"),
+        "seo_keywords": _title(None),
+        "seo_title": _title(None),
+        "seo_description": _title(None),
+        "filial_id": filial_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "condition": rng.random() < 0.82,
+        "working_time": {"ru": rng.choice(WORKING_TIMES) if rng.random() < 0.83 else None, "zh-CN": None},
+        "subject_id": subject_id,
+        "foreign_checkpoint": _title(f"Сопредельный пункт {checkpoint_id}" if country else None),
+        "foreign_country_id": FOREIGN_COUNTRIES.index(country) + 1 if country else None,
+        "address": _title(f"с. Пограничное, участок {checkpoint_id % 997}"),
+        "slug": f"checkpoint-{checkpoint_id}",
+        "created_at": "16-01-2023 13:44",
+        "updated_at": updated_at,
+        "checkpoint_working_mode_id": rng.randint(1, 3),
+        "near_checkpoint_condition": rng.randint(0, 1),
+        "checkpoint_direction_id": rng.randint(1, 7),
+        "publish": True,
+        "note": _title("Работает в режиме реконструкции" if rng.random() < 0.05 else None),
+        "checkpoint_type": {"id": 1, "title": _title(checkpoint_type)},
+        "filial": {
+            "id": filial_id,
+            "title": _title(f"Филиал {filial_id}"),
+            "email": f"filial-{filial_id}@rosgranstroy.ru",
+            "slug": f"filial-{filial_id}",
+            "address": _title(f"Административный центр филиала {filial_id}"),
+            "working_time": _title("пн-пт 09:00-18:00"),
+            "phone": f"+7(800)555-{filial_id:02d}-00",
+        },
+        "status": {
+            "id": 1,
+            "title": _title(_weighted(rng, STATUSES)),
+            "description": _title("для пересечения государственной границы Российской Федерации"),
+        },
+        "checkpoint_pattern": {"id": 1, "title": _title(_weighted(rng, PATTERNS))},
+        "direction": {"id": 1, "title": _title(_weighted(rng, DIRECTIONS))},
+        "foreign_country": {"id": 1, "title": _title(country)} if country else None,
+    }
+
+
+def generate_raw_payload(count: int, *, seed: int = 0) -> dict:
+    """Return a raw API payload with ``count`` checkpoints."""
+    rng = random.Random(seed)
+    subjects = _subject_names(count)
+    federal_districts: dict[str, list[dict]] = {}
+
+    for subject_index, (district_id, district_name, subject_name) in enumerate(subjects):
+        federal_districts.setdefault(str(district_id), []).append(
+            {
+                "id": subject_index + 1,
+                "title": _title(subject_name),
+                "federal_district_id": district_id,
+                "federal_district": {"id": district_id, "title": _title(district_name)},
+                "checkpoints": [],
+            }
+        )
+
+    flat_subjects = [subject for items in federal_districts.values() for subject in items]
+    for checkpoint_id in range(1, count + 1):
+        subject = flat_subjects[rng.randrange(len(flat_subjects))]
+        subject["checkpoints"].append(
+            _checkpoint(rng, checkpoint_id, subject["id"], subject["federal_district_id"])
+        )
+
+    return {
+        "meta": {
+            "source": SOURCE_URL,
+            "fetched_at_utc": "2026-01-24T13:50:07.057190",
+            "description": f"Synthetic payload with {count} checkpoints (seed {seed})",
+        },
+        "data": {
+            "federal_districts": federal_districts,
+            "foreign_countries": [
+                {"id": index, "title": _title(name)}
+                for index, name in enumerate(FOREIGN_COUNTRIES, start=1)
+            ],
+        },
+    }
+
+
+def generate_enrichment_payload(checkpoint_ids: list[str], *, seed: int = 0) -> dict:
+    """Return an enrichment payload covering a realistic share of ``checkpoint_ids``."""
+    rng = random.Random(seed + 1)
+    records = []
+
+    for checkpoint_id in checkpoint_ids:
+        if rng.random() < 0.34:
+            records.append(
+                {
+                    "checkpointId": checkpoint_id,
+                    "kind": "description",
+                    "title": "Описание КПП",
+                    "summary": f"Синтетическое описание пункта пропуска {checkpoint_id}.",
+                    "sourceId": "deep-research-report",
+                    "sourceTitle": "Deep research report: карточки КПП",
+                    "confidence": rng.choice(("medium", "high")),
+                    "tags": ["описание", "исследование"],
+                }
+            )
+
+        if rng.random() < 0.08:
+            records.append(
+                {
+                    "checkpointId": checkpoint_id,
+                    "kind": rng.choice(("official_verification", "news")),
+                    "title": "Проверка по официальному источнику",
+                    "summary": "",
+                    "sourceId": rng.choice(("rosgranstroy-map-api", "rosgranstroy-news")),
+                    "confidence": "high",
+                    "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                }
+            )
+
+    return {
+        "schemaVersion": 1,
+        "generatedAt": "2026-04-19T00:00:00.000Z",
+        "description": f"Synthetic enrichment for {len(checkpoint_ids)} checkpoints (seed {seed})",
+        "sources": ENRICHMENT_SOURCES,
+        "importSummary": {"source": "synthetic", "matchedDescriptions": len(records)},
+        "records": records,
+    }
+
+
+def checkpoint_ids(raw_payload: dict) -> list[str]:
+    return [
+        str(checkpoint["id"])
+        for subjects in raw_payload["data"]["federal_districts"].values()
+        for subject in subjects
+        for checkpoint in subject["checkpoints"]
+    ]
+
+
+def parse_scale(value: str) -> int:
+    if value.lower() in SCALES:
+        return SCALES[value.lower()]
+
+    try:
+        count = int(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            f"Scale must be one of {', '.join(SCALES)} or a positive integer."
+        ) from exc
+
+    if count <= 0:
+        raise argparse.ArgumentTypeError("Scale must be positive.")
+
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic raw and enrichment payloads.")
+    parser.add_argument("--scale", type=parse_scale, default=SCALES["1k"], help="1k, 100k, 1m or a count.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True, help="Directory for the generated files.")
+    args = parser.parse_args()
+
+    raw_payload = generate_raw_payload(args.scale, seed=args.seed)
+    enrichment_payload = generate_enrichment_payload(checkpoint_ids(raw_payload), seed=args.seed)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    for name, payload in (
+        ("rosgranstroy_map_data.json", raw_payload),
+        ("checkpoint_enrichment.json", enrichment_payload),
+    ):
+        path = args.output / name
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,297 @@
-const LEGACY_CACHE_PREFIX = "russia-border-checkpoints-app-shell-";
+// Offline-first service worker.
+//
+// App shell and vendored Cesium files are cached under the content hashes in
+// asset-manifest.json (scripts/build_asset_manifest.py), or by URL for vendor
+// files the manifest does not list, and served from the cache first. The
+// dataset is cached under its datasetVersion and served immediately; each load
+// then revalidates against data/patches/manifest.json in the background and,
+// only when the version changed, applies the listed patch or downloads the
+// full GeoJSON for the next load.
 
-async function clearLegacyCaches() {
+const CACHE_PREFIX = "russia-border-checkpoints-";
+const ASSET_CACHE = `${CACHE_PREFIX}assets`;
+const DATASET_CACHE = `${CACHE_PREFIX}dataset`;
+const CURRENT_CACHES = [ASSET_CACHE, DATASET_CACHE];
+const ASSET_MANIFEST_PATH = "asset-manifest.json";
+const DATASET_PATH = "data/checkpoints.geojson";
+const VERSION_MANIFEST_PATH = "data/patches/manifest.json";
+const DATASET_POINTER_PATH = "__dataset-version__";
+const VENDOR_PREFIX = "js/vendor/";
+
+let assetManifest = null;
+let assetRefresh = null;
+let datasetUpdate = null;
+
+function scopeUrl(path) {
+  return new URL(path, globalThis.registration.scope).href;
+}
+
+function scopePath(url) {
+  const scope = new URL(globalThis.registration.scope);
+  return decodeURIComponent(url.pathname.slice(scope.pathname.length));
+}
+
+function versionedUrl(path, name, value) {
+  const url = new URL(path, globalThis.registration.scope);
+  url.searchParams.set(name, value);
+  return url.href;
+}
+
+function assetKey(path, hash) {
+  return versionedUrl(path, "sw-hash", hash);
+}
+
+function datasetKey(version) {
+  return versionedUrl(DATASET_PATH, "version", version);
+}
+
+async function sha256Hex(buffer) {
+  const digest = await globalThis.crypto.subtle.digest("SHA-256", buffer);
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, "0")).join("");
+}
+
+async function fetchFresh(path) {
+  const response = await fetch(scopeUrl(path), { cache: "no-cache" });
+  if (!response.ok) throw new Error(`${path}: HTTP ${response.status}`);
+  return response;
+}
+
+async function clearOldCaches() {
+  // Also removes the app-shell caches of earlier versions of the app.
   const cacheNames = await globalThis.caches.keys();
   await Promise.all(
     cacheNames
-      .filter((cacheName) => cacheName.startsWith(LEGACY_CACHE_PREFIX))
+      .filter((cacheName) => cacheName.startsWith(CACHE_PREFIX))
+      .filter((cacheName) => !CURRENT_CACHES.includes(cacheName))
       .map((cacheName) => globalThis.caches.delete(cacheName))
   );
 }
 
+async function loadAssetManifest() {
+  if (!assetManifest) {
+    const cache = await globalThis.caches.open(ASSET_CACHE);
+    const cached = await cache.match(scopeUrl(ASSET_MANIFEST_PATH));
+    assetManifest = cached ? await cached.json() : null;
+  }
+  return assetManifest;
+}
+
+// Only bytes matching the manifest hash are cached, so a deploy caught halfway is retried later.
+async function cacheAsset(cache, path, hash, response) {
+  if (!response.ok || response.redirected) return false;
+  if (!(await sha256Hex(await response.clone().arrayBuffer())).startsWith(hash)) return false;
+  await cache.put(assetKey(path, hash), response);
+  return true;
+}
+
+async function refreshAssets() {
+  const response = await fetchFresh(ASSET_MANIFEST_PATH);
+  const manifest = await response.clone().json();
+  if ((await loadAssetManifest())?.version === manifest.version) return manifest;
+
+  const cache = await globalThis.caches.open(ASSET_CACHE);
+  await Promise.all(
+    Object.entries(manifest.precache).map(async ([path, hash]) => {
+      if (await cache.match(assetKey(path, hash))) return;
+      if (!(await cacheAsset(cache, path, hash, await fetchFresh(path)))) {
+        throw new Error(`${path} does not match ${ASSET_MANIFEST_PATH}`);
+      }
+    })
+  );
+  await cache.put(scopeUrl(ASSET_MANIFEST_PATH), response);
+  assetManifest = manifest;
+
+  const hashes = { ...manifest.precache, ...manifest.runtime };
+  const listed = new Set([scopeUrl(ASSET_MANIFEST_PATH)]);
+  for (const [path, hash] of Object.entries(hashes)) listed.add(assetKey(path, hash));
+  for (const request of await cache.keys()) {
+    const url = new URL(request.url);
+    const path = scopePath(url);
+    const unlisted = !url.search && path.startsWith(VENDOR_PREFIX) && !(path in hashes);
+    if (!listed.has(request.url) && !unlisted) await cache.delete(request);
+  }
+  return manifest;
+}
+
+function revalidateAssets() {
+  assetRefresh ||= refreshAssets()
+    .catch((error) => console.warn("Asset revalidation failed", error))
+    .finally(() => {
+      assetRefresh = null;
+    });
+  return assetRefresh;
+}
+
+// Vendored files missing from the manifest (Cesium.js is vendored at deploy time, not committed)
+// are cached by URL on first use and revalidated in the background.
+async function serveUnlisted(event, path) {
+  const cache = await globalThis.caches.open(ASSET_CACHE);
+  const key = scopeUrl(path);
+  const cached = await cache.match(key);
+  const update = fetch(key, { cache: "no-cache" }).then(async (response) => {
+    if (response.ok && !response.redirected) await cache.put(key, response.clone());
+    return response;
+  });
+  if (!cached) return update;
+  event.waitUntil(update.catch(() => null));
+  return cached;
+}
+
+async function serveAsset(event, path) {
+  const manifest = await loadAssetManifest();
+  const hash = manifest?.precache[path] || manifest?.runtime[path];
+  if (!hash && path.startsWith(VENDOR_PREFIX)) return serveUnlisted(event, path);
+  if (!hash) return fetch(event.request);
+
+  const cache = await globalThis.caches.open(ASSET_CACHE);
+  const cached = await cache.match(assetKey(path, hash));
+  if (cached) return cached;
+
+  const response = await fetch(event.request);
+  event.waitUntil(cacheAsset(cache, path, hash, response.clone()).catch(() => false));
+  return response;
+}
+
+function checkpointId(feature) {
+  return String(feature.properties?.checkpoint_id ?? "").trim();
+}
+
+// Mirrors dataset_patches.apply_patch.
+function applyPatch(geojson, patch) {
+  const features = new Map(
+    (geojson.features || []).map((feature) => [checkpointId(feature), feature])
+  );
+  for (const id of patch.removed || []) {
+    if (!features.delete(id)) throw new Error(`Patch removes unknown checkpoint ${id}`);
+  }
+
+  for (const item of patch.changed || []) {
+    const feature = features.get(item.id);
+    if (!feature) throw new Error(`Patch changes unknown checkpoint ${item.id}`);
+    const properties = { ...feature.properties, ...item.properties };
+    for (const key of item.removedProperties || []) delete properties[key];
+    features.set(item.id, {
+      ...feature,
+      properties,
+      ...("geometry" in item ? { geometry: item.geometry } : {})
+    });
+  }
+
+  for (const feature of patch.added || []) features.set(checkpointId(feature), feature);
+  if (patch.featureCount !== undefined && features.size !== patch.featureCount) {
+    throw new Error("Patched dataset does not have the expected number of features");
+  }
+  return { ...geojson, features: Array.from(features.values()) };
+}
+
+async function readDataset(cache) {
+  const pointer = await cache.match(scopeUrl(DATASET_POINTER_PATH));
+  if (!pointer) return null;
+  const { version } = await pointer.json();
+  const response = await cache.match(datasetKey(version));
+  return response ? { version, response } : null;
+}
+
+async function patchDataset(cache, current, entry, version) {
+  const base = await (await cache.match(datasetKey(current.version))).json();
+  const patch = await (await fetchFresh(entry.path)).json();
+  if (patch.fromVersion !== current.version || patch.toVersion !== version) {
+    throw new Error(`Patch ${entry.path} does not lead from ${current.version} to ${version}`);
+  }
+  return new TextEncoder().encode(JSON.stringify(applyPatch(base, patch)));
+}
+
+async function updateDataset(cache, current) {
+  const manifest = await (await fetchFresh(VERSION_MANIFEST_PATH)).json();
+  const version = manifest.latestVersion;
+  if (current?.version === version) return version;
+
+  let body = null;
+  const entry = current && manifest.patches?.[current.version];
+  if (entry) {
+    try {
+      body = await patchDataset(cache, current, entry, version);
+    } catch (error) {
+      console.warn("Dataset patch failed, fetching the full file", error);
+    }
+  }
+  if (body === null) {
+    body = await (await fetchFresh(manifest.latest.path)).arrayBuffer();
+    if (manifest.latest.sha256 && (await sha256Hex(body)) !== manifest.latest.sha256) {
+      throw new Error("The dataset changed while it was downloaded");
+    }
+  }
+
+  await cache.put(
+    datasetKey(version),
+    new Response(body, {
+      headers: {
+        "Content-Type": "application/geo+json",
+        "Content-Length": String(body.byteLength),
+        "X-Dataset-Version": version
+      }
+    })
+  );
+  await cache.put(scopeUrl(DATASET_POINTER_PATH), new Response(JSON.stringify({ version })));
+  for (const request of await cache.keys()) {
+    if (![datasetKey(version), scopeUrl(DATASET_POINTER_PATH)].includes(request.url)) {
+      await cache.delete(request);
+    }
+  }
+  return version;
+}
+
+function revalidateDataset(cache, current) {
+  datasetUpdate ||= updateDataset(cache, current).finally(() => {
+    datasetUpdate = null;
+  });
+  return datasetUpdate;
+}
+
+async function serveDataset(event) {
+  const cache = await globalThis.caches.open(DATASET_CACHE);
+  const current = await readDataset(cache);
+  if (current) {
+    event.waitUntil(
+      revalidateDataset(cache, current).catch((error) => {
+        console.warn("Dataset revalidation failed", error);
+      })
+    );
+    return current.response;
+  }
+
+  try {
+    const cached = await cache.match(datasetKey(await revalidateDataset(cache, null)));
+    if (cached) return cached;
+  } catch (error) {
+    console.warn("Dataset could not be cached", error);
+  }
+  return fetch(event.request);
+}
+
 globalThis.addEventListener("install", (event) => {
-  event.waitUntil(globalThis.skipWaiting());
+  event.waitUntil(refreshAssets().then(() => globalThis.skipWaiting()));
 });
 
 globalThis.addEventListener("activate", (event) => {
-  event.waitUntil(
-    clearLegacyCaches()
-      .then(() => globalThis.clients.claim())
-      .then(() => globalThis.registration.unregister())
-  );
+  event.waitUntil(clearOldCaches().then(() => globalThis.clients.claim()));
+});
+
+globalThis.addEventListener("fetch", (event) => {
+  const { request } = event;
+  const url = new URL(request.url);
+  const scope = new URL(globalThis.registration.scope);
+  if (request.method !== "GET" || url.origin !== scope.origin) return;
+  if (!url.pathname.startsWith(scope.pathname)) return;
+  const path = scopePath(url);
+
+  if (request.mode === "navigate") {
+    if (path !== "" && path !== "index.html") return;
+    event.respondWith(serveAsset(event, "index.html"));
+    event.waitUntil(revalidateAssets());
+  } else if (path === DATASET_PATH) {
+    event.respondWith(serveDataset(event));
+  } else if (path !== ASSET_MANIFEST_PATH && !path.startsWith("data/")) {
+    event.respondWith(serveAsset(event, path));
+  }
 });
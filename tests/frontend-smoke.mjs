@@ -2,8 +2,12 @@ import { readFile } from "node:fs/promises";
 import {
   buildDatasetSummary,
   formatCoordinates,
+  loadCheckpointDataset,
   loadCheckpoints,
-  repairText
+  packCheckpoints,
+  prepareCheckpoints,
+  repairText,
+  unpackCheckpoints
 } from "../js/checkpoints.js";
 
 function assert(condition, message) {
@@ -142,6 +146,91 @@ assert(summary.total === 2, "Summary should count all checkpoints.");
 assert(summary.countryCount === 1, "Summary should count specified countries only.");
 assert(summary.qualityCounts.high === 1, "Summary should count quality levels.");
 
+assert(
+  features[1].properties.__search.startsWith("202 airport test"),
+  "Search text should be built while loading."
+);
+
+const prepared = prepareCheckpoints(payload);
+const { message, transfer } = packCheckpoints(prepared);
+assert(
+  transfer.length === 3 && transfer.every((buffer) => buffer instanceof ArrayBuffer),
+  "Coordinates and search texts should be packed into transferable buffers."
+);
+const delivered = structuredClone(message, { transfer });
+assert(message.coordinates.byteLength === 0, "Packed buffers should be transferred, not copied.");
+const unpacked = unpackCheckpoints(delivered);
+assert(
+  JSON.stringify(unpacked.features) === JSON.stringify(prepared.features),
+  "Unpacked checkpoints should match the prepared features."
+);
+assert(unpacked.summary.total === 2, "The dataset summary should travel with the checkpoints.");
+
+const workerListeners = [];
+globalThis.addEventListener = (type, listener) => workerListeners.push(listener);
+globalThis.postMessage = () => {};
+await import("../js/checkpointWorker.js");
+delete globalThis.addEventListener;
+delete globalThis.postMessage;
+
+function fakeWorker({ fail = false } = {}) {
+  const listeners = { message: [], error: [] };
+  return {
+    terminated: false,
+    addEventListener(type, listener) {
+      listeners[type].push(listener);
+    },
+    postMessage(data) {
+      if (fail) {
+        listeners.error.forEach((listener) => listener({ message: "module workers unsupported" }));
+        return;
+      }
+      globalThis.postMessage = (reply, replyTransfer = []) => {
+        const cloned = structuredClone(reply, { transfer: replyTransfer });
+        listeners.message.forEach((listener) => listener({ data: cloned }));
+      };
+      workerListeners.forEach((listener) => listener({ data }));
+    },
+    terminate() {
+      this.terminated = true;
+    }
+  };
+}
+
+const originalFetch = globalThis.fetch;
+const payloadBytes = new TextEncoder().encode(JSON.stringify(payload));
+globalThis.fetch = async () =>
+  new Response(payloadBytes, { headers: { "Content-Length": String(payloadBytes.length) } });
+try {
+  const progress = [];
+  const worker = fakeWorker();
+  const dataset = await loadCheckpointDataset({
+    baseUrl: "https://example.test/project/index.html",
+    createWorker: () => worker,
+    onProgress: (percent) => progress.push(percent)
+  });
+  assert(worker.terminated, "The loading worker should be terminated after use.");
+  assert(dataset.features.length === 2, "Worker should return the normalized checkpoints.");
+  assert(
+    Array.isArray(dataset.features[0].geometry.coordinates),
+    "Worker coordinates should be restored as arrays."
+  );
+  assert(progress.includes(60), "Worker should stream download progress.");
+
+  const originalWarn = console.warn;
+  console.warn = () => {};
+  const fallback = await loadCheckpointDataset({
+    baseUrl: "https://example.test/project/index.html",
+    createWorker: () => fakeWorker({ fail: true })
+  }).finally(() => {
+    console.warn = originalWarn;
+  });
+  assert(fallback.features.length === 2, "Loading should fall back to the main thread.");
+} finally {
+  globalThis.fetch = originalFetch;
+  delete globalThis.postMessage;
+}
+
 const appSource = await readFile(new URL("../app.js", import.meta.url), "utf-8");
 assert(appSource.includes("__KPP_GLOBE_READY__"), "App should expose a readiness hook.");
 assert(appSource.includes("copyShareLink"), "App should include share URL generation.");
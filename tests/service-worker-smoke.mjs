@@ -1,18 +1,349 @@
+import { createHash } from "node:crypto";
 import { readFile } from "node:fs/promises";
+import vm from "node:vm";
 
 function assert(condition, message) {
   if (!condition) throw new Error(message);
 }
 
-const swSource = await readFile(new URL("../sw.js", import.meta.url), "utf-8");
+const root = new URL("../", import.meta.url);
+const swSource = await readFile(new URL("sw.js", root), "utf-8");
+const appSource = await readFile(new URL("app.js", root), "utf-8");
+const SCOPE = "https://example.test/map/";
 
+function hashOf(content) {
+  return createHash("sha256").update(content).digest("hex").slice(0, 16);
+}
+
+function keyOf(request) {
+  return typeof request === "string" ? request : request.url;
+}
+
+class MemoryCache {
+  constructor() {
+    this.entries = new Map();
+  }
+
+  async match(request) {
+    return this.entries.get(keyOf(request))?.clone();
+  }
+
+  async put(request, response) {
+    this.entries.set(keyOf(request), response);
+  }
+
+  async delete(request) {
+    return this.entries.delete(keyOf(request));
+  }
+
+  async keys() {
+    return Array.from(this.entries.keys(), (url) => new Request(url));
+  }
+}
+
+class MemoryCacheStorage {
+  constructor() {
+    this.caches = new Map();
+  }
+
+  async open(name) {
+    if (!this.caches.has(name)) this.caches.set(name, new MemoryCache());
+    return this.caches.get(name);
+  }
+
+  async keys() {
+    return Array.from(this.caches.keys());
+  }
+
+  async delete(name) {
+    return this.caches.delete(name);
+  }
+}
+
+class FakeServer {
+  constructor() {
+    this.files = new Map();
+    this.online = true;
+    this.requests = [];
+  }
+
+  set(path, content) {
+    this.files.set(path, typeof content === "string" ? content : JSON.stringify(content));
+  }
+
+  setAssets(files) {
+    const precache = {};
+    for (const [path, content] of Object.entries(files)) {
+      this.set(path, content);
+      precache[path] = hashOf(content);
+    }
+    const runtime = { "js/vendor/cesium/Workers/createGeometry.js": hashOf("worker v1") };
+    this.set("js/vendor/cesium/Workers/createGeometry.js", "worker v1");
+    this.set("asset-manifest.json", {
+      schemaVersion: 1,
+      version: hashOf(JSON.stringify([precache, runtime])),
+      precache,
+      runtime
+    });
+  }
+
+  publishDataset(geojson, version, patches = {}) {
+    const content = JSON.stringify(geojson);
+    this.set("data/checkpoints.geojson", content);
+    this.set("data/patches/manifest.json", {
+      schemaVersion: 1,
+      latestVersion: version,
+      latest: {
+        path: "data/checkpoints.geojson",
+        size: content.length,
+        sha256: createHash("sha256").update(content).digest("hex")
+      },
+      patches
+    });
+  }
+
+  fetch = async (input) => {
+    const url = new URL(keyOf(input));
+    const path = url.pathname.slice(new URL(SCOPE).pathname.length);
+    this.requests.push(path);
+    if (!this.online) throw new TypeError("Failed to fetch");
+    if (!this.files.has(path)) return new Response("not found", { status: 404 });
+    return new Response(this.files.get(path), { status: 200 });
+  };
+}
+
+function startWorker(server, cacheStorage) {
+  const listeners = {};
+  const context = vm.createContext({
+    URL,
+    Request,
+    Response,
+    Headers,
+    TextEncoder,
+    crypto: globalThis.crypto,
+    console: { ...console, warn: () => {} },
+    caches: cacheStorage,
+    fetch: server.fetch,
+    registration: { scope: SCOPE },
+    clients: { claim: async () => {} },
+    skipWaiting: async () => {},
+    addEventListener: (type, listener) => {
+      listeners[type] = listener;
+    }
+  });
+  vm.runInContext(swSource, context);
+  return listeners;
+}
+
+async function dispatch(listeners, type, properties = {}) {
+  const pending = [];
+  let responded = null;
+  listeners[type]({
+    ...properties,
+    waitUntil: (promise) => pending.push(promise),
+    respondWith: (promise) => {
+      responded = promise;
+    }
+  });
+  const response = await responded;
+  for (let index = 0; index < pending.length; index += 1) await pending[index];
+  return response;
+}
+
+function request(path, mode = "cors") {
+  return { request: { url: new URL(path, SCOPE).href, method: "GET", mode } };
+}
+
+function feature(id, properties = {}) {
+  return {
+    type: "Feature",
+    geometry: { type: "Point", coordinates: [30, 60] },
+    properties: { checkpoint_id: id, ...properties }
+  };
+}
+
+function datasetIds(geojson) {
+  return geojson.features.map(
+    (item) => `${item.properties.checkpoint_id}:${item.properties.status}`
+  );
+}
+
+const server = new FakeServer();
+const cacheStorage = new MemoryCacheStorage();
+await cacheStorage.open("russia-border-checkpoints-app-shell-v3");
+server.setAssets({ "index.html": "<html>v1</html>", "app.js": "app v1", "style.css": "css" });
+
+let worker = startWorker(server, cacheStorage);
+await dispatch(worker, "install");
+await dispatch(worker, "activate");
+const cacheNames = await cacheStorage.keys();
+assert(
+  !cacheNames.includes("russia-border-checkpoints-app-shell-v3"),
+  "Activation should delete legacy app-shell caches."
+);
+assert(
+  !swSource.includes("registration.unregister"),
+  "Service worker should stay registered to serve offline loads."
+);
+assert(
+  appSource.includes('navigator.serviceWorker.register("./sw.js")'),
+  "App should register the service worker."
+);
+
+const assetCache = await cacheStorage.open("russia-border-checkpoints-assets");
+const precachedKeys = (await assetCache.keys()).map((item) => item.url);
+assert(
+  precachedKeys.includes(`${SCOPE}app.js?sw-hash=${hashOf("app v1")}`),
+  "Install should precache the app shell under its content hash."
+);
+assert(
+  !precachedKeys.some((url) => url.includes("Workers/")),
+  "Runtime Cesium assets should not be precached."
+);
+
+server.online = false;
+worker = startWorker(server, cacheStorage);
+let response = await dispatch(worker, "fetch", request("./?checkpoint=101", "navigate"));
+assert((await response.text()) === "<html>v1</html>", "Shell should load offline after install.");
+
+server.online = true;
+await dispatch(worker, "fetch", request("js/vendor/cesium/Workers/createGeometry.js"));
+server.online = false;
+response = await dispatch(worker, "fetch", request("js/vendor/cesium/Workers/createGeometry.js"));
+assert((await response.text()) === "worker v1", "Runtime assets should be cached on first use.");
+
+server.online = true;
+server.set("js/vendor/cesium/Cesium.js", "cesium runtime");
+await dispatch(worker, "fetch", request("js/vendor/cesium/Cesium.js"));
+server.online = false;
+response = await dispatch(worker, "fetch", request("js/vendor/cesium/Cesium.js"));
+assert(
+  (await response.text()) === "cesium runtime",
+  "Vendor files missing from the manifest should still be cached for offline use."
+);
+
+server.online = true;
+server.setAssets({ "index.html": "<html>v1</html>", "app.js": "app v2", "style.css": "css" });
+server.requests = [];
+response = await dispatch(worker, "fetch", request("./", "navigate"));
+assert((await response.text()) === "<html>v1</html>", "Navigations should be served from cache.");
+assert(
+  !server.requests.includes("index.html") && !server.requests.includes("style.css"),
+  "Revalidation should only download assets whose hash changed."
+);
+const refreshedKeys = (await assetCache.keys()).map((item) => item.url);
+assert(
+  refreshedKeys.includes(`${SCOPE}app.js?sw-hash=${hashOf("app v2")}`) &&
+    !refreshedKeys.includes(`${SCOPE}app.js?sw-hash=${hashOf("app v1")}`),
+  "Changed assets should replace their previous hash."
+);
+server.online = false;
+response = await dispatch(worker, "fetch", request("js/vendor/cesium/Cesium.js"));
+assert(
+  (await response.text()) === "cesium runtime",
+  "Asset revalidation should keep unlisted vendor files."
+);
+server.online = true;
+
+server.setAssets({ "index.html": "<html>v1</html>", "app.js": "app v2", "style.css": "css v2" });
+server.set("style.css", "css served mid-deploy");
+await dispatch(worker, "fetch", request("./", "navigate"));
+response = await dispatch(worker, "fetch", request("app.js"));
+assert(
+  (await response.text()) === "app v2",
+  "A failed revalidation should keep the previous asset set."
+);
+
+const v1 = { type: "FeatureCollection", features: [feature("1"), feature("2"), feature("3")] };
+server.publishDataset(v1, "v1");
+server.requests = [];
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(
+  datasetIds(await response.json()).length === 3,
+  "First dataset load should use the network."
+);
+assert(
+  server.requests.join() === "data/patches/manifest.json,data/checkpoints.geojson",
+  "First dataset load should read the version manifest, then the full file."
+);
+
+server.requests = [];
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(response.headers.get("X-Dataset-Version") === "v1", "Dataset should be keyed by version.");
+assert(
+  server.requests.join() === "data/patches/manifest.json",
+  "An unchanged version should only revalidate the manifest."
+);
+
+server.online = false;
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(datasetIds(await response.json()).length === 3, "Dataset should load offline.");
+server.online = true;
+
+const v2 = {
+  type: "FeatureCollection",
+  features: [feature("1", { status: "closed" }), feature("3"), feature("4")]
+};
+server.publishDataset(v2, "v2", { v1: { path: "data/patches/v1--v2.json", size: 200 } });
+server.set("data/patches/v1--v2.json", {
+  schemaVersion: 1,
+  fromVersion: "v1",
+  toVersion: "v2",
+  featureCount: 3,
+  added: [feature("4")],
+  removed: ["2"],
+  changed: [{ id: "1", properties: { status: "closed" } }]
+});
+server.requests = [];
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(
+  response.headers.get("X-Dataset-Version") === "v1",
+  "A new version should be fetched in the background."
+);
 assert(
-  swSource.includes("LEGACY_CACHE_PREFIX"),
-  "Service worker should only exist to clean previous app-shell caches."
+  server.requests.includes("data/patches/v1--v2.json") &&
+    !server.requests.includes("data/checkpoints.geojson"),
+  "A listed patch should be used instead of the full file."
 );
-assert(swSource.includes("caches.keys"), "Service worker should enumerate legacy caches.");
-assert(swSource.includes("registration.unregister"), "Service worker should unregister itself.");
-assert(!swSource.includes("APP_SHELL_URLS"), "Minimal app should not precache an app shell.");
-assert(!swSource.includes('addEventListener("fetch"'), "Minimal app should not intercept fetches.");
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(response.headers.get("X-Dataset-Version") === "v2", "Next load should use the new version.");
+assert(
+  JSON.stringify(datasetIds(await response.json())) === JSON.stringify(datasetIds(v2)),
+  "Patched dataset should match the published version."
+);
+const datasetCache = await cacheStorage.open("russia-border-checkpoints-dataset");
+assert(
+  !(await datasetCache.keys()).some((item) => item.url.endsWith("version=v1")),
+  "Older dataset versions should be deleted."
+);
+
+const v3 = { type: "FeatureCollection", features: [feature("5")] };
+server.publishDataset(v3, "v3", { v1: { path: "data/patches/v1--v3.json", size: 100 } });
+server.requests = [];
+await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(
+  server.requests.includes("data/checkpoints.geojson"),
+  "A version without a patch should fetch the full file."
+);
+response = await dispatch(worker, "fetch", request("data/checkpoints.geojson"));
+assert(response.headers.get("X-Dataset-Version") === "v3", "Full update should be cached.");
+
+const assetManifest = JSON.parse(await readFile(new URL("asset-manifest.json", root), "utf-8"));
+const listedAssets = { ...assetManifest.precache, ...assetManifest.runtime };
+for (const [path, hash] of Object.entries(listedAssets)) {
+  assert(
+    hashOf(await readFile(new URL(path, root))) === hash,
+    `asset-manifest.json is out of date for ${path}; run python scripts/build_asset_manifest.py`
+  );
+}
+const shellFiles = [
+  "index.html",
+  "app.js",
+  "js/checkpoints.js",
+  "js/vendor/cesium/Widgets/widgets.css"
+];
+for (const path of shellFiles) {
+  assert(path in assetManifest.precache, `${path} should be precached.`);
+}
 
 console.log("service worker smoke test passed");
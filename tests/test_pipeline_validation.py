@@ -1,30 +1,85 @@
+import asyncio
+import contextlib
+import cProfile
+import gzip
+import io
 import json
+import os
+import pstats
 import sys
+import tempfile
 import unittest
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from urllib.parse import urlencode
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT / "scripts"))
 
+from pipeline_context import PipelineContext  # noqa: E402
+from benchmark_pipeline import build_step, compare_to_baselines, parse_step  # noqa: E402
+from coverage_cube import CoverageCube, serialize_coverage_cube  # noqa: E402
+from data_server import DataServer, Request, default_routes  # noqa: E402
+from dataset_patches import apply_patch, write_patches  # noqa: E402
+from dataset_release import current_release, load_manifest, publish_release, write_file_atomic  # noqa: E402
+from enrichment_store import EnrichmentStore, open_store  # noqa: E402
+from load_test import Stats, percentile, run_load_test  # noqa: E402
+from arrow_export import ArrowFile, checkpoint_columns, enrichment_columns, write_arrow  # noqa: E402
+from flatgeobuf_export import FlatGeobufReader, encode_flatgeobuf, level_bounds, write_flatgeobuf  # noqa: E402
+from geopackage_export import decode_point, open_geopackage, query_bbox, write_geopackage  # noqa: E402
+from import_checkpoint_descriptions import (  # noqa: E402
+    apply_import,
+    bounded_edit_distance,
+    build_description_records,
+    collect_report_paths,
+    import_reports,
+    iter_cards,
+    match_cards_to_features,
+    merge_report_records,
+    read_report_cards,
+)
+from pipeline_dag import code_hash, run_dag, select_steps  # noqa: E402
+from pipeline_metrics import Profiler, measure_step, pstats_to_speedscope, run_child  # noqa: E402
 from pipeline_validation import (  # noqa: E402
     ValidationError,
     analyze_data_quality,
+    build_dataset_merkle_tree,
     build_dataset_snapshot,
     build_dataset_version,
+    diff_dataset_features,
+    diff_dataset_merkle_trees,
     normalize_coordinate_text,
     parse_coordinate,
     summarize_dataset_changes,
     validate_dataset_changelog,
+    validate_dataset_merkle_tree,
     validate_data_quality,
     validate_geojson,
     validate_raw_payload,
     validate_rows,
 )
+from checkpoint_history import (  # noqa: E402
+    empty_history,
+    last_field_change,
+    update_checkpoint_history,
+    validate_checkpoint_history,
+)
 from research_coverage import (  # noqa: E402
+    _build_enrichment_index,
+    build_input_fingerprint,
+    build_research_coverage,
+    build_enrichment_index_from_store,
     build_research_coverage_report,
+    check_queue_pages,
+    paginate_research_coverage_report,
+    report_code_version,
     validate_research_coverage_report,
 )
+from synthetic_dataset import (  # noqa: E402
+    checkpoint_ids,
+    generate_enrichment_payload,
+    generate_raw_payload,
+)
 
 
 def make_row(**overrides):
@@ -250,6 +305,360 @@ class PipelineValidationTests(unittest.TestCase):
         with self.assertRaisesRegex(ValidationError, "current GeoJSON"):
             validate_dataset_changelog(changelog, stale_geojson)
 
+    def test_build_dataset_snapshot_hashes_change_with_feature_content(self):
+        original = build_dataset_snapshot([make_feature()])
+        same = build_dataset_snapshot([make_feature()])
+        changed = build_dataset_snapshot([make_feature(properties={"status": "Закрыт"})])
+
+        self.assertEqual(original["featureHashes"], same["featureHashes"])
+        self.assertNotEqual(original["featureHashes"]["101"], changed["featureHashes"]["101"])
+        self.assertEqual(summarize_dataset_changes(original, changed)["modified"], 1)
+
+    def test_diff_dataset_features_reports_changed_fields_only_for_modified_ids(self):
+        previous_features = [
+            make_feature(),
+            make_feature(properties={"checkpoint_id": "202", "working_time": "24/7"}),
+        ]
+        current_features = [
+            make_feature(properties={"status": "Закрыт"}, geometry={"coordinates": [131.95, 43.1]}),
+            make_feature(properties={"checkpoint_id": "202", "working_time": "24/7"}),
+            make_feature(properties={"checkpoint_id": "303"}),
+        ]
+
+        diff = diff_dataset_features(
+            build_dataset_snapshot(previous_features),
+            build_dataset_snapshot(current_features),
+            previous_features,
+            current_features,
+        )
+
+        self.assertEqual(diff["added"], ["303"])
+        self.assertEqual(diff["removed"], [])
+        self.assertEqual(
+            diff["modified"],
+            [
+                {
+                    "id": "101",
+                    "fields": {
+                        "status": {"old": "Действует", "new": "Закрыт"},
+                        "coordinates": {"old": [131.9, 43.1], "new": [131.95, 43.1]},
+                    },
+                }
+            ],
+        )
+
+    def test_validate_dataset_changelog_rejects_mismatched_modified_checkpoints(self):
+        previous_features = [make_feature()]
+        current_features = [
+            make_feature(
+                properties={"status": "Закрыт", "last_updated": "2026-02-01T00:00:00.000000Z"}
+            )
+        ]
+        previous_snapshot = build_dataset_snapshot(previous_features)
+        current_snapshot = build_dataset_snapshot(current_features)
+        changelog = make_changelog(previous_features)
+        changes = summarize_dataset_changes(previous_snapshot, current_snapshot)
+        changes["modifiedCheckpoints"] = diff_dataset_features(
+            previous_snapshot,
+            current_snapshot,
+            previous_features,
+            current_features,
+        )["modified"]
+        changelog["entries"].insert(
+            0,
+            {
+                "version": build_dataset_version(current_snapshot),
+                "date": "2026-04-15",
+                "generatedAt": "2026-04-15T00:00:00+00:00",
+                "summary": "Test checkpoint dataset snapshot.",
+                "changes": changes,
+                "snapshot": current_snapshot,
+            },
+        )
+
+        self.assertEqual(
+            validate_dataset_changelog(changelog, make_geojson(current_features)), 2
+        )
+
+        changes["modifiedCheckpoints"] = []
+        with self.assertRaisesRegex(ValidationError, "modifiedCheckpoints"):
+            validate_dataset_changelog(changelog)
+
+    def test_build_dataset_version_changes_with_feature_content(self):
+        original = build_dataset_snapshot([make_feature()])
+        changed = build_dataset_snapshot([make_feature(properties={"working_time": "24/7"})])
+
+        self.assertEqual(original["ids"], changed["ids"])
+        self.assertNotEqual(build_dataset_version(original), build_dataset_version(changed))
+
+    def test_diff_dataset_merkle_trees_descends_only_into_changed_subjects(self):
+        previous_features = [
+            make_feature(properties={"federal_district": "Дальневосточный"}),
+            make_feature(
+                properties={
+                    "checkpoint_id": "202",
+                    "subject_name": "Амурская область",
+                    "federal_district": "Дальневосточный",
+                }
+            ),
+            make_feature(
+                properties={
+                    "checkpoint_id": "303",
+                    "subject_name": "Псковская область",
+                    "federal_district": "Северо-Западный",
+                }
+            ),
+        ]
+        current_features = [dict(feature) for feature in previous_features]
+        current_features[1] = make_feature(
+            properties={
+                "checkpoint_id": "202",
+                "subject_name": "Амурская область",
+                "federal_district": "Дальневосточный",
+                "status": "Закрыт",
+            }
+        )
+
+        diff = diff_dataset_merkle_trees(
+            build_dataset_merkle_tree(previous_features),
+            build_dataset_merkle_tree(current_features),
+        )
+
+        self.assertTrue(diff["rootChanged"])
+        self.assertEqual(diff["districts"], ["Дальневосточный"])
+        self.assertEqual(diff["subjects"], [["Дальневосточный", "Амурская область"]])
+        self.assertEqual(
+            diff["checkpoints"],
+            {"added": [], "removed": [], "modified": ["202"]},
+        )
+
+    def test_validate_dataset_merkle_tree_accepts_current_file_and_rejects_tampering(self):
+        geojson = json.loads(
+            (ROOT / "data/checkpoints.geojson").read_text(encoding="utf-8")
+        )
+        tree = json.loads(
+            (ROOT / "data/dataset_merkle_tree.json").read_text(encoding="utf-8")
+        )
+        changelog = json.loads(
+            (ROOT / "data/dataset_changelog.json").read_text(encoding="utf-8")
+        )
+
+        self.assertEqual(validate_dataset_merkle_tree(tree, geojson), 385)
+        self.assertEqual(tree["root"], changelog["entries"][0]["snapshot"]["merkleRoot"])
+
+        district = next(iter(tree["districts"].values()))
+        subject = next(iter(district["subjects"].values()))
+        checkpoint_id = next(iter(subject["checkpoints"]))
+        subject["checkpoints"][checkpoint_id] = "0" * 16
+
+        with self.assertRaisesRegex(ValidationError, "subject hash"):
+            validate_dataset_merkle_tree(tree)
+
+    def test_update_checkpoint_history_indexes_changes_incrementally(self):
+        previous_features = [make_feature()]
+        current_features = [
+            make_feature(
+                properties={"status": "Закрыт", "last_updated": "2026-02-01T00:00:00.000000Z"}
+            ),
+            make_feature(properties={"checkpoint_id": "202"}),
+        ]
+        previous_snapshot = build_dataset_snapshot(previous_features)
+        current_snapshot = build_dataset_snapshot(current_features)
+        changelog = make_changelog(previous_features)
+        history = empty_history()
+
+        self.assertEqual(len(update_checkpoint_history(history, changelog)), 1)
+
+        changes = summarize_dataset_changes(previous_snapshot, current_snapshot)
+        changes["modifiedCheckpoints"] = diff_dataset_features(
+            previous_snapshot,
+            current_snapshot,
+            previous_features,
+            current_features,
+        )["modified"]
+        changelog["entries"].insert(
+            0,
+            {
+                "version": build_dataset_version(current_snapshot),
+                "date": "2026-04-15",
+                "generatedAt": "2026-04-15T00:00:00+00:00",
+                "summary": "Test checkpoint dataset snapshot.",
+                "changes": changes,
+                "snapshot": current_snapshot,
+            },
+        )
+
+        self.assertEqual(
+            update_checkpoint_history(history, changelog),
+            [build_dataset_version(current_snapshot)],
+        )
+        self.assertEqual(update_checkpoint_history(history, changelog), [])
+        self.assertEqual(validate_checkpoint_history(history, changelog), 2)
+        self.assertEqual(
+            [event["change"] for event in history["checkpoints"]["101"]],
+            ["added", "modified"],
+        )
+        self.assertEqual(history["checkpoints"]["202"][0]["change"], "added")
+
+        status_change = last_field_change(history, "101", "status")
+        self.assertEqual(status_change["old"], "Действует")
+        self.assertEqual(status_change["new"], "Закрыт")
+        self.assertEqual(status_change["date"], "2026-04-15")
+
+    def test_pipeline_context_reuses_parsed_documents_and_snapshots(self):
+        context = PipelineContext()
+        geojson_path = ROOT / "data/checkpoints.geojson"
+        geojson = context.load_json(geojson_path)
+
+        self.assertIs(context.load_json(geojson_path), geojson)
+        self.assertIs(context.dataset_snapshot(geojson), context.dataset_snapshot(geojson))
+        self.assertEqual(context.load_json(ROOT / "data/missing.json", None), None)
+
+        rebuilt = make_geojson([make_feature()])
+        context.remember(geojson_path, rebuilt)
+
+        self.assertIs(context.load_json(geojson_path), rebuilt)
+        self.assertEqual(context.dataset_snapshot(rebuilt)["total"], 1)
+
+    def test_run_dag_skips_steps_with_unchanged_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            source = root / "source.json"
+            enrichment = root / "enrichment.json"
+            built = root / "built.json"
+            quality = root / "quality.json"
+            coverage = root / "coverage.json"
+            source.write_text("[1]", encoding="utf-8")
+            enrichment.write_text("{}", encoding="utf-8")
+            steps = [
+                {
+                    "name": "build",
+                    "title": "Build",
+                    "script": "scripts/02_build_geojson.py",
+                    "inputs": [source],
+                    "outputs": [built],
+                },
+                {
+                    "name": "quality",
+                    "title": "Quality",
+                    "script": "scripts/04_write_quality_report.py",
+                    "inputs": [built],
+                    "outputs": [quality],
+                },
+                {
+                    "name": "coverage",
+                    "title": "Coverage",
+                    "script": "scripts/05_write_research_coverage_report.py",
+                    "inputs": [built, enrichment],
+                    "outputs": [coverage],
+                },
+            ]
+            calls = []
+
+            def runner(step):
+                calls.append(step["name"])
+                inputs = "".join(Path(item).read_text(encoding="utf-8") for item in step["inputs"])
+                for output in step["outputs"]:
+                    Path(output).write_text(inputs, encoding="utf-8")
+                return 0
+
+            cache = {"steps": {}}
+            selected = select_steps(steps)
+            first = run_dag(steps, runner, selected=selected, cache=cache, cache_path=None)
+            second = run_dag(steps, runner, selected=selected, cache=cache, cache_path=None)
+            enrichment.write_text('{"records": []}', encoding="utf-8")
+            third = run_dag(steps, runner, selected=selected, cache=cache, cache_path=None)
+            forced = run_dag(
+                steps,
+                runner,
+                selected=select_steps(steps, only=["quality"]),
+                forced={"quality"},
+                cache=cache,
+                cache_path=None,
+            )
+
+        self.assertEqual(set(first.values()), {"ran"})
+        self.assertEqual(set(second.values()), {"cached"})
+        self.assertEqual(third, {"build": "cached", "quality": "cached", "coverage": "ran"})
+        self.assertEqual(forced, {"quality": "ran"})
+        self.assertEqual(select_steps(steps, start="build"), ["build", "quality", "coverage"])
+        self.assertEqual(calls.count("coverage"), 2)
+
+    def test_profiler_records_phases_and_exports_speedscope(self):
+        context = PipelineContext(profiler=Profiler())
+        step = {"name": "quality", "title": "Quality", "inputs": [], "outputs": []}
+
+        with measure_step(step, in_process=True) as record:
+            with context.phase("validate") as phase:
+                report = analyze_data_quality(make_geojson([make_feature()]))
+                phase["rows"] = report["summary"]["checked"]
+            record["phases"] = context.profiler.phases
+
+        self.assertEqual([phase["name"] for phase in record["phases"]], ["validate"])
+        self.assertEqual(record["rows"], 1)
+        self.assertGreaterEqual(record["wallSeconds"], record["phases"][0]["wallSeconds"])
+        self.assertIn("cpuSeconds", record["phases"][0])
+        self.assertIn("processPeakRssBytes", record)
+        self.assertNotIn("peakRssBytes", record)
+
+        if hasattr(os, "wait4"):
+            allocate = "import sys; block = bytearray(64 * 1024 * 1024); sys.exit(3)"
+            exit_code, large = run_child([sys.executable, "-c", allocate])
+            _, small = run_child([sys.executable, "-c", "pass"])
+            self.assertEqual(exit_code, 3)
+            self.assertGreater(large - small, 32 * 1024 * 1024)
+
+        profile = cProfile.Profile()
+        profile.enable()
+        build_dataset_snapshot([make_feature() for _ in range(200)])
+        profile.disable()
+        speedscope = pstats_to_speedscope(pstats.Stats(profile), "snapshot")
+        frames = speedscope["shared"]["frames"]
+        sampled = speedscope["profiles"][0]
+
+        self.assertEqual(sampled["type"], "sampled")
+        self.assertEqual(len(sampled["samples"]), len(sampled["weights"]))
+        self.assertTrue(
+            any(
+                frames[index]["name"].startswith("build_dataset_snapshot")
+                for sample in sampled["samples"]
+                for index in sample
+            )
+        )
+
+    def test_synthetic_payload_passes_pipeline_validation(self):
+        raw = generate_raw_payload(300, seed=7)
+        data = validate_raw_payload(raw)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = parse_step.build_rows(data["federal_districts"])
+        geojson = make_geojson(build_step.build_features(rows))
+        enrichment = generate_enrichment_payload(checkpoint_ids(raw), seed=7)
+        report = build_research_coverage_report(geojson, enrichment, generated_at="test")
+
+        self.assertEqual(validate_rows(rows), 300)
+        self.assertEqual(validate_geojson(geojson), 300)
+        self.assertEqual(generate_raw_payload(300, seed=7), raw)
+        self.assertGreater(report["summary"]["describedCheckpoints"], 0)
+        self.assertGreater(report["summary"]["missingDescriptionCount"], 0)
+        self.assertLess(len(report["queues"]["missingWorkingTime"]), 300)
+
+    def test_compare_to_baselines_reports_regressions_past_tolerance(self):
+        baselines = {
+            "parse": {"seconds": 2.0, "peakBytes": 1000},
+            "build": {"seconds": 1.0, "peakBytes": 1000},
+        }
+        results = {
+            "parse": {"seconds": 2.5, "peakBytes": 1100},
+            "build": {"seconds": 2.0, "peakBytes": 1500},
+            "quality": {"seconds": 9.0, "peakBytes": 9000},
+        }
+
+        regressions = compare_to_baselines(results, baselines, time_tolerance=0.5, memory_tolerance=0.25)
+
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(message.startswith("build:") for message in regressions))
+
     def test_build_research_coverage_report_counts_gaps(self):
         geojson = make_geojson(
             [
@@ -296,6 +705,80 @@ class PipelineValidationTests(unittest.TestCase):
         self.assertEqual(report["queues"]["missingDescriptions"][0]["id"], "202")
         self.assertEqual(validate_research_coverage_report(report, geojson, enrichment), 2)
 
+    def test_research_coverage_groups_count_unique_ids_and_every_feature(self):
+        geojson = make_geojson(
+            [
+                make_feature(properties={"checkpoint_id": "101", "is_functional": ""}),
+                make_feature(properties={"checkpoint_id": "101", "is_functional": ""}),
+                make_feature(properties={"checkpoint_id": "202", "subject_name": "", "is_functional": "1"}),
+            ]
+        )
+        enrichment = {
+            "records": [
+                {"checkpointId": "101", "kind": "description", "summary": "Covered."},
+                {"checkpointId": "202", "kind": "news"},
+            ]
+        }
+
+        report = build_research_coverage_report(geojson, enrichment, generated_at="test")
+        by_subject = {row["label"]: row for row in report["bySubject"]}
+
+        self.assertEqual(report["summary"]["describedCheckpoints"], 1)
+        self.assertEqual(report["summary"]["missingDescriptionCount"], 2)
+        self.assertEqual(report["summary"]["qualityIssueCount"], 2)
+        self.assertEqual(report["summary"]["eventRecordCount"], 1)
+        self.assertEqual(by_subject["Приморский край"]["total"], 2)
+        self.assertEqual(by_subject["Приморский край"]["described"], 1)
+        self.assertEqual(by_subject["Приморский край"]["qualityIssues"], 2)
+        self.assertEqual(by_subject["Не указано"]["withEvents"], 1)
+        self.assertEqual(
+            [entry["issues"] for entry in report["queues"]["qualityIssues"]],
+            [["missing_operational_status"], ["missing_operational_status"]],
+        )
+
+    def test_coverage_cube_rolls_up_and_slices_without_features(self):
+        geojson = make_geojson(
+            [
+                make_feature(properties={"checkpoint_id": "101", "federal_district": "Дальневосточный"}),
+                make_feature(
+                    properties={
+                        "checkpoint_id": "202",
+                        "federal_district": "Дальневосточный",
+                        "checkpoint_type": "Морской",
+                        "foreign_country": "Китай",
+                    }
+                ),
+                make_feature(
+                    properties={
+                        "checkpoint_id": "303",
+                        "federal_district": "Южный",
+                        "subject_name": "Ростовская область",
+                        "foreign_country": "Китай",
+                    }
+                ),
+            ]
+        )
+        enrichment = {"records": [{"checkpointId": "202", "kind": "description", "summary": "Covered."}]}
+
+        report, cube = build_research_coverage(geojson, enrichment, generated_at="test")
+        restored = CoverageCube.from_dict(json.loads(serialize_coverage_cube(cube.to_dict())))
+        by_type_district = restored.rollup(["type", "district"])
+
+        self.assertEqual(restored.cells, cube.cells)
+        self.assertEqual(by_type_district[("Автомобильный", "Дальневосточный")]["total"], 1)
+        self.assertEqual(by_type_district[("Морской", "Дальневосточный")]["described"], 1)
+        self.assertEqual(restored.rollup()[()]["total"], 3)
+        self.assertEqual(
+            restored.rows(["subject"], where={"country": "Китай", "district": ["Южный"]}),
+            [{"subject": "Ростовская область", **restored.rollup(["subject"])[("Ростовская область",)]}],
+        )
+        self.assertEqual(
+            {row["label"]: row["total"] for row in report["byCountry"]},
+            {"Китай": 2, "Не указано": 1},
+        )
+        with self.assertRaisesRegex(ValueError, "no dimension"):
+            CoverageCube(["type"]).rollup(["district"])
+
     def test_validate_research_coverage_report_accepts_current_file(self):
         geojson = json.loads(
             (ROOT / "data/checkpoints.geojson").read_text(encoding="utf-8")
@@ -308,6 +791,701 @@ class PipelineValidationTests(unittest.TestCase):
         )
 
         self.assertEqual(validate_research_coverage_report(report, geojson, enrichment), 385)
+        self.assertEqual(
+            validate_research_coverage_report(
+                report,
+                geojson,
+                enrichment,
+                input_fingerprint=build_input_fingerprint(
+                    ROOT / "data/checkpoints.geojson",
+                    ROOT / "data/checkpoint_enrichment.json",
+                ),
+            ),
+            385,
+        )
+        self.assertGreater(check_queue_pages(report, ROOT), 0)
+
+    def test_research_coverage_queue_pages_are_sorted_by_priority_and_hashed(self):
+        geojson = make_geojson(
+            [
+                make_feature(properties={"checkpoint_id": "101", "is_functional": "1"}),
+                make_feature(properties={"checkpoint_id": "202", "is_functional": "", "working_time": ""}),
+                make_feature(properties={"checkpoint_id": "303", "is_functional": "1", "working_time": ""}),
+            ]
+        )
+        enrichment = {"records": [{"checkpointId": "101", "kind": "description", "summary": "Covered."}]}
+        report = build_research_coverage_report(geojson, enrichment, generated_at="test")
+
+        with tempfile.TemporaryDirectory() as directory:
+            pages_dir = Path(directory) / "research_coverage"
+            summary, pages = paginate_research_coverage_report(report, page_size=2, pages_dir=pages_dir)
+            for path, serialized in pages.items():
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                Path(path).write_text(serialized, encoding="utf-8")
+
+            listing = summary["queuePages"]["queues"]["missingEvents"]
+            first_page = json.loads(Path(listing["pages"][0]["path"]).read_text(encoding="utf-8"))
+
+            self.assertNotIn("queues", summary)
+            self.assertEqual((listing["items"], listing["pageCount"]), (3, 2))
+            self.assertEqual([item["id"] for item in first_page["items"]], ["202", "303"])
+            self.assertEqual(summary["queuePages"]["queues"]["qualityIssues"]["pages"][0]["maxPriority"], 4)
+            self.assertEqual(check_queue_pages(summary, Path("/")), 6)
+            self.assertEqual(
+                validate_research_coverage_report(summary, geojson, enrichment, deep=True),
+                3,
+            )
+
+            Path(listing["pages"][1]["path"]).write_text("{}\n", encoding="utf-8")
+            with self.assertRaisesRegex(ValueError, "does not match its hash"):
+                check_queue_pages(summary, Path("/"))
+
+    def test_data_server_negotiates_gzip_and_revalidates_with_etags(self):
+        async def exchange(server, path, **headers):
+            request = Request("GET", path, "HTTP/1.1", {name.replace("_", "-"): value for name, value in headers.items()})
+            return await server.dispatch(request)
+
+        async def scenario(root):
+            server = DataServer(root, quiet=True)
+            dataset = await exchange(server, "/data/checkpoints.geojson", accept_encoding="br;q=0, gzip")
+            revalidated = await exchange(
+                server,
+                "/data/checkpoints.geojson",
+                accept_encoding="gzip",
+                if_none_match=dataset.headers["ETag"],
+            )
+            ranged = await exchange(server, "/data/checkpoints.geojson", range="bytes=-10")
+            hashed = await exchange(server, "/app.0123abcd.js")
+            escaped = await exchange(server, "/../secret.txt")
+
+            await server.start("127.0.0.1", 0)
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+                writer.write(b"HEAD /app.0123abcd.js HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n")
+                raw = await reader.read()
+                writer.close()
+
+                # An idle keep-alive connection is closed by stop() rather than cancelled.
+                idle_reader, idle_writer = await asyncio.open_connection("127.0.0.1", server.port)
+                idle_writer.write(b"HEAD /app.0123abcd.js HTTP/1.1\r\nHost: test\r\n\r\n")
+                await idle_reader.readuntil(b"\r\n\r\n")
+                idle_tasks = list(server.connections.values())
+            finally:
+                await server.stop()
+            idle_closed = await idle_reader.read() == b""
+            idle_writer.close()
+            self.assertEqual(server.connections, {})
+            self.assertTrue(idle_closed)
+            self.assertTrue(idle_tasks and all(task.done() and not task.cancelled() for task in idle_tasks))
+
+            return dataset, revalidated, ranged, hashed, escaped, raw
+
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory) / "site"
+            (root / "data").mkdir(parents=True)
+            body = json.dumps(make_geojson([make_feature()]), ensure_ascii=False, indent=2).encode("utf-8") * 4
+            (root / "data/checkpoints.geojson").write_bytes(body)
+            (root / "app.0123abcd.js").write_text("console.log(1);\n", encoding="utf-8")
+            (Path(directory) / "secret.txt").write_text("secret\n", encoding="utf-8")
+
+            dataset, revalidated, ranged, hashed, escaped, raw = asyncio.run(scenario(root))
+
+        self.assertEqual(dataset.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(dataset.body), body)
+        self.assertTrue(dataset.headers["ETag"].endswith('-gzip"'))
+        self.assertEqual(dataset.headers["Cache-Control"], "no-cache")
+        self.assertEqual((revalidated.status, revalidated.body), (304, b""))
+        self.assertEqual((ranged.status, ranged.body), (206, body[-10:]))
+        self.assertEqual(hashed.headers["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(escaped.status, 404)
+        self.assertTrue(raw.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertTrue(raw.endswith(b"\r\n\r\n"))
+
+    def test_checkpoint_query_api_filters_paginates_and_reloads_new_versions(self):
+        def feature(checkpoint_id, lon, lat, checkpoint_type, country):
+            return make_feature(
+                properties={
+                    "checkpoint_id": checkpoint_id,
+                    "checkpoint_name": f"Пункт {checkpoint_id}",
+                    "checkpoint_type": checkpoint_type,
+                    "foreign_country": country,
+                    "subject_name": "Приморский край",
+                },
+                geometry={"coordinates": [lon, lat]},
+            )
+
+        features = [
+            feature("1", 131.9, 43.1, "Автомобильный пункт пропуска", "Китай"),
+            feature("2", 132.4, 43.4, "Автомобильный пункт пропуска", "Китай"),
+            feature("3", 131.8, 43.2, "Морской пункт пропуска", ""),
+            feature("4", 179.9, 65.0, "Морской пункт пропуска", ""),
+            feature("5", -179.9, 65.1, "Воздушный пункт пропуска", "Китай"),
+        ]
+
+        async def query(server, **params):
+            request = Request("GET", f"/api/checkpoints?{urlencode(params)}", "HTTP/1.1", {})
+            response = await server.dispatch(request)
+            return response.status, json.loads(response.body)
+
+        async def scenario(root):
+            server = DataServer(root, routes=default_routes(root), quiet=True)
+            results = [
+                await query(server, bbox="131,43,133,44", type="автомобильный", limit=1),
+                await query(server, lon=131.9, lat=43.1, radius=20),
+                await query(server, bbox="179,60,-179,70"),
+                await query(server, bbox="1,2,3"),
+                await query(server, subject="приморский"),
+            ]
+            (root / "data/checkpoints.geojson").write_text(
+                json.dumps(make_geojson(features[:2]), ensure_ascii=False),
+                encoding="utf-8",
+            )
+            results.append(await query(server, country="КИТАЙ"))
+            return results
+
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "data").mkdir()
+            (root / "data/checkpoints.geojson").write_text(
+                json.dumps(make_geojson(features), ensure_ascii=False),
+                encoding="utf-8",
+            )
+            paged, nearby, antimeridian, invalid, prefix, reloaded = asyncio.run(scenario(root))
+
+        ids = lambda payload: [item["properties"]["checkpoint_id"] for item in payload["features"]]  # noqa: E731
+        self.assertEqual((paged[0], paged[1]["numberMatched"], ids(paged[1])), (200, 2, ["1"]))
+        self.assertIn("offset=1", paged[1]["links"][-1]["href"])
+        self.assertEqual(ids(nearby[1]), ["1", "3"])
+        self.assertEqual(nearby[1]["features"][0]["properties"]["distance_km"], 0.0)
+        self.assertEqual(ids(antimeridian[1]), ["4", "5"])
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual(prefix[1]["numberMatched"], 0)
+        self.assertEqual(ids(reloaded[1]), ["1", "2"])
+        self.assertNotEqual(reloaded[1]["datasetVersion"], paged[1]["datasetVersion"])
+        self.assertEqual(
+            reloaded[1]["datasetVersion"],
+            build_dataset_version(build_dataset_snapshot(features[:2])),
+        )
+
+    def test_load_test_reports_latency_percentiles_per_request_kind(self):
+        async def scenario(root):
+            server = DataServer(root, quiet=True)
+            await server.start("127.0.0.1", 0)
+            try:
+                return await run_load_test(
+                    f"http://127.0.0.1:{server.port}",
+                    paths=["/data.json"],
+                    concurrency=3,
+                    duration=0.3,
+                    mix={"cold": 1, "conditional": 1, "compressed": 1},
+                )
+            finally:
+                await server.stop()
+
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "data.json").write_text(json.dumps({"items": list(range(500))}), encoding="utf-8")
+            report = asyncio.run(scenario(root))
+
+        totals = report["totals"]
+        self.assertGreater(totals["requests"], 0)
+        self.assertEqual((totals["errors"], totals["errorRate"]), (0, 0.0))
+        self.assertEqual(set(report["byKind"]["conditional"]["statuses"]), {"304"})
+        self.assertEqual(set(report["byKind"]["compressed"]["statuses"]), {"200"})
+        self.assertLessEqual(totals["latencyMs"]["p50"], totals["latencyMs"]["p99"])
+        self.assertEqual(sum(bucket["count"] for bucket in totals["histogram"]), totals["requests"])
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0], 0.5), 2.0)
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0], 0.99), 4.0)
+
+        stats = Stats()
+        stats.record(0.002, 200, 10)
+        stats.record(3.0, 503, 5)
+        stats.record(4.0, None, 0)
+        summary = stats.summary(1.0)
+        self.assertEqual((summary["requests"], summary["errors"], summary["bytesPerSecond"]), (3, 2, 15))
+        self.assertEqual(sum(bucket["count"] for bucket in summary["histogram"]), 3)
+        self.assertEqual((summary["latencyMs"]["p50"], summary["latencyMs"]["max"]), (3000.0, 4000.0))
+        self.assertEqual(summary["successLatencyMs"]["max"], 2.0)
+
+    def test_geopackage_export_updates_changed_checkpoints_and_rtree_in_place(self):
+        features = [
+            make_feature(properties={"checkpoint_id": "101"}, geometry={"coordinates": [131.9, 43.1]}),
+            make_feature(properties={"checkpoint_id": "202", "status": "Закрыт"}, geometry={"coordinates": [40.0, 50.0]}),
+            make_feature(properties={"checkpoint_id": "303"}, geometry={"coordinates": [-179.5, 65.0]}),
+        ]
+        enrichment = {"records": [{"checkpointId": "202", "kind": "description", "summary": "Описание."}]}
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "exports/checkpoints.gpkg"
+            first = write_geopackage(path, make_geojson(features), enrichment, dataset_version="v1")
+            unchanged = write_geopackage(path, make_geojson(features), enrichment, dataset_version="v1")
+
+            moved = make_feature(properties={"checkpoint_id": "101"}, geometry={"coordinates": [30.0, 60.0]})
+            second = write_geopackage(
+                path,
+                make_geojson([moved, features[1]]),
+                enrichment,
+                dataset_version="v2",
+            )
+            inside = query_bbox(path, (29.0, 49.0, 41.0, 61.0))
+            closed = query_bbox(path, (29.0, 49.0, 41.0, 61.0), status="Закрыт")
+
+            connection = open_geopackage(path)
+            try:
+                application_id = connection.execute("PRAGMA application_id").fetchone()[0]
+                rtree_ids = [row[0] for row in connection.execute("SELECT id FROM rtree_checkpoints_geom ORDER BY id")]
+                related = connection.execute(
+                    "SELECT c.checkpoint_id, e.summary FROM checkpoints_checkpoint_enrichment m "
+                    "JOIN checkpoints c ON c.fid = m.base_id JOIN checkpoint_enrichment e ON e.id = m.related_id"
+                ).fetchall()
+                geometry = connection.execute("SELECT geom FROM checkpoints WHERE checkpoint_id = '101'").fetchone()[0]
+            finally:
+                connection.close()
+
+            reader = open_geopackage(path)
+            try:
+                widened = make_feature(properties={"checkpoint_id": "404", "lanes": "4"})
+                rebuilt = write_geopackage(path, make_geojson([widened]), None, dataset_version="v3")
+                # The rebuild is swapped in whole; an open reader keeps the previous file.
+                old_rows = reader.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            finally:
+                reader.close()
+            new_rows = [row["checkpoint_id"] for row in query_bbox(path, (-180.0, -90.0, 180.0, 90.0), lanes="4")]
+            leftovers = sorted(item.name for item in path.parent.iterdir())
+
+        self.assertEqual((first["inserted"], unchanged["status"]), (3, "current"))
+        self.assertEqual((rebuilt["inserted"], old_rows, new_rows), (1, 2, ["404"]))
+        self.assertEqual(leftovers, ["checkpoints.gpkg"])
+        self.assertEqual(
+            {key: second[key] for key in ("inserted", "updated", "deleted", "unchanged")},
+            {"inserted": 0, "updated": 1, "deleted": 1, "unchanged": 1},
+        )
+        self.assertEqual(application_id, 0x47504B47)
+        self.assertEqual(rtree_ids, [1, 2])
+        self.assertEqual([row["checkpoint_id"] for row in inside], ["101", "202"])
+        self.assertEqual([row["checkpoint_id"] for row in closed], ["202"])
+        self.assertEqual(related, [("202", "Описание.")])
+        self.assertEqual(decode_point(geometry), (30.0, 60.0))
+
+    def test_flatgeobuf_export_round_trips_and_answers_bbox_through_the_packed_index(self):
+        features = [
+            make_feature(
+                properties={"checkpoint_id": str(index), "crossing_details": {"lanes": index % 3}},
+                geometry={"coordinates": [-179.5 + index * 7.3, 40.0 + (index * 11) % 30]},
+            )
+            for index in range(50)
+        ]
+        geojson = make_geojson(features)
+        encoded = encode_flatgeobuf(geojson, node_size=4)
+        reads = []
+
+        def read_range(offset, length):
+            reads.append(length)
+            return encoded[offset : offset + length]
+
+        reader = FlatGeobufReader(read_range)
+        bbox = (100.0, 45.0, 140.0, 60.0)
+        reads.clear()
+        found = reader.features(bbox=bbox)
+        indexed_bytes = sum(reads)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "exports/checkpoints.fgb"
+            size = write_flatgeobuf(path, geojson)
+            written = path.read_bytes()
+            file_reader = FlatGeobufReader.from_path(path)
+            try:
+                everything = file_reader.features()
+            finally:
+                file_reader.close()
+
+        def ids(items):
+            return sorted(item["properties"]["checkpoint_id"] for item in items)
+
+        expected = [
+            feature
+            for feature in features
+            if 100.0 <= feature["geometry"]["coordinates"][0] <= 140.0
+            and 45.0 <= feature["geometry"]["coordinates"][1] <= 60.0
+        ]
+        self.assertEqual(level_bounds(50, 4), [(18, 68), (5, 18), (1, 5), (0, 1)])
+        self.assertEqual((reader.features_count, reader.node_size, reader.crs), (50, 4, "EPSG:4326"))
+        self.assertEqual((size, written), (len(written), encode_flatgeobuf(geojson)))
+        self.assertEqual(ids(found), ids(expected))
+        self.assertLess(indexed_bytes, len(encoded) / 2)
+        self.assertEqual(
+            sorted(everything, key=lambda item: item["properties"]["checkpoint_id"]),
+            sorted(features, key=lambda item: item["properties"]["checkpoint_id"]),
+        )
+
+    def test_arrow_export_memory_maps_dictionary_and_coordinate_columns(self):
+        features = [
+            make_feature(properties={"checkpoint_id": "101"}, geometry={"coordinates": [131.9, 43.1]}),
+            make_feature(properties={"checkpoint_id": "202", "status": "Закрыт"}, geometry={"coordinates": [40.0, 50.0]}),
+            make_feature(properties={"checkpoint_id": "303", "status": None}, geometry={"coordinates": [-179.5, 65.0]}),
+        ]
+        enrichment = {"records": [{"checkpointId": "202", "kind": "description", "tags": ["rail"]}, "not a record"]}
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoints_path = Path(directory) / "exports/checkpoints.arrow"
+            enrichment_path = Path(directory) / "exports/checkpoint_enrichment.arrow"
+            write_arrow(checkpoints_path, checkpoint_columns(make_geojson(features)), {"datasetVersion": "v1"})
+            write_arrow(enrichment_path, enrichment_columns(enrichment))
+
+            with ArrowFile(checkpoints_path) as table:
+                metadata = table.metadata
+                status = table.column("status")
+                longitude = table.column("longitude")
+                counts = status.value_counts()
+                statuses = list(status)
+                ids = list(table.column("checkpoint_id"))
+            with ArrowFile(enrichment_path) as records:
+                enrichment_rows = list(records.rows())
+
+            write_arrow(checkpoints_path, checkpoint_columns(make_geojson(features[:1])))
+            (Path(directory) / "broken.arrow").write_bytes(b"not arrow")
+            with self.assertRaises(ValueError):
+                ArrowFile(Path(directory) / "broken.arrow")
+
+        self.assertEqual(metadata, {"datasetVersion": "v1"})
+        self.assertEqual(status.dictionary, sorted({"Закрыт", make_feature()["properties"]["status"]}))
+        self.assertEqual(statuses, [features[0]["properties"]["status"], "Закрыт", None])
+        self.assertEqual(counts, {features[0]["properties"]["status"]: 1, "Закрыт": 1})
+        self.assertIsInstance(longitude.values, memoryview)
+        self.assertEqual(list(longitude.values), [131.9, 40.0, -179.5])
+        self.assertEqual(ids, ["101", "202", "303"])
+        self.assertEqual(
+            [(row["checkpoint_id"], row["kind"], row["tags"], row["title"]) for row in enrichment_rows],
+            [("202", "description", '["rail"]', None)],
+        )
+
+    def test_dataset_releases_publish_atomically_reuse_unchanged_files_and_prune(self):
+        with tempfile.TemporaryDirectory() as directory:
+            base = Path(directory) / "data"
+            root = base / "releases"
+            geojson_path = base / "checkpoints.geojson"
+            report_path = base / "exports/report.json"
+
+            self.assertTrue(write_file_atomic(geojson_path, '{"features": []}\n'))
+            self.assertTrue(write_file_atomic(report_path, b"v1"))
+            os.utime(geojson_path, ns=(1, 1))
+            self.assertFalse(write_file_atomic(geojson_path, b'{"features": []}\n'))
+            self.assertEqual(geojson_path.stat().st_mtime_ns, 1)
+
+            first = publish_release([geojson_path, report_path], dataset_version="v1", root=root, base=base)
+            again = publish_release([geojson_path, report_path], dataset_version="v1", root=root, base=base)
+            write_file_atomic(report_path, b"v2")
+            second = publish_release([geojson_path, report_path], dataset_version="v2", root=root, base=base)
+            first_inode = (first["path"] / "checkpoints.geojson").stat().st_ino
+            second_inode = (second["path"] / "checkpoints.geojson").stat().st_ino
+            third = publish_release([geojson_path], dataset_version="v3", root=root, base=base, keep=2)
+
+            current = current_release(root)
+            manifest = load_manifest(current)
+            remaining = sorted(path.name for path in root.iterdir() if not path.name.startswith("."))
+            leftovers = [path.name for path in base.rglob("*.tmp")]
+
+            with self.assertRaises(ValueError):
+                publish_release([Path(directory) / "outside.json"], dataset_version="v4", root=root, base=base)
+
+        self.assertEqual((first["status"], again["status"], second["status"]), ("published", "current", "published"))
+        self.assertEqual((first["copied"], second["copied"], second["reused"]), (2, 1, 1))
+        self.assertEqual(first_inode, second_inode)
+        self.assertEqual(current.name, third["release"])
+        self.assertTrue(third["release"].startswith("v3-"))
+        self.assertEqual(third["pruned"], [first["release"]])
+        self.assertEqual(sorted(manifest["files"]), ["checkpoints.geojson"])
+        self.assertEqual(remaining, sorted(["current", second["release"], third["release"]]))
+        self.assertEqual(leftovers, [])
+
+    def test_dataset_patches_bring_older_versions_to_the_latest(self):
+        def version(geojson):
+            return build_dataset_version(build_dataset_snapshot(geojson["features"]))
+
+        oldest = make_geojson([make_feature(properties={"checkpoint_id": str(index)}) for index in range(1, 40)])
+        previous = make_geojson(
+            [
+                make_feature(properties={"checkpoint_id": str(index), "working_time": "08:00-20:00"})
+                for index in range(1, 40)
+            ]
+        )
+        current = make_geojson(
+            [make_feature(properties={"checkpoint_id": "1", "working_time": "круглосуточно"})]
+            + previous["features"][2:]
+            + [make_feature(properties={"checkpoint_id": "40"}, geometry={"coordinates": [30.0, 60.0]})]
+        )
+        unrelated = make_geojson([make_feature(properties={"checkpoint_id": str(index)}) for index in range(100, 103)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            latest_path = directory / "checkpoints.geojson"
+            latest_path.write_text(json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8")
+            paths = {}
+            for name, geojson in {"previous": previous, "oldest": oldest, "unrelated": unrelated}.items():
+                paths[name] = directory / f"{name}.geojson"
+                paths[name].write_text(json.dumps(geojson, ensure_ascii=False), encoding="utf-8")
+            patches_dir = directory / "patches"
+            patches_dir.mkdir()
+            (patches_dir / "old--stale.json").write_text("{}", encoding="utf-8")
+
+            manifest = write_patches(
+                current,
+                latest_path=latest_path,
+                previous_paths=[paths["previous"], paths["oldest"], paths["unrelated"]],
+                releases_dir=directory / "releases",
+                patches_dir=patches_dir,
+            )
+            patches = {
+                from_version: json.loads(Path(entry["path"]).read_text(encoding="utf-8"))
+                for from_version, entry in manifest["patches"].items()
+            }
+            again = write_patches(
+                current,
+                latest_path=latest_path,
+                releases_dir=directory / "releases",
+                patches_dir=patches_dir,
+            )
+            stale_exists = (patches_dir / "old--stale.json").exists()
+
+        self.assertEqual(manifest["latestVersion"], version(current))
+        self.assertEqual(sorted(manifest["patches"]), sorted([version(previous), version(oldest)]))
+        self.assertEqual(again["patches"], manifest["patches"])
+        self.assertFalse(stale_exists)
+        patch = patches[version(previous)]
+        self.assertEqual(patch["removed"], ["2"])
+        self.assertEqual(patch["changed"], [{"id": "1", "properties": {"working_time": "круглосуточно"}}])
+        self.assertEqual([feature["properties"]["checkpoint_id"] for feature in patch["added"]], ["40"])
+        self.assertLess(manifest["patches"][version(previous)]["size"], manifest["latest"]["size"] / 10)
+        self.assertEqual(len(manifest["latest"]["sha256"]), 64)
+        for from_geojson in (previous, oldest):
+            patched = apply_patch(from_geojson, patches[version(from_geojson)])
+            self.assertEqual(version(patched), version(current))
+        with self.assertRaises(ValueError):
+            apply_patch(unrelated, patch)
+
+    def test_report_cards_stream_from_the_card_section_with_markup_cleaned(self):
+        report = (
+            "# Report\n\n**Вне секции.** Не карточка.\n\n## Карточки КПП\n\n"
+            "**Кяхта.** Пункт на границе с \ue200entity\ue202[\"country\", \"Монголией\"]\ue201"
+            "  \ue200cite\ue202turn0search1\ue201.\nВторая строка.\n \n"
+            "Пояснение без названия.\n\n"
+            "**Забайкальск.** Крупнейший автомобильный пункт.\n"
+            "## Примечание по экспорту\n\n**После.** Не карточка.\n"
+        )
+        expected = [
+            {"name": "Кяхта", "summary": "Пункт на границе с Монголией. Вторая строка."},
+            {"name": "Забайкальск", "summary": "Крупнейший автомобильный пункт."},
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            report_path = Path(directory) / "report.md"
+            report_path.write_text(report, encoding="utf-8")
+
+            self.assertEqual(list(read_report_cards(report_path)), expected)
+
+        cards = iter_cards(iter(report.splitlines(keepends=True)[:9]))
+        self.assertEqual(next(cards)["name"], "Кяхта")
+        with self.assertRaises(SystemExit):
+            next(cards)
+
+    def test_enrichment_store_exports_current_file_and_answers_coverage_queries(self):
+        enrichment_path = ROOT / "data/checkpoint_enrichment.json"
+        raw = generate_raw_payload(400, seed=3)
+        synthetic = generate_enrichment_payload(checkpoint_ids(raw), seed=3)
+        synthetic["records"].append({"checkpointId": "", "kind": "news", "sourceTitle": "Без id"})
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = Path(directory) / "checkpoint_enrichment.json"
+            store_path = Path(directory) / "checkpoint_enrichment.sqlite"
+            json_path.write_bytes(enrichment_path.read_bytes())
+
+            with open_store(json_path, store_path) as store:
+                store.export_json(json_path)
+            self.assertEqual(json_path.read_bytes(), enrichment_path.read_bytes())
+
+            json_path.write_text(json.dumps(synthetic, ensure_ascii=False), encoding="utf-8")
+            with open_store(json_path, store_path) as store:
+                self.assertEqual(build_enrichment_index_from_store(store), _build_enrichment_index(synthetic))
+
+                checkpoint_id = synthetic["records"][0]["checkpointId"]
+                empty_description = {
+                    "checkpointId": checkpoint_id,
+                    "kind": "description",
+                    "sourceId": "deep-research-report",
+                }
+                store.upsert_records([empty_description])
+                descriptions = store.records(checkpoint_id=checkpoint_id, kind="description")
+                removed = store.delete_records(kind="news")
+
+                self.assertEqual(descriptions, [empty_description])
+                self.assertNotIn(checkpoint_id, store.checkpoint_ids(kind="description", with_summary=True))
+                self.assertGreater(removed, 0)
+                self.assertEqual(store.count(kind="news"), 0)
+                with self.assertRaises(ValueError):
+                    store.delete_records()
+
+    def test_report_batch_merges_records_by_confidence_then_report_name(self):
+        features = [
+            make_feature(properties={"checkpoint_id": "101", "checkpoint_name": "Кяхта"}),
+            make_feature(properties={"checkpoint_id": "202", "checkpoint_name": "Забайкальск"}),
+        ]
+
+        def report(name, cards):
+            body = "\n\n".join(f"**{card}.** {summary}" for card, summary in cards)
+            return name, f"## Карточки КПП\n\n{body}\n\n## Примечание по экспорту\n"
+
+        reports = [
+            report("a.md", [("Кяхта", "Старое описание."), ("Забайкальcк", "Неточное имя.")]),
+            report("b.md", [("Кяхта", "Новое описание.")]),
+            report("c.md", [("Забайкальск", "Точное имя."), ("Абагайтуй", "Нет в данных.")]),
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name, text in reports:
+                path = Path(directory) / name
+                path.write_text(text, encoding="utf-8")
+                # File times must not influence the merge; a.md is the newest file here.
+                os.utime(path, (1_700_000_000, 1_700_000_000 + (name == "a.md") * 100))
+
+            paths = collect_report_paths([Path(directory)])
+            serial = import_reports(paths, features, jobs=1)
+            pooled = import_reports(paths, features, jobs=2)
+
+        records = merge_report_records(pooled)
+        with EnrichmentStore(":memory:") as store:
+            store.load_payload({"records": [{"checkpointId": "101", "kind": "event", "sourceId": "news"}]})
+            apply_import(store, records, [item for result in pooled for item in result["skipped"]], pooled)
+            payload = store.to_payload()
+            # Re-importing only c.md drops the description that a.md and b.md gave checkpoint 101.
+            apply_import(store, merge_report_records(pooled[2:]), [], pooled[2:])
+            reimported = store.to_payload()
+
+        self.assertEqual([path.name for path in paths], ["a.md", "b.md", "c.md"])
+        self.assertEqual(serial, pooled)
+        self.assertEqual(
+            [(record["checkpointId"], record["summary"], record["confidence"]) for record in records],
+            [("101", "Новое описание.", "medium"), ("202", "Точное имя.", "medium")],
+        )
+        self.assertEqual(pooled[0]["fuzzyMatches"], 1)
+        self.assertEqual(len(payload["records"]), 3)
+        self.assertEqual(payload["importSummary"]["skippedDescriptions"][0]["source"], "c.md")
+        self.assertEqual(
+            [(record["checkpointId"], record["kind"]) for record in reimported["records"]],
+            [("101", "event"), ("202", "description")],
+        )
+
+        odd_ids = [
+            {"source": "d.md", "records": [{"checkpointId": checkpoint_id, "kind": "description", "sourceId": "x"}]}
+            for checkpoint_id in ["K-2", "10", "", "9", "²"]
+        ]
+        self.assertEqual(
+            [record["checkpointId"] for record in merge_report_records(odd_ids)],
+            ["", "9", "10", "K-2", "²"],
+        )
+        matches = [
+            {"feature": {"id": checkpoint_id}, "card": {"name": checkpoint_id, "summary": "Описание."}}
+            for checkpoint_id in ["K-2", "10", "", "9"]
+        ]
+        self.assertEqual(
+            [record["checkpointId"] for record in build_description_records(matches)],
+            ["", "9", "10", "K-2"],
+        )
+
+    def test_description_cards_match_by_fuzzy_name_and_summary_context(self):
+        def checkpoint(checkpoint_id, name, subject, country, checkpoint_type="Автомобильный пункт пропуска"):
+            return make_feature(
+                properties={
+                    "checkpoint_id": checkpoint_id,
+                    "checkpoint_name": name,
+                    "checkpoint_type": checkpoint_type,
+                    "subject_name": subject,
+                    "foreign_country": country,
+                }
+            )
+
+        features = [
+            checkpoint("256", "Пограничный", "Калининградская область", "Литва"),
+            checkpoint("257", "Пограничный", "Приморский край", "Китай"),
+            checkpoint("258", "Пограничный", "Приморский край", "Китай", "Железнодорожный пункт пропуска"),
+            checkpoint("91", "Донецк (Изварино)", "Луганская Народная Республика", "Украина"),
+            checkpoint("92", "Донецк (Северный)", "Ростовская область", "Украина"),
+            checkpoint("150", "Кяхта", "Республика Бурятия", "Монголия"),
+        ]
+        cards = [
+            {"name": "Пограничный", "summary": "Калининградский пункт; не путать с приморским МАПП."},
+            {"name": "Донецк (Извариное)", "summary": "Пункт на границе."},
+            {"name": "Кяхтa", "summary": "Главный пункт Бурятии на границе с Монголией."},
+            {"name": "Кяхоа", "summary": "Пункт на границе."},
+            {"name": "Абагайтуй", "summary": "Пункт в Забайкалье."},
+        ]
+
+        matched, skipped = match_cards_to_features(cards, features)
+
+        self.assertEqual(
+            [(item["card"]["name"], item["feature"]["id"], item["method"]) for item in matched],
+            [("Пограничный", "256", "exact"), ("Донецк (Извариное)", "91", "fuzzy"), ("Кяхтa", "150", "fuzzy")],
+        )
+        self.assertEqual([item["name"] for item in skipped], ["Кяхоа", "Абагайтуй"])
+        self.assertEqual(bounded_edit_distance("кяхта", "кяхоа", 1), 1)
+        self.assertEqual(bounded_edit_distance("изварино", "северный", 2), 3)
+
+    def test_research_coverage_fingerprint_detects_stale_inputs(self):
+        geojson = make_geojson([make_feature()])
+        enrichment = {"records": []}
+
+        with tempfile.TemporaryDirectory() as directory:
+            geojson_path = Path(directory) / "checkpoints.geojson"
+            enrichment_path = Path(directory) / "enrichment.json"
+            geojson_path.write_text(json.dumps(geojson), encoding="utf-8")
+            enrichment_path.write_text(json.dumps(enrichment), encoding="utf-8")
+            fingerprint = build_input_fingerprint(geojson_path, enrichment_path)
+            report = build_research_coverage_report(
+                geojson,
+                enrichment,
+                generated_at="test",
+                input_fingerprint=fingerprint,
+            )
+
+            enrichment_path.write_text(json.dumps({"records": [{"checkpointId": "101"}]}), encoding="utf-8")
+            stale_fingerprint = build_input_fingerprint(geojson_path, enrichment_path)
+
+        self.assertEqual(list(report)[4], "inputFingerprint")
+        self.assertEqual(
+            validate_research_coverage_report(report, geojson, enrichment, input_fingerprint=fingerprint),
+            1,
+        )
+        with self.assertRaisesRegex(ValueError, "stale.*enrichment"):
+            validate_research_coverage_report(report, geojson, enrichment, input_fingerprint=stale_fingerprint)
+
+        report["summary"]["qualityIssueCount"] = 5
+        validate_research_coverage_report(report, geojson, enrichment, input_fingerprint=fingerprint)
+        with self.assertRaisesRegex(ValueError, "summary"):
+            validate_research_coverage_report(
+                report,
+                geojson,
+                enrichment,
+                input_fingerprint=fingerprint,
+                deep=True,
+            )
+
+    def test_research_coverage_code_version_covers_imported_modules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            scripts = Path(directory)
+            (scripts / "report_step.py").write_text("from cube import build\n", encoding="utf-8")
+            (scripts / "cube.py").write_text("from store import load\n\nbuild = 1\n", encoding="utf-8")
+            (scripts / "store.py").write_text("load = 1\n", encoding="utf-8")
+            before = code_hash(Path("report_step.py"), scripts)
+            (scripts / "store.py").write_text("load = 2\n", encoding="utf-8")
+            after_dependency = code_hash(Path("report_step.py"), scripts)
+            (scripts / "store.py").write_text("load = 2\r\n", encoding="utf-8")
+            after_line_endings = code_hash(Path("report_step.py"), scripts)
+
+        self.assertNotEqual(before, after_dependency)
+        self.assertEqual(after_dependency, after_line_endings)
+        self.assertEqual(
+            report_code_version(),
+            code_hash(ROOT / "scripts" / "05_write_research_coverage_report.py")[:16],
+        )
 
 
 if __name__ == "__main__":